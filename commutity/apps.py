@@ -3,3 +3,18 @@ from django.apps import AppConfig
 
 class CommutityConfig(AppConfig):
     name = 'commutity'
+
+    def ready(self):
+        from djdashboard import warmup
+        warmup.register('database connections', _warm_up_databases)
+
+
+def _warm_up_databases() -> None:
+    """
+    Loads the database backends and connects. Connections are only kept for the first request
+    if the database's CONN_MAX_AGE allows it; otherwise this still pays for loading the backend.
+    """
+    from django.db import connections
+
+    for alias in connections:
+        connections[alias].ensure_connection()
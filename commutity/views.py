@@ -9,9 +9,6 @@ from .authentication.encryption import PasswordEncryptor
 
 
 logger = logging.getLogger(__name__)
-console_handler = logging.StreamHandler()
-console_handler.setLevel(logging.DEBUG)
-logger.addHandler(console_handler)
 
 ERROR_CTX = 'error'
 
@@ -31,9 +28,9 @@ class LoginView(generic.TemplateView):
     def post(self, request: HttpRequest) -> HttpResponse:
         """ Invoked on page submit """
         assert request.method == 'POST', 'expected POST request; received {0}'.format(request.method)
-        print(request.POST)
         username = request.POST['username']
         password = request.POST['password']
+        logger.debug('login attempt', extra={'username': username})
         context = {}
         if self._verify_user(username, password):
             # valid - login, redirect home
@@ -59,7 +56,6 @@ class LogoutView(generic.TemplateView):
     template_name = 'commutity/logout.html'
 
     def get(self, request: HttpRequest) -> HttpResponse:
-        print('get logout')
         if 'user' in request.session:
             user = request.session['user']
             info = request.session['info']
@@ -79,9 +75,8 @@ class CreateAccountView(generic.TemplateView):
         return super().get(request)
     
     def post(self, request: HttpRequest) -> HttpResponse:
-        print(request.POST)
         received = set(request.POST)
-        print(received)
+        logger.debug('account creation', extra={'fields': sorted(received)})
         expected = ('first_name',
                     'last_name',
                     'email',
@@ -0,0 +1,221 @@
+"""
+Heap snapshots with tracemalloc, to find what the process's memory grows with.
+
+The admin-only /heap view starts and stops tracing (POST action=start&frames=N, or action=stop), takes named snapshots
+(action=snapshot&name=...), and deletes them (action=delete&name=...). GET shows the tracing status and the snapshots,
+the top allocation sites of a snapshot (?snapshot=name), or the difference between two (?compare=old&to=new),
+grouped by file and line.
+
+Snapshots are reduced as soon as they're taken, so that they can't blow up the process: only the sizes of the
+HEAP_MAX_LINES largest allocation sites and the HEAP_MAX_TRACEBACKS largest tracebacks are kept,
+and only the newest HEAP_MAX_SNAPSHOTS snapshots.
+Tracing and snapshots belong to the process that serves the request -- with several server processes, make sure the
+requests reach the same one (every answer gives its process id), and engine processes (see pazaak/server/engine.py)
+can't be traced from here at all.
+"""
+import collections
+import datetime
+import os
+import threading
+import tracemalloc
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import HttpRequest, HttpResponse, JsonResponse
+
+
+_DEFAULT_FRAMES = 10
+_MAX_FRAMES = 64
+_DEFAULT_MAX_SNAPSHOTS = 10
+_DEFAULT_MAX_LINES = 10000
+_DEFAULT_MAX_TRACEBACKS = 25
+_DEFAULT_LIMIT = 25
+_MAX_LIMIT = 1000
+_MAX_NAME_LENGTH = 64
+
+# allocations made by tracemalloc and the import machinery say nothing about the app
+_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>'),
+)
+
+# lines: {(filename, lineno): (size, count)}, tracebacks: [(size, count, ['filename:lineno', ...])], largest first
+HeapSnapshot = collections.namedtuple('HeapSnapshot', ['name', 'taken', 'frames', 'size', 'count', 'lines', 'tracebacks'])
+
+_lock = threading.Lock()
+# name -> HeapSnapshot, oldest first
+_snapshots = collections.OrderedDict()
+
+
+def start(frames=None) -> int:
+    """
+    Starts tracing allocations, storing `frames` frames of their tracebacks (HEAP_TRACE_FRAMES by default).
+    Tracing again with a different number of frames starts over. Returns the number of frames.
+    """
+    if frames is None:
+        frames = getattr(settings, 'HEAP_TRACE_FRAMES', _DEFAULT_FRAMES)
+    if not 1 <= frames <= _MAX_FRAMES:
+        raise ValueError('the number of frames must be between 1 and {0}'.format(_MAX_FRAMES))
+
+    with _lock:
+        if tracemalloc.is_tracing() and tracemalloc.get_traceback_limit() != frames:
+            tracemalloc.stop()
+        tracemalloc.start(frames)
+    return frames
+
+
+def stop() -> None:
+    """
+    Stops tracing, and frees the traces. The snapshots taken are kept.
+    """
+    with _lock:
+        tracemalloc.stop()
+
+
+def take_snapshot(name: str) -> HeapSnapshot:
+    """
+    Snapshots the traced allocations as `name`, replacing any snapshot of that name,
+    and drops the oldest snapshots beyond HEAP_MAX_SNAPSHOTS.
+    """
+    if not name or len(name) > _MAX_NAME_LENGTH:
+        raise ValueError('a snapshot needs a name of at most {0} characters'.format(_MAX_NAME_LENGTH))
+    with _lock:
+        if not tracemalloc.is_tracing():
+            raise ValueError('start tracing before taking snapshots')
+        raw = tracemalloc.take_snapshot().filter_traces(_FILTERS)
+
+    max_lines = getattr(settings, 'HEAP_MAX_LINES', _DEFAULT_MAX_LINES)
+    max_tracebacks = getattr(settings, 'HEAP_MAX_TRACEBACKS', _DEFAULT_MAX_TRACEBACKS)
+    lines = raw.statistics('lineno')
+    tracebacks = raw.statistics('traceback')[:max_tracebacks] if raw.traceback_limit > 1 else []
+
+    snapshot = HeapSnapshot(
+        name=name,
+        taken=datetime.datetime.now(datetime.timezone.utc),
+        frames=raw.traceback_limit,
+        size=sum(statistic.size for statistic in lines),
+        count=sum(statistic.count for statistic in lines),
+        lines={_site(statistic): (statistic.size, statistic.count) for statistic in lines[:max_lines]},
+        tracebacks=[(statistic.size, statistic.count, [str(frame) for frame in statistic.traceback])
+                    for statistic in tracebacks],
+    )
+    # the raw snapshot holds every traced allocation; don't keep it around any longer than needed
+    del raw, lines, tracebacks
+
+    max_snapshots = getattr(settings, 'HEAP_MAX_SNAPSHOTS', _DEFAULT_MAX_SNAPSHOTS)
+    with _lock:
+        _snapshots.pop(name, None)
+        _snapshots[name] = snapshot
+        while len(_snapshots) > max_snapshots:
+            _snapshots.popitem(last=False)
+    return snapshot
+
+
+def delete_snapshot(name: str) -> None:
+    with _lock:
+        if _snapshots.pop(name, None) is None:
+            raise KeyError(name)
+
+
+def get_snapshot(name: str) -> HeapSnapshot:
+    with _lock:
+        return _snapshots[name]
+
+
+def status() -> dict:
+    current, peak = tracemalloc.get_traced_memory()
+    with _lock:
+        snapshots = list(_snapshots.values())
+    return {
+        'pid': os.getpid(),
+        'tracing': tracemalloc.is_tracing(),
+        'frames': tracemalloc.get_traceback_limit() if tracemalloc.is_tracing() else None,
+        'tracedMemory': current,
+        'peakTracedMemory': peak,
+        'tracingOverhead': tracemalloc.get_tracemalloc_memory(),
+        'snapshots': [{'name': snapshot.name, 'taken': snapshot.taken.isoformat(), 'frames': snapshot.frames,
+                       'size': snapshot.size, 'count': snapshot.count} for snapshot in snapshots],
+    }
+
+
+def top(snapshot: HeapSnapshot, limit=_DEFAULT_LIMIT) -> dict:
+    """
+    Returns the `limit` allocation sites (file and line) of `snapshot` holding the most memory,
+    and its largest tracebacks when it was taken with more than one frame.
+    """
+    sites = sorted(snapshot.lines.items(), key=lambda item: item[1][0], reverse=True)[:limit]
+    return {
+        'pid': os.getpid(),
+        'snapshot': snapshot.name,
+        'size': snapshot.size,
+        'count': snapshot.count,
+        'sites': [{'file': filename, 'line': lineno, 'size': size, 'count': count}
+                  for (filename, lineno), (size, count) in sites],
+        'tracebacks': [{'size': size, 'count': count, 'frames': frames}
+                       for size, count, frames in snapshot.tracebacks[:limit]],
+    }
+
+
+def compare(old: HeapSnapshot, new: HeapSnapshot, limit=_DEFAULT_LIMIT) -> dict:
+    """
+    Returns the `limit` allocation sites whose memory changed the most from `old` to `new`.
+    Sites that fell outside the HEAP_MAX_LINES largest of a snapshot count as empty in it.
+    """
+    differences = []
+    for site in old.lines.keys() | new.lines.keys():
+        old_size, old_count = old.lines.get(site, (0, 0))
+        size, count = new.lines.get(site, (0, 0))
+        if size != old_size or count != old_count:
+            differences.append((site, size, size - old_size, count, count - old_count))
+    differences.sort(key=lambda difference: abs(difference[2]), reverse=True)
+
+    return {
+        'pid': os.getpid(),
+        'old': old.name,
+        'new': new.name,
+        'sizeDiff': new.size - old.size,
+        'countDiff': new.count - old.count,
+        'sites': [{'file': filename, 'line': lineno, 'size': size, 'sizeDiff': size_diff, 'count': count,
+                   'countDiff': count_diff}
+                  for (filename, lineno), size, size_diff, count, count_diff in differences[:limit]],
+    }
+
+
+@staff_member_required
+def heap_view(request: HttpRequest) -> HttpResponse:
+    try:
+        if request.method == 'POST':
+            return JsonResponse(_post(request.POST))
+
+        limit = max(1, min(int(request.GET.get('limit', _DEFAULT_LIMIT)), _MAX_LIMIT))
+        if 'compare' in request.GET:
+            return JsonResponse(compare(get_snapshot(request.GET['compare']), get_snapshot(request.GET.get('to')), limit))
+        if 'snapshot' in request.GET:
+            return JsonResponse(top(get_snapshot(request.GET['snapshot']), limit))
+        return JsonResponse(status())
+    except KeyError as e:
+        return JsonResponse({'error': 'no snapshot named {0}'.format(e)}, status=404)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+
+def _post(data) -> dict:
+    action = data.get('action')
+    if action == 'start':
+        start(int(data['frames']) if 'frames' in data else None)
+    elif action == 'stop':
+        stop()
+    elif action == 'snapshot':
+        take_snapshot(data.get('name', ''))
+    elif action == 'delete':
+        delete_snapshot(data.get('name'))
+    else:
+        raise ValueError('unknown action "{0}" (expected start, stop, snapshot or delete)'.format(action))
+    return status()
+
+
+def _site(statistic: tracemalloc.Statistic) -> (str, int):
+    frame = statistic.traceback[0]
+    return frame.filename, frame.lineno
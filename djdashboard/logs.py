@@ -0,0 +1,161 @@
+"""
+Logging that never blocks the request threads on I/O.
+
+settings.LOGGING_CONFIG points Django at configure(), which applies settings.LOGGING as usual, then moves the
+handlers of every configured logger behind a queue: the loggers get a QueueHandler, and a QueueListener thread
+passes the records on to the original handlers (console, files, mail_admins...).
+The queues hold at most LOGGING_QUEUE_SIZE records; beyond that, records are dropped (and counted, see the
+logging_dropped_records gauge) rather than making a request wait.
+
+StructuredFormatter writes every record as one JSON object, including the fields passed with `extra=`,
+and DebugSampler keeps 1 in `rate` debug records of every logger it filters, for the noisy ones.
+"""
+import atexit
+import collections
+import copy
+import itertools
+import json
+import logging
+import logging.config
+import logging.handlers
+import queue
+import threading
+
+from django.conf import settings
+
+
+_DEFAULT_QUEUE_SIZE = 10000
+# attributes every LogRecord has, as opposed to the fields passed with `extra=`
+_RECORD_ATTRIBUTES = frozenset(logging.makeLogRecord({}).__dict__) | {'message', 'asctime'}
+
+# QueueHandler -> the QueueListener emptying its queue
+_listeners = {}
+_dropped = 0
+_dropped_lock = threading.Lock()
+
+
+
+class StructuredFormatter(logging.Formatter):
+    """
+    Formats records as JSON objects: time, level, logger, thread, message, any `extra=` fields, and the exception.
+    """
+    def format(self, record: logging.LogRecord) -> str:
+        fields = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'message': record.getMessage(),
+        }
+        fields.update((name, value) for name, value in record.__dict__.items() if name not in _RECORD_ATTRIBUTES)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            fields['exception'] = record.exc_text
+        return json.dumps(fields, default=str)
+
+
+
+class DebugSampler(logging.Filter):
+    """
+    Lets through 1 in `rate` DEBUG (and lower) records of every logger, and every record of higher levels.
+    Attach it to the noisy loggers themselves, in LOGGING's 'loggers'.
+    """
+    def __init__(self, rate=10):
+        super().__init__()
+        self._rate = rate
+        self._counters = collections.defaultdict(itertools.count)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG or self._rate <= 1:
+            return True
+        return next(self._counters[record.name]) % self._rate == 0
+
+
+
+class QueueHandler(logging.handlers.QueueHandler):
+    """
+    Puts records on a bounded queue without ever waiting, dropping them when it's full.
+    """
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # merge the arguments into the message now, as they may change once the call returns;
+        # unlike the base class, keep exc_info, which handlers such as mail_admins report on
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            global _dropped
+            with _dropped_lock:
+                _dropped += 1
+
+
+class QueueListener(logging.handlers.QueueListener):
+    """
+    Waits for room on a full queue to tell its thread to stop, rather than failing to.
+    """
+    def enqueue_sentinel(self) -> None:
+        self.queue.put(self._sentinel)
+
+
+def configure(config: dict) -> None:
+    """
+    Applies `config` with logging.config.dictConfig(), then puts every configured logger's handlers behind a queue.
+    Loggers sharing the same handlers share a queue.
+    """
+    # configuring again starts over from the handlers themselves
+    _unqueue()
+    logging.config.dictConfig(config)
+
+    queue_size = getattr(settings, 'LOGGING_QUEUE_SIZE', _DEFAULT_QUEUE_SIZE)
+    queue_handlers = {}
+    for logger in _loggers():
+        handlers = tuple(logger.handlers)
+        if not handlers:
+            continue
+        if handlers not in queue_handlers:
+            queue_handler = queue_handlers[handlers] = QueueHandler(queue.Queue(queue_size))
+            _listeners[queue_handler] = QueueListener(queue_handler.queue, *handlers, respect_handler_level=True)
+            _listeners[queue_handler].start()
+        for handler in handlers:
+            logger.removeHandler(handler)
+        logger.addHandler(queue_handlers[handlers])
+
+    from djdashboard import metrics
+    metrics.register_gauge('logging_dropped_records', dropped_records, 'Log records dropped because their queue was full.')
+
+
+def dropped_records() -> int:
+    return _dropped
+
+
+@atexit.register
+def stop() -> None:
+    """
+    Stops the listeners, once they've handled every record queued so far.
+    """
+    while _listeners:
+        _, listener = _listeners.popitem()
+        listener.stop()
+
+
+def _unqueue() -> None:
+    """
+    Gives the loggers their handlers back, and stops the listeners.
+    """
+    for logger in _loggers():
+        for handler in list(logger.handlers):
+            if handler in _listeners:
+                logger.removeHandler(handler)
+                for target in _listeners[handler].handlers:
+                    logger.addHandler(target)
+    stop()
+
+
+def _loggers() -> [logging.Logger]:
+    return [logging.getLogger()] + [logger for logger in list(logging.Logger.manager.loggerDict.values())
+                                    if isinstance(logger, logging.Logger)]
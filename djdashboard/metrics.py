@@ -0,0 +1,220 @@
+"""
+Request metrics, served in the Prometheus text format at /metrics.
+
+MetricsMiddleware counts the requests to every view by method and status code, and records their latencies in a
+histogram with fixed buckets. Every thread accumulates into a shard of its own, so recording a request takes no lock;
+a scrape adds the shards up, and folds the shards of threads that have exited into the totals.
+Apps register gauges -- functions sampled at every scrape -- usually from their AppConfig.ready(),
+the same way they register warm-up stages (see djdashboard/warmup.py).
+"""
+import bisect
+import logging
+import threading
+import time
+
+from django.http import HttpRequest, HttpResponse
+
+
+logger = logging.getLogger(__name__)
+
+# upper bounds of the latency histogram's buckets, in seconds (the +Inf bucket is implicit)
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# label of requests that didn't resolve to a view (e.g. 404s), and of unexpected HTTP methods
+_UNMATCHED = '<unmatched>'
+_OTHER_METHOD = 'OTHER'
+_METHODS = frozenset(('GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS', 'TRACE', 'CONNECT'))
+
+# (name, help, callable) triples, in the order they were registered
+_gauges = []
+
+
+
+class _Shard:
+    """
+    The requests recorded by one thread. Only that thread writes to it.
+    """
+    __slots__ = ('thread', 'requests', 'latencies')
+
+    def __init__(self, thread):
+        self.thread = thread
+        # (view, method, status) -> count
+        self.requests = {}
+        # view -> [count of every bucket, count of the +Inf bucket, sum of the latencies]
+        self.latencies = {}
+
+    def merge(self, requests: dict, latencies: dict) -> None:
+        for key, count in requests.items():
+            self.requests[key] = self.requests.get(key, 0) + count
+        for view, histogram in latencies.items():
+            total = self.latencies.setdefault(view, [0] * (len(histogram) - 1) + [0.0])
+            for index, value in enumerate(histogram):
+                total[index] += value
+
+
+
+class RequestMetrics:
+    """
+    Request counts and latency histograms, accumulated per thread.
+    """
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._shards = []
+        self._retired = _Shard(None)
+
+    def record(self, view: str, method: str, status: int, seconds: float) -> None:
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._local.shard = self._new_shard()
+
+        key = (view, method, status)
+        requests = shard.requests
+        requests[key] = requests.get(key, 0) + 1
+
+        histogram = shard.latencies.get(view)
+        if histogram is None:
+            histogram = shard.latencies[view] = [0] * (len(self.buckets) + 1) + [0.0]
+        histogram[bisect.bisect_left(self.buckets, seconds)] += 1
+        histogram[-1] += seconds
+
+    def snapshot(self) -> ({tuple: int}, {str: list}):
+        """
+        Returns the request counts by (view, method, status), and the latency histogram of every view:
+        the count of every bucket (not cumulative), of the +Inf bucket, and the sum of the latencies.
+        """
+        with self._lock:
+            live = []
+            for shard in self._shards:
+                if shard.thread.is_alive():
+                    live.append(shard)
+                else:
+                    # nothing writes to the shard of an exited thread anymore
+                    self._retired.merge(shard.requests, shard.latencies)
+            self._shards = live
+
+            total = _Shard(None)
+            total.merge(self._retired.requests, self._retired.latencies)
+
+        for shard in live:
+            # copying a dict or a list holds the GIL, so a copy is consistent even while its thread keeps recording
+            total.merge(dict(shard.requests), {view: list(histogram) for view, histogram in list(shard.latencies.items())})
+        return total.requests, total.latencies
+
+    def _new_shard(self) -> _Shard:
+        shard = _Shard(threading.current_thread())
+        with self._lock:
+            self._shards.append(shard)
+        return shard
+
+
+request_metrics = RequestMetrics()
+
+
+
+class MetricsMiddleware:
+    """
+    Records the view, method, status code and latency of every request.
+    Put it first in MIDDLEWARE, so that the latency covers the rest of the middleware as well.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        start = time.perf_counter()
+        response = self.get_response(request)
+        seconds = time.perf_counter() - start
+
+        match = getattr(request, 'resolver_match', None)
+        method = request.method if request.method in _METHODS else _OTHER_METHOD
+        request_metrics.record(match.view_name if match else _UNMATCHED, method, response.status_code, seconds)
+        return response
+
+
+def metrics_view(request: HttpRequest) -> HttpResponse:
+    return HttpResponse(render(), content_type=CONTENT_TYPE)
+
+
+def register_gauge(name: str, function=None, help=''):
+    """
+    Registers `function` to be called, without arguments, at every scrape, and served as the gauge `name`.
+    It returns a number, or None to leave the gauge out of that scrape.
+    Can also be used as a decorator: `@metrics.register_gauge('my_gauge', help='...')`.
+    Registering a name twice replaces the earlier gauge.
+    """
+    if function is None:
+        return lambda function: register_gauge(name, function, help)
+
+    unregister_gauge(name)
+    _gauges.append((name, help, function))
+    return function
+
+
+def unregister_gauge(name: str) -> None:
+    _gauges[:] = [gauge for gauge in _gauges if gauge[0] != name]
+
+
+def gauges() -> {str: float}:
+    """
+    Samples every gauge. A gauge that fails is logged and left out.
+    """
+    values = {}
+    for name, _, function in list(_gauges):
+        try:
+            value = function()
+        except Exception:
+            logger.exception('gauge "%s" failed', name)
+            continue
+        if value is not None:
+            values[name] = value
+    return values
+
+
+def render(metrics=request_metrics) -> str:
+    """
+    Renders the request metrics and the gauges in the Prometheus text exposition format.
+    """
+    requests, latencies = metrics.snapshot()
+    lines = [
+        '# HELP djdashboard_requests_total Requests served, by view, method and status code.',
+        '# TYPE djdashboard_requests_total counter',
+    ]
+    for (view, method, status), count in sorted(requests.items()):
+        lines.append('djdashboard_requests_total{{view="{0}",method="{1}",status="{2}"}} {3}'.format(
+            _escape(view), method, status, count))
+
+    lines += [
+        '# HELP djdashboard_request_duration_seconds Time spent serving requests, by view.',
+        '# TYPE djdashboard_request_duration_seconds histogram',
+    ]
+    bounds = [_format_number(bound) for bound in metrics.buckets] + ['+Inf']
+    for view, histogram in sorted(latencies.items()):
+        view = _escape(view)
+        cumulative = 0
+        for bound, count in zip(bounds, histogram):
+            cumulative += count
+            lines.append('djdashboard_request_duration_seconds_bucket{{view="{0}",le="{1}"}} {2}'.format(
+                view, bound, cumulative))
+        lines.append('djdashboard_request_duration_seconds_sum{{view="{0}"}} {1}'.format(view, _format_number(histogram[-1])))
+        lines.append('djdashboard_request_duration_seconds_count{{view="{0}"}} {1}'.format(view, cumulative))
+
+    values = gauges()
+    for name, help, _ in list(_gauges):
+        if name in values:
+            lines += [
+                '# HELP {0} {1}'.format(name, help or name),
+                '# TYPE {0} gauge'.format(name),
+                '{0} {1}'.format(name, _format_number(values[name])),
+            ]
+    return '\n'.join(lines) + '\n'
+
+
+def _escape(label: str) -> str:
+    return label.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
@@ -0,0 +1,199 @@
+"""
+On-demand profiling of single requests.
+
+ProfilingMiddleware runs a request under cProfile when it carries a signed profiling token (in the X-Profile header or
+the `profile` query parameter), or when it's one of the 1 in PROFILING_SAMPLE_RATE requests sampled, and saves the
+profile to PROFILING_DIRECTORY as a .pstats file, keeping only the newest PROFILING_MAX_FILES of them.
+Profiling is off unless PROFILING_DIRECTORY is set.
+
+The admin-only /profiles view lists the saved profiles along with a fresh token, shows the top functions of a profile
+by cumulative time (?name=...), or downloads it for other tools such as snakeviz (?name=...&download).
+Only one request is profiled at a time; the requests that would overlap it run unprofiled.
+"""
+import cProfile
+import datetime
+import io
+import itertools
+import logging
+import pathlib
+import pstats
+import re
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core import signing
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import FileResponse, Http404, HttpRequest, HttpResponse, JsonResponse
+
+
+logger = logging.getLogger(__name__)
+
+HEADER = 'X-Profile'
+QUERY_PARAMETER = 'profile'
+# response header naming the saved profile, on requests that asked for one
+FILE_HEADER = 'X-Profile-File'
+
+_SALT = 'djdashboard.profiling'
+_SUFFIX = '.pstats'
+_DEFAULT_MAX_FILES = 100
+_DEFAULT_TOKEN_MAX_AGE = 60 * 60
+_TOP_FUNCTIONS = 40
+
+
+def profile_directory() -> pathlib.Path or None:
+    directory = getattr(settings, 'PROFILING_DIRECTORY', None)
+    return pathlib.Path(directory) if directory else None
+
+
+def make_token() -> str:
+    """
+    Returns a token that gets requests profiled for PROFILING_TOKEN_MAX_AGE seconds.
+    """
+    return signing.dumps(QUERY_PARAMETER, salt=_SALT)
+
+
+def is_valid_token(token: str) -> bool:
+    max_age = getattr(settings, 'PROFILING_TOKEN_MAX_AGE', _DEFAULT_TOKEN_MAX_AGE)
+    try:
+        return signing.loads(token, salt=_SALT, max_age=max_age) == QUERY_PARAMETER
+    except signing.BadSignature:
+        return False
+
+
+
+class ProfilingMiddleware:
+    """
+    Profiles the requests that ask for it, and a sample of the rest.
+    Put it last in MIDDLEWARE, so that the profiles are about the view rather than the other middleware.
+    """
+    def __init__(self, get_response):
+        self._directory = profile_directory()
+        if self._directory is None:
+            raise MiddlewareNotUsed('PROFILING_DIRECTORY is not set')
+
+        self.get_response = get_response
+        self._sample_rate = getattr(settings, 'PROFILING_SAMPLE_RATE', 0)
+        self._max_files = getattr(settings, 'PROFILING_MAX_FILES', _DEFAULT_MAX_FILES)
+        self._requests = itertools.count(1)
+        # not every version of cProfile can run on two threads at once
+        self._lock = threading.Lock()
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        requested = self._is_requested(request)
+        if not requested and not self._is_sampled():
+            return self.get_response(request)
+        if not self._lock.acquire(blocking=False):
+            logger.debug('not profiling %s: another request is being profiled', request.path)
+            return self.get_response(request)
+
+        try:
+            profile = cProfile.Profile()
+            start = time.perf_counter()
+            profile.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profile.disable()
+            seconds = time.perf_counter() - start
+        finally:
+            self._lock.release()
+
+        name = self._save(profile, request, seconds)
+        if requested and name:
+            response[FILE_HEADER] = name
+        return response
+
+    @staticmethod
+    def _is_requested(request: HttpRequest) -> bool:
+        token = request.META.get('HTTP_X_PROFILE') or request.GET.get(QUERY_PARAMETER)
+        return bool(token) and is_valid_token(token)
+
+    def _is_sampled(self) -> bool:
+        return self._sample_rate > 0 and next(self._requests) % self._sample_rate == 0
+
+    def _save(self, profile: cProfile.Profile, request: HttpRequest, seconds: float) -> str or None:
+        """
+        Saves `profile` under a name that sorts chronologically, then deletes the oldest profiles beyond the cap.
+        Returns the profile's name, or None if it couldn't be saved.
+        """
+        match = getattr(request, 'resolver_match', None)
+        label = re.sub('[^A-Za-z0-9]+', '-', match.view_name if match else 'unmatched').strip('-')
+        name = '{0}-{1}-{2}ms{3}'.format(datetime.datetime.utcnow().strftime('%Y%m%dT%H%M%S.%f'), label,
+                                         round(seconds * 1000), _SUFFIX)
+        try:
+            self._directory.mkdir(parents=True, exist_ok=True)
+            profile.dump_stats(str(self._directory / name))
+            prune(self._directory, self._max_files)
+        except OSError:
+            logger.exception('failed to save the profile of %s', request.path)
+            return None
+
+        logger.info('profiled %s %s in %.1f ms: %s', request.method, request.path, seconds * 1000, name)
+        return name
+
+
+def prune(directory: pathlib.Path, max_files: int) -> None:
+    """
+    Deletes the oldest profiles in `directory`, keeping `max_files` of them.
+    """
+    paths = sorted(directory.glob('*' + _SUFFIX))
+    for path in paths[:max(len(paths) - max_files, 0)]:
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            # pruned by another server process
+            pass
+
+
+def saved_profiles(directory: pathlib.Path) -> [dict]:
+    """
+    Returns the name, size (in bytes) and modification time of every saved profile, newest first.
+    """
+    profiles = []
+    for path in sorted(directory.glob('*' + _SUFFIX), reverse=True):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        profiles.append({
+            'name': path.name,
+            'size': stat.st_size,
+            'modified': datetime.datetime.fromtimestamp(stat.st_mtime, datetime.timezone.utc).isoformat(),
+        })
+    return profiles
+
+
+def top_functions(path: pathlib.Path, limit=_TOP_FUNCTIONS) -> str:
+    """
+    Returns the `limit` functions of the profile at `path` with the highest cumulative time, as printed by pstats.
+    """
+    stream = io.StringIO()
+    pstats.Stats(str(path), stream=stream).sort_stats('cumulative').print_stats(limit)
+    return stream.getvalue()
+
+
+@staff_member_required
+def profiles_view(request: HttpRequest) -> HttpResponse:
+    directory = profile_directory()
+    if directory is None:
+        raise Http404('profiling is off: PROFILING_DIRECTORY is not set')
+
+    name = request.GET.get('name')
+    if name is None:
+        return JsonResponse({
+            'token': make_token(),
+            'header': HEADER,
+            'queryParameter': QUERY_PARAMETER,
+            'profiles': saved_profiles(directory) if directory.is_dir() else [],
+        })
+
+    path = directory / name
+    if pathlib.Path(name).name != name or not name.endswith(_SUFFIX) or not path.is_file():
+        raise Http404('no profile named "{0}"'.format(name))
+    if 'download' in request.GET:
+        response = FileResponse(path.open('rb'), content_type='application/octet-stream')
+        response['Content-Disposition'] = 'attachment; filename="{0}"'.format(name)
+        return response
+    return HttpResponse(top_functions(path), content_type='text/plain; charset=utf-8')
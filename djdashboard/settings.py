@@ -38,11 +38,14 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'commutity.apps.CommutityConfig',
     'flick.apps.FlickConfig',
     'pazaak.apps.PazaakConfig',
 ]
 
 MIDDLEWARE = [
+    # first, so that request latencies cover the other middleware (see djdashboard/metrics.py)
+    'djdashboard.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -50,6 +53,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    # last, so that profiles are about the views rather than the other middleware (see djdashboard/profiling.py)
+    'djdashboard.profiling.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'djdashboard.urls'
@@ -123,4 +128,119 @@ USE_TZ = True
 STATIC_URL = '/static/'
 
 
-SESSION_ENGINE = 'django.contrib.sessions.backends.cache'
\ No newline at end of file
+SESSION_ENGINE = 'django.contrib.sessions.backends.cache'
+
+# Logging (see djdashboard/logs.py): the handlers of every configured logger are moved behind queues emptied by a
+# background thread, so that requests never wait on log I/O; past LOGGING_QUEUE_SIZE waiting records, records are dropped.
+LOGGING_CONFIG = 'djdashboard.logs.configure'
+LOGGING_QUEUE_SIZE = 10000
+_APP_LOG_LEVEL = 'DEBUG' if DEBUG else 'INFO'
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'structured': {'()': 'djdashboard.logs.StructuredFormatter'},
+    },
+    'filters': {
+        'sample_debug': {'()': 'djdashboard.logs.DebugSampler', 'rate': 100},
+    },
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler', 'formatter': 'structured'},
+    },
+    'loggers': {
+        'djdashboard': {'handlers': ['console'], 'level': 'INFO'},
+        'commutity': {'handlers': ['console'], 'level': _APP_LOG_LEVEL},
+        'flick': {'handlers': ['console'], 'level': _APP_LOG_LEVEL},
+        'pazaak': {'handlers': ['console'], 'level': _APP_LOG_LEVEL},
+        # a line for every move the hard opponent searches
+        'pazaak.game.mcts': {'filters': ['sample_debug']},
+    },
+}
+
+# Per-request profiling (see djdashboard/profiling.py): requests carrying a token from the admin-only /profiles view
+# (valid for PROFILING_TOKEN_MAX_AGE seconds), and 1 in PROFILING_SAMPLE_RATE requests (0 samples none), are run under cProfile.
+# Their profiles are saved to PROFILING_DIRECTORY, which keeps the newest PROFILING_MAX_FILES; None turns profiling off.
+PROFILING_DIRECTORY = None
+PROFILING_SAMPLE_RATE = 0
+PROFILING_MAX_FILES = 100
+PROFILING_TOKEN_MAX_AGE = 60 * 60
+
+# Heap snapshots (see djdashboard/heap.py): the admin-only /heap view traces allocations with HEAP_TRACE_FRAMES frames
+# unless told otherwise, and keeps the newest HEAP_MAX_SNAPSHOTS snapshots, each reduced to its HEAP_MAX_LINES largest
+# allocation sites and HEAP_MAX_TRACEBACKS largest tracebacks.
+HEAP_TRACE_FRAMES = 10
+HEAP_MAX_SNAPSHOTS = 10
+HEAP_MAX_LINES = 10000
+HEAP_MAX_TRACEBACKS = 25
+
+# Pazaak
+
+# Regenerate pazaak/react/src/js/enums.js on startup (only written when the enums changed).
+# Production builds should run `manage.py export_enums` and turn this off.
+PAZAAK_EXPORT_ENUMS_ON_STARTUP = True
+
+# Per-move search budget of the hard (Monte Carlo tree search) opponent, in milliseconds.
+PAZAAK_MCTS_BUDGET_MS = 5
+
+# Engine processes holding the live games, shared by every web server process (see pazaak/server/engine.py):
+# the address of each engine, a Unix socket path or a [host, port] pair. `manage.py run_engines` starts them.
+# An empty list keeps the games in each web server process.
+PAZAAK_ENGINES = []
+# Key the web server processes authenticate to the engines with; None derives one from SECRET_KEY.
+PAZAAK_ENGINE_AUTHKEY = None
+
+# Estimated memory (in bytes) the live games may use, shared between the engine processes if there are any.
+# Starting a game beyond it evicts finished games, then spare games, then the least recently played games,
+# or answers 503 when none can be evicted.
+PAZAAK_GAME_MEMORY_BUDGET = 64 * 1024 * 1024
+
+# Estimated memory (in bytes) one game may hold; bounds the search table of the hard opponent.
+PAZAAK_GAME_MEMORY_LIMIT = 1024 * 1024
+
+# Bearer token accepted by the game export, audit and stats endpoints (and sent by `manage.py export_games` and `loadtest`);
+# None allows staff users only.
+PAZAAK_EXPORT_TOKEN = os.environ.get('PAZAAK_EXPORT_TOKEN')
+
+# Updates per page of the game audit endpoint (admin-only, like the export endpoint), unless the request asks otherwise.
+PAZAAK_AUDIT_PAGE_SIZE = 100
+
+# Spare games kept ready (and recycled from finished ones) by each game manager, to speed up starting new games.
+PAZAAK_GAME_POOL_SIZE = 32
+
+# Draw cards from a finite main deck (four of each card from 1 to 10, reshuffled when empty) instead of unlimited draws.
+PAZAAK_FINITE_SHOE = False
+
+# Per-client token buckets limiting the Pazaak API (see pazaak/server/throttling.py):
+# each request takes a token, and a client's bucket refills at `rate` tokens per second up to `burst` tokens.
+PAZAAK_THROTTLE_RATES = {
+    'new-game': {'rate': 0.5, 'burst': 10},
+    'move': {'rate': 10, 'burst': 30},
+}
+# Cache (from CACHES) holding the token buckets; use a shared backend to limit clients across server processes.
+PAZAAK_THROTTLE_CACHE = 'default'
+
+# Live games are snapshotted to this file every PAZAAK_SNAPSHOT_INTERVAL seconds and at shutdown,
+# and restored from it when a server process starts (see djdashboard/wsgi.py and pazaak/server/snapshots.py);
+# None turns snapshots off.
+# With PAZAAK_ENGINES, `manage.py run_engines` takes the snapshots rather than the web server processes.
+PAZAAK_SNAPSHOT_FILE = None
+PAZAAK_SNAPSHOT_INTERVAL = 60
+
+# Archive finished games to the database (the ArchivedGame model) in the background, in batches of
+# PAZAAK_ARCHIVE_BATCH_SIZE, or every PAZAAK_ARCHIVE_FLUSH_INTERVAL_MS milliseconds (see pazaak/server/archive.py).
+# At most PAZAAK_ARCHIVE_MAX_PENDING games wait to be written; beyond that, the request that ended a game waits up to
+# PAZAAK_ARCHIVE_PUT_TIMEOUT_MS for room, then drops the game from the archive (counted by the
+# pazaak_archive_dropped_games gauge). Off by default: it needs the ArchivedGame table migrated.
+PAZAAK_ARCHIVE_GAMES = False
+PAZAAK_ARCHIVE_BATCH_SIZE = 100
+PAZAAK_ARCHIVE_FLUSH_INTERVAL_MS = 1000
+PAZAAK_ARCHIVE_MAX_PENDING = 10000
+PAZAAK_ARCHIVE_PUT_TIMEOUT_MS = 50
+
+# Player-vs-player matchmaking (see pazaak/server/matchmaking.py): players are bucketed by rating, PAZAAK_MATCHMAKING_BUCKET_WIDTH
+# points per bucket, and their window widens by a bucket per 1 / PAZAAK_MATCHMAKING_WIDEN_PER_SECOND seconds of waiting,
+# up to PAZAAK_MATCHMAKING_MAX_RADIUS buckets. Players that stop polling for PAZAAK_MATCHMAKING_ABANDON_AFTER seconds leave.
+PAZAAK_MATCHMAKING_BUCKET_WIDTH = 100
+PAZAAK_MATCHMAKING_WIDEN_PER_SECOND = 1.0
+PAZAAK_MATCHMAKING_MAX_RADIUS = 5
+PAZAAK_MATCHMAKING_ABANDON_AFTER = 30
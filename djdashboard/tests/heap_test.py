@@ -0,0 +1,102 @@
+import json
+import os
+import unittest
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'djdashboard.settings')
+import django
+django.setup()
+from django.conf.urls import url
+from django.contrib import admin
+from django.contrib.auth.models import AnonymousUser, User
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.test.utils import override_settings
+from djdashboard import heap
+
+
+# the admin login page, for the view to send other users to
+urlpatterns = [
+    url(r'^admin/', admin.site.urls),
+    url(r'^heap$', heap.heap_view, name='heap'),
+]
+
+
+class HeapViewTest(unittest.TestCase):
+
+    def setUp(self):
+        # the test runner would allow the test server's host
+        override = override_settings(ROOT_URLCONF=__name__, ALLOWED_HOSTS=['testserver'])
+        override.enable()
+        self.addCleanup(override.disable)
+        self.factory = RequestFactory()
+        self.admin = User(username='admin', is_staff=True, is_active=True)
+
+    def tearDown(self):
+        heap.stop()
+        for snapshot in heap.status()['snapshots']:
+            heap.delete_snapshot(snapshot['name'])
+
+    def _get(self, user=None, **parameters) -> HttpResponse:
+        request = self.factory.get('/heap', parameters)
+        request.user = user or self.admin
+        return heap.heap_view(request)
+
+    def _post(self, user=None, **data) -> HttpResponse:
+        request = self.factory.post('/heap', data)
+        request.user = user or self.admin
+        return heap.heap_view(request)
+
+    def test_admins_only(self):
+        for user in (AnonymousUser(), User(username='player', is_active=True)):
+            for response in (self._get(user), self._post(user, action='start')):
+                self.assertEqual(302, response.status_code)
+                self.assertIn('/admin/login/', response['Location'])
+        self.assertFalse(heap.status()['tracing'])
+
+    def test_starts_and_stops_tracing(self):
+        context = json.loads(self._post(action='start', frames=3).content.decode())
+        self.assertTrue(context['tracing'])
+        self.assertEqual(3, context['frames'])
+        self.assertEqual(os.getpid(), context['pid'])
+
+        context = json.loads(self._post(action='stop').content.decode())
+        self.assertFalse(context['tracing'])
+
+    def test_compares_snapshots(self):
+        self._post(action='start', frames=1)
+        self._post(action='snapshot', name='before')
+        blocks = [bytearray(1000) for _ in range(1000)]
+        self._post(action='snapshot', name='after')
+
+        context = json.loads(self._get(compare='before', to='after').content.decode())
+        self.assertEqual('before', context['old'])
+        self.assertGreaterEqual(context['sizeDiff'], 1000 * 1000)
+        site = context['sites'][0]
+        self.assertEqual(__file__, site['file'])
+        self.assertGreaterEqual(site['sizeDiff'], 1000 * 1000)
+        self.assertGreaterEqual(site['countDiff'], 1000)
+
+        context = json.loads(self._get(snapshot='after', limit=1).content.decode())
+        self.assertEqual(1, len(context['sites']))
+        self.assertEqual([], context['tracebacks'])
+        del blocks
+
+    def test_keeps_the_newest_snapshots(self):
+        heap.start(1)
+        with override_settings(HEAP_MAX_SNAPSHOTS=2):
+            for name in ('first', 'second', 'third'):
+                heap.take_snapshot(name)
+        self.assertEqual(['second', 'third'], [snapshot['name'] for snapshot in heap.status()['snapshots']])
+
+        self._post(action='delete', name='second')
+        self.assertEqual(['third'], [snapshot['name'] for snapshot in heap.status()['snapshots']])
+
+    def test_errors(self):
+        self.assertEqual(404, self._get(snapshot='missing').status_code)
+        self.assertEqual(400, self._post(action='snapshot', name='untraced').status_code)
+        self.assertEqual(400, self._post(action='start', frames=1000).status_code)
+        self.assertEqual(400, self._post(action='explode').status_code)
+        self.assertEqual(404, self._post(action='delete', name='missing').status_code)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,156 @@
+import json
+import logging
+import os
+import sys
+import threading
+import unittest
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'djdashboard.settings')
+import django
+django.setup()
+from django.conf import settings
+from django.test.utils import override_settings
+from djdashboard import logs
+
+
+class _Collecting(logging.Handler):
+    """
+    Keeps the records it handles, and the threads it handles them on; handling waits for `proceed` to be set.
+    """
+    def __init__(self, level=logging.NOTSET):
+        super().__init__(level)
+        self.records = []
+        self.threads = set()
+        self.proceed = threading.Event()
+        self.proceed.set()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.proceed.wait(5)
+        self.records.append(record)
+        self.threads.add(threading.current_thread())
+
+
+class QueuedLoggingTest(unittest.TestCase):
+
+    def setUp(self):
+        self.handlers = []
+        # put the project's logging back as it was
+        self.addCleanup(logs.configure, settings.LOGGING)
+
+    def _handler(self, level=logging.NOTSET) -> _Collecting:
+        handler = _Collecting(level)
+        self.handlers.append(handler)
+        return handler
+
+    def _configure(self, loggers: {str: str}, handlers=('collect',), level='DEBUG') -> None:
+        logs.configure({
+            'version': 1,
+            'disable_existing_loggers': False,
+            'handlers': {
+                'collect': {'()': self._handler},
+                'warnings': {'()': self._handler, 'level': 'WARNING'},
+            },
+            'loggers': {name: {'handlers': list(handlers), 'level': level, 'propagate': False} for name in loggers},
+        })
+
+    def test_records_reach_the_handlers_through_the_queue(self):
+        self._configure(['logs-test'])
+        logger = logging.getLogger('logs-test')
+        self.assertEqual([logs.QueueHandler], [type(handler) for handler in logger.handlers])
+
+        logger.info('played %s moves', 3)
+        logs.stop()
+        handler = self.handlers[0]
+        self.assertEqual(['played 3 moves'], [record.getMessage() for record in handler.records])
+        self.assertNotIn(threading.current_thread(), handler.threads)
+
+    def test_arguments_are_merged_when_logging(self):
+        self._configure(['logs-test'])
+        hand = [1, 2]
+        logging.getLogger('logs-test').info('hand: %s', hand)
+        hand.append(3)
+        try:
+            1 / 0
+        except ZeroDivisionError:
+            logging.getLogger('logs-test').exception('failed')
+        logs.stop()
+
+        records = self.handlers[0].records
+        self.assertEqual(['hand: [1, 2]', 'failed'], [record.getMessage() for record in records])
+        self.assertIs(ZeroDivisionError, records[1].exc_info[0])
+
+    def test_handler_levels_are_respected(self):
+        self._configure(['logs-test'], handlers=('collect', 'warnings'))
+        logger = logging.getLogger('logs-test')
+        logger.info('info')
+        logger.warning('warning')
+        logs.stop()
+
+        collect, warnings = self.handlers
+        self.assertEqual(['info', 'warning'], [record.getMessage() for record in collect.records])
+        self.assertEqual(['warning'], [record.getMessage() for record in warnings.records])
+
+    def test_loggers_sharing_handlers_share_a_queue(self):
+        self._configure(['logs-test', 'logs-test-too'])
+        self.assertEqual(logging.getLogger('logs-test').handlers, logging.getLogger('logs-test-too').handlers)
+
+    def test_configuring_again_starts_over(self):
+        self._configure(['logs-test'])
+        self._configure(['logs-test'])
+        logging.getLogger('logs-test').info('once')
+        logs.stop()
+        self.assertEqual(1, len(logging.getLogger('logs-test').handlers))
+        # every configuration made its own 'collect' and 'warnings' handlers
+        first, _, second, _ = self.handlers
+        self.assertEqual([], first.records)
+        self.assertEqual(['once'], [record.getMessage() for record in second.records])
+
+    def test_full_queues_drop_records(self):
+        with override_settings(LOGGING_QUEUE_SIZE=1):
+            self._configure(['logs-test'])
+        handler = self.handlers[0]
+        handler.proceed.clear()
+        dropped = logs.dropped_records()
+
+        # the listener holds on to the first record at most; the queue fits one more
+        for index in range(3):
+            logging.getLogger('logs-test').info('record %s', index)
+        self.assertGreaterEqual(logs.dropped_records(), dropped + 1)
+        handler.proceed.set()
+        logs.stop()
+        self.assertEqual(3, len(handler.records) + logs.dropped_records() - dropped)
+
+
+class StructuredFormatterTest(unittest.TestCase):
+
+    def test_formats_records_as_json(self):
+        record = logging.makeLogRecord({'name': 'pazaak', 'levelno': logging.INFO, 'levelname': 'INFO',
+                                        'msg': 'game %s over', 'args': (7,), 'gameId': 7})
+        fields = json.loads(logs.StructuredFormatter().format(record))
+        self.assertEqual('game 7 over', fields['message'])
+        self.assertEqual('INFO', fields['level'])
+        self.assertEqual('pazaak', fields['logger'])
+        self.assertEqual(7, fields['gameId'])
+        self.assertNotIn('exception', fields)
+
+    def test_includes_the_exception(self):
+        try:
+            1 / 0
+        except ZeroDivisionError:
+            record = logging.getLogger('logs-test').makeRecord('logs-test', logging.ERROR, __file__, 0, 'failed', (),
+                                                               sys.exc_info())
+        self.assertIn('ZeroDivisionError', json.loads(logs.StructuredFormatter().format(record))['exception'])
+
+
+class DebugSamplerTest(unittest.TestCase):
+
+    def test_samples_debug_records_of_every_logger(self):
+        sampler = logs.DebugSampler(rate=3)
+        debug = [sampler.filter(logging.makeLogRecord({'name': name, 'levelno': logging.DEBUG}))
+                 for _ in range(6) for name in ('first', 'second')]
+        self.assertEqual(4, sum(debug))
+        self.assertTrue(all(sampler.filter(logging.makeLogRecord({'name': 'first', 'levelno': logging.INFO}))
+                            for _ in range(6)))
+
+
+if __name__ == '__main__':
+    unittest.main()
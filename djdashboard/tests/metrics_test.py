@@ -0,0 +1,118 @@
+import os
+import threading
+import unittest
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'djdashboard.settings')
+import django
+django.setup()
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.urls import ResolverMatch
+from djdashboard import metrics
+
+
+class RequestMetricsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.metrics = metrics.RequestMetrics(buckets=(0.1, 1.0))
+
+    def test_counts_requests_and_latencies(self):
+        self.metrics.record('view', 'GET', 200, 0.05)
+        self.metrics.record('view', 'GET', 200, 0.5)
+        self.metrics.record('view', 'POST', 500, 5.0)
+
+        requests, latencies = self.metrics.snapshot()
+        self.assertEqual({('view', 'GET', 200): 2, ('view', 'POST', 500): 1}, requests)
+        self.assertEqual([1, 1, 1, 5.55], [round(value, 2) for value in latencies['view']])
+
+    def test_adds_up_the_shards_of_every_thread(self):
+        def serve():
+            for _ in range(100):
+                self.metrics.record('view', 'GET', 200, 0.01)
+
+        threads = [threading.Thread(target=serve) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.metrics.record('view', 'GET', 200, 0.01)
+
+        # the exited threads' shards are folded into the totals, and still counted on later scrapes
+        for _ in range(2):
+            requests, latencies = self.metrics.snapshot()
+            self.assertEqual(401, requests[('view', 'GET', 200)])
+            self.assertEqual(401, latencies['view'][0])
+
+
+class RenderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.metrics = metrics.RequestMetrics(buckets=(0.1, 1.0))
+        self.addCleanup(metrics.unregister_gauge, 'test_gauge')
+        self.addCleanup(metrics.unregister_gauge, 'test_failing_gauge')
+
+    def test_renders_counters_and_cumulative_histograms(self):
+        self.metrics.record('pazaak:play', 'POST', 200, 0.05)
+        self.metrics.record('pazaak:play', 'POST', 200, 0.5)
+        self.metrics.record('say "hi"', 'GET', 404, 0.05)
+        lines = metrics.render(self.metrics).splitlines()
+
+        self.assertIn('# TYPE djdashboard_requests_total counter', lines)
+        self.assertIn('djdashboard_requests_total{view="pazaak:play",method="POST",status="200"} 2', lines)
+        self.assertIn('djdashboard_requests_total{view="say \\"hi\\"",method="GET",status="404"} 1', lines)
+        self.assertIn('# TYPE djdashboard_request_duration_seconds histogram', lines)
+        self.assertIn('djdashboard_request_duration_seconds_bucket{view="pazaak:play",le="0.1"} 1', lines)
+        self.assertIn('djdashboard_request_duration_seconds_bucket{view="pazaak:play",le="1.0"} 2', lines)
+        self.assertIn('djdashboard_request_duration_seconds_bucket{view="pazaak:play",le="+Inf"} 2', lines)
+        self.assertIn('djdashboard_request_duration_seconds_count{view="pazaak:play"} 2', lines)
+
+    def test_renders_gauges(self):
+        metrics.register_gauge('test_gauge', lambda: 3, 'A test gauge.')
+        metrics.register_gauge('test_failing_gauge', lambda: 1 / 0)
+        text = metrics.render(self.metrics)
+
+        self.assertIn('# HELP test_gauge A test gauge.\n# TYPE test_gauge gauge\ntest_gauge 3\n', text)
+        self.assertNotIn('test_failing_gauge', text)
+
+    def test_registering_again_replaces_the_gauge(self):
+        metrics.register_gauge('test_gauge', lambda: 1)
+        metrics.register_gauge('test_gauge', lambda: 2)
+        self.assertEqual(2, metrics.gauges()['test_gauge'])
+
+
+class MetricsMiddlewareTest(unittest.TestCase):
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def _count(self, key: tuple) -> int:
+        return metrics.request_metrics.snapshot()[0].get(key, 0)
+
+    def _serve(self, request, view_name=None, status=200) -> HttpResponse:
+        def get_response(request):
+            if view_name is not None:
+                request.resolver_match = ResolverMatch(lambda request: None, (), {}, url_name=view_name)
+            return HttpResponse(status=status)
+        return metrics.MetricsMiddleware(get_response)(request)
+
+    def test_counts_requests_by_view_method_and_status(self):
+        key = ('metrics-test', 'POST', 201)
+        before = self._count(key)
+        self._serve(self.factory.post('/test'), 'metrics-test', status=201)
+        self._serve(self.factory.post('/test'), 'metrics-test', status=201)
+        self.assertEqual(before + 2, self._count(key))
+
+    def test_unresolved_requests_and_unknown_methods(self):
+        key = ('<unmatched>', 'OTHER', 404)
+        before = self._count(key)
+        self._serve(self.factory.generic('BREW', '/coffee'), status=404)
+        self.assertEqual(before + 1, self._count(key))
+
+    def test_serves_the_exposition_format(self):
+        self._serve(self.factory.get('/test'), 'metrics-test')
+        response = metrics.metrics_view(self.factory.get('/metrics'))
+        self.assertEqual(metrics.CONTENT_TYPE, response['Content-Type'])
+        self.assertIn('djdashboard_requests_total{view="metrics-test",method="GET",status="200"}', response.content.decode())
+
+
+if __name__ == '__main__':
+    unittest.main()
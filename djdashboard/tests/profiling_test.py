@@ -0,0 +1,123 @@
+import json
+import os
+import pathlib
+import shutil
+import tempfile
+import unittest
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'djdashboard.settings')
+import django
+django.setup()
+from django.contrib.auth.models import User
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import Http404, HttpResponse
+from django.test import RequestFactory
+from django.test.utils import override_settings
+from djdashboard import profiling
+
+
+def _view(request):
+    return HttpResponse(str(sum(range(1000))))
+
+
+class ProfilingMiddlewareTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = pathlib.Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, str(self.directory))
+        self.factory = RequestFactory()
+
+    def _middleware(self, **settings) -> profiling.ProfilingMiddleware:
+        with override_settings(PROFILING_DIRECTORY=str(self.directory), **settings):
+            return profiling.ProfilingMiddleware(_view)
+
+    def _profiles(self) -> [str]:
+        return sorted(path.name for path in self.directory.glob('*.pstats'))
+
+    def test_off_unless_a_directory_is_set(self):
+        with override_settings(PROFILING_DIRECTORY=None):
+            self.assertRaises(MiddlewareNotUsed, profiling.ProfilingMiddleware, _view)
+
+    def test_requests_without_a_token_are_not_profiled(self):
+        middleware = self._middleware()
+        for request in (self.factory.get('/'), self.factory.get('/', {'profile': 'forged'}),
+                        self.factory.get('/', HTTP_X_PROFILE='forged')):
+            response = middleware(request)
+            self.assertEqual(200, response.status_code)
+            self.assertNotIn(profiling.FILE_HEADER, response)
+        self.assertEqual([], self._profiles())
+
+    def test_requests_with_a_token_are_profiled(self):
+        middleware = self._middleware()
+        response = middleware(self.factory.get('/', HTTP_X_PROFILE=profiling.make_token()))
+        self.assertEqual([response[profiling.FILE_HEADER]], self._profiles())
+
+        middleware(self.factory.get('/', {'profile': profiling.make_token()}))
+        self.assertEqual(2, len(self._profiles()))
+        self.assertIn('_view', profiling.top_functions(self.directory / self._profiles()[0]))
+
+    def test_expired_tokens_are_refused(self):
+        token = profiling.make_token()
+        with override_settings(PROFILING_TOKEN_MAX_AGE=-1):
+            self.assertFalse(profiling.is_valid_token(token))
+        self.assertTrue(profiling.is_valid_token(token))
+
+    def test_samples_requests(self):
+        middleware = self._middleware(PROFILING_SAMPLE_RATE=3)
+        for _ in range(7):
+            self.assertNotIn(profiling.FILE_HEADER, middleware(self.factory.get('/')))
+        self.assertEqual(2, len(self._profiles()))
+
+    def test_keeps_the_newest_profiles(self):
+        middleware = self._middleware(PROFILING_SAMPLE_RATE=1, PROFILING_MAX_FILES=2)
+        for _ in range(4):
+            middleware(self.factory.get('/'))
+        self.assertEqual(2, len(self._profiles()))
+
+        for name in ('a.pstats', 'b.pstats', 'c.pstats'):
+            (self.directory / name).touch()
+        profiling.prune(self.directory, 2)
+        self.assertEqual(['b.pstats', 'c.pstats'], self._profiles())
+
+
+class ProfilesViewTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = pathlib.Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, str(self.directory))
+        override = override_settings(PROFILING_DIRECTORY=str(self.directory), PROFILING_SAMPLE_RATE=1)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.factory = RequestFactory()
+
+    def _get(self, **parameters) -> HttpResponse:
+        request = self.factory.get('/profiles', parameters)
+        request.user = User(username='admin', is_staff=True, is_active=True)
+        return profiling.profiles_view(request)
+
+    def test_lists_profiles_with_a_token(self):
+        profiling.ProfilingMiddleware(_view)(self.factory.get('/'))
+        context = json.loads(self._get().content.decode())
+        self.assertTrue(profiling.is_valid_token(context['token']))
+        self.assertEqual([path.name for path in self.directory.glob('*.pstats')],
+                         [profile['name'] for profile in context['profiles']])
+
+    def test_shows_and_downloads_a_profile(self):
+        profiling.ProfilingMiddleware(_view)(self.factory.get('/'))
+        name = next(self.directory.glob('*.pstats')).name
+        self.assertIn('cumulative', self._get(name=name).content.decode())
+        download = self._get(name=name, download='')
+        self.addCleanup(download.close)
+        self.assertIn('attachment', download['Content-Disposition'])
+
+    def test_serves_only_saved_profiles(self):
+        (self.directory / 'notes.txt').touch()
+        for name in ('missing.pstats', 'notes.txt', '../profiling_test.py'):
+            self.assertRaises(Http404, self._get, name=name)
+
+    def test_not_found_when_profiling_is_off(self):
+        with override_settings(PROFILING_DIRECTORY=None):
+            self.assertRaises(Http404, self._get)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import os
+import unittest
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'djdashboard.settings')
+import django
+django.setup()
+from django.apps import apps
+from djdashboard import warmup
+
+
+class WarmupTest(unittest.TestCase):
+
+    def setUp(self):
+        # run only this test's stages, and put the apps' stages back afterwards
+        saved = list(warmup._stages)
+        self.addCleanup(warmup._stages.__setitem__, slice(None), saved)
+        warmup._stages.clear()
+        self.ran = []
+
+    def _stage(self, name):
+        return lambda: self.ran.append(name)
+
+    def test_registers_stages_in_order(self):
+        warmup.register('first', self._stage('first'))
+
+        @warmup.register('second')
+        def second():
+            self.ran.append('second')
+
+        warmup.register('first', self._stage('first again'))
+        self.assertEqual(['second', 'first'], warmup.stages())
+
+        warmup.unregister('second')
+        self.assertEqual(['first'], warmup.stages())
+
+    def test_skips_failed_stages_and_times_the_others(self):
+        def fail():
+            raise RuntimeError('no database')
+
+        warmup.register('first', self._stage('first'))
+        warmup.register('failing', fail)
+        warmup.register('last', self._stage('last'))
+
+        with self.assertLogs('djdashboard.warmup', 'ERROR'):
+            timings = warmup.run()
+        self.assertEqual(['first', 'last'], self.ran)
+        self.assertEqual(['first', 'failing', 'last'], list(timings))
+        self.assertIsNone(timings['failing'])
+        for name in ('first', 'last'):
+            self.assertGreaterEqual(timings[name], 0)
+
+    def test_apps_register_their_stages(self):
+        self.addCleanup(warmup._stages.clear)
+        apps.get_app_config('commutity').ready()
+        self.assertEqual(['database connections'], warmup.stages())
+
+
+if __name__ == '__main__':
+    unittest.main()
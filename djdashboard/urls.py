@@ -16,8 +16,13 @@ Including another URLconf
 from django.conf.urls import include, url
 from django.contrib import admin
 
+from djdashboard import heap, metrics, profiling
+
 urlpatterns = [
     url(r'^admin/', admin.site.urls),
     url(r'^flick/', include('flick.urls')),
-    url(r'^pazaak/', include('pazaak.urls'))
+    url(r'^pazaak/', include('pazaak.urls')),
+    url(r'^metrics$', metrics.metrics_view, name='metrics'),
+    url(r'^profiles$', profiling.profiles_view, name='profiles'),
+    url(r'^heap$', heap.heap_view, name='heap'),
 ]
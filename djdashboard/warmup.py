@@ -0,0 +1,71 @@
+"""
+Worker warm-up.
+
+The first request a new worker serves otherwise pays for everything done lazily: importing the views,
+building the URL patterns, opening the database connection, and whatever each app caches on first use.
+Apps register warm-up stages (usually from their AppConfig.ready()), and djdashboard/wsgi.py runs them all
+once the WSGI application is loaded, logging how long every stage took.
+A stage that fails is logged and skipped -- warming up must never keep a worker from starting.
+"""
+import logging
+import time
+
+
+logger = logging.getLogger(__name__)
+
+# (name, callable) pairs, in the order they were registered
+_stages = []
+
+
+def register(name: str, function=None):
+    """
+    Registers `function` to be run, without arguments, as the warm-up stage `name`.
+    Can also be used as a decorator: `@warmup.register('my stage')`.
+    Registering a name twice replaces the earlier stage.
+    """
+    if function is None:
+        return lambda function: register(name, function)
+
+    unregister(name)
+    _stages.append((name, function))
+    return function
+
+
+def unregister(name: str) -> None:
+    _stages[:] = [(stage, function) for stage, function in _stages if stage != name]
+
+
+def stages() -> [str]:
+    return [name for name, _ in _stages]
+
+
+def run() -> {str: float or None}:
+    """
+    Runs every warm-up stage, and returns the seconds each one took (None for the ones that failed).
+    """
+    timings = {}
+    start = time.perf_counter()
+    for name, function in list(_stages):
+        stage_start = time.perf_counter()
+        try:
+            function()
+        except Exception:
+            logger.exception('warm-up stage "%s" failed', name)
+            timings[name] = None
+            continue
+        timings[name] = time.perf_counter() - stage_start
+        logger.info('warm-up stage "%s" took %.1f ms', name, timings[name] * 1000)
+
+    logger.info('warmed up %s stages in %.1f ms', len(timings), (time.perf_counter() - start) * 1000)
+    return timings
+
+
+@register('url patterns')
+def _warm_up_urls() -> None:
+    """
+    Imports every URLconf (and so every view module), and builds the resolver's lookup tables.
+    """
+    from django.urls import get_resolver
+
+    get_resolver().reverse_dict
+
@@ -1,7 +1,9 @@
 """
 WSGI config for djdashboard project.
 
-It exposes the WSGI callable as a module-level variable named ``application``.
+It exposes the WSGI callable as a module-level variable named ``application``,
+after running the apps' warm-up stages (see djdashboard/warmup.py), so that a new worker's first request is as fast as the rest.
+Serving processes also restore and keep snapshotting the Pazaak games here, which management commands don't need to.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/1.11/howto/deployment/wsgi/
@@ -14,3 +16,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "djdashboard.settings")
 
 application = get_wsgi_application()
+
+# the warm-up stages need the apps loaded
+from djdashboard import warmup
+from pazaak.apps import start_snapshots
+start_snapshots()
+warmup.run()
@@ -1,5 +1,33 @@
+import sys
+import time
+
 from django.apps import AppConfig
 
 
 class FlickConfig(AppConfig):
-    name = 'flick'
\ No newline at end of file
+    name = 'flick'
+
+    def ready(self):
+        from djdashboard import metrics, warmup
+        warmup.register('flick encryption', _warm_up_encryption)
+        metrics.register_gauge('flick_lights_cache_age_seconds', _lights_cache_age,
+                               'Seconds since the light controller last refreshed its cached lights.')
+
+
+def _warm_up_encryption() -> None:
+    """
+    Loads the Crypto modules the light controller's encryption needs.
+    """
+    from flick.security import encryption
+
+
+def _lights_cache_age() -> float or None:
+    """
+    Returns the seconds since the light controller last refreshed its cached lights, or None if it never has.
+    The views are looked up rather than imported, since importing them authenticates with the bridge;
+    if they aren't loaded, no lights are cached either.
+    """
+    views = sys.modules.get('flick.views')
+    if views is None or views.LightControllerView.lights_refreshed_at is None:
+        return None
+    return time.monotonic() - views.LightControllerView.lights_refreshed_at
@@ -8,9 +8,6 @@ import uuid
 from flick.security import encryption
 
 logger = logging.getLogger(__name__)
-console_handler = logging.StreamHandler()
-console_handler.setLevel(logging.DEBUG)
-logger.addHandler(console_handler)
 
 __reference_dir = 'properties'
 __reference_file = 'credentials.txt'
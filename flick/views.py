@@ -6,6 +6,7 @@ from django.views.decorators.csrf import csrf_exempt
 
 import json
 import logging
+import time
 import urllib.error
 
 from .lights.controller import LightController
@@ -13,9 +14,6 @@ from .security import setup
 
 
 logger = logging.getLogger(__name__)
-console_handler = logging.StreamHandler()
-console_handler.setLevel(logging.DEBUG)
-logger.addHandler(console_handler)
 
 # flick#web admin
 bridge_ip_address, admin_username = setup.authenticate()
@@ -57,13 +55,15 @@ class LightControllerView(generic.TemplateView):
     template_name = 'flick/light-controller.html'
     controller = LightController(bridge_ip_address, admin_username)
     lights = {}
+    # time.monotonic() of the last refresh of `lights`, served as its age by the flick_lights_cache_age_seconds gauge
+    lights_refreshed_at = None
 
     @method_decorator(csrf_exempt)
     def dispatch(self, request, *args, **kwargs):
         return super().dispatch(request, *args, **kwargs)
 
     def get(self, request: HttpRequest) -> HttpResponse:
-        print('get')
+        logger.debug('showing the lights')
         lights = []
 
         try:
@@ -78,8 +78,8 @@ class LightControllerView(generic.TemplateView):
 
 
     def post(self, request: HttpRequest) -> HttpResponse:
-        print('post')
-        print(request.POST)
+        logger.debug('light controller command', extra={'command': request.POST.get('command'),
+                                                        'fields': sorted(request.POST)})
         context = self.process_post(request.POST)
         return render(request, template_name=self.template_name, context=context)
 
@@ -99,7 +99,6 @@ class LightControllerView(generic.TemplateView):
         if 'command' not in data:
             raise KeyError('failed to receive "command" from AJAX response')
         command = data['command'].upper()
-        logger.debug(command)
 
         if command == 'TOGGLE':
             self.toggle_light(data)
@@ -157,6 +156,7 @@ class LightControllerView(generic.TemplateView):
         and serialized JSON dictionary of that light as each value.
         """
         cls.lights = {light['number']: light for light in cls.controller.lights()}
+        cls.lights_refreshed_at = time.monotonic()
         lights = []
         for light in cls.lights.values():
             info = {k: light[k] for k in ('name', 'number')}
@@ -1,3 +1,9 @@
 from django.contrib import admin
 
-# Register your models here.
+from pazaak.models import ArchivedGame
+
+
+@admin.register(ArchivedGame)
+class ArchivedGameAdmin(admin.ModelAdmin):
+    list_display = ('game_id', 'status', 'player_score', 'opponent_score', 'opponent_strategy', 'finished_at')
+    list_filter = ('status', 'opponent_strategy')
@@ -1,9 +1,25 @@
+import atexit
+import json
 import pathlib
 
 from django.apps import AppConfig
-from pazaak.enums import export_enums_to_js
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from djdashboard import metrics, warmup
+from pazaak.enums import export_enums_to_js, render_enums_js
+
+ENUM_WRITE_FILE = 'pazaak/react/src/js/enums.js'
+_DEFAULT_SNAPSHOT_INTERVAL = 60
+
+_snapshot_scheduler = None
+
+
+def enum_write_file() -> pathlib.Path:
+    """
+    Returns the path of the generated JS enums file, relative to the project's base directory.
+    """
+    return pathlib.Path(settings.BASE_DIR) / ENUM_WRITE_FILE
 
-_ENUM_WRITE_FILE = 'pazaak/react/src/js/enums.js'
 
 class PazaakConfig(AppConfig):
     name = 'pazaak'
@@ -11,7 +27,103 @@ class PazaakConfig(AppConfig):
     def ready(self):
         """
         The contents of this method fire on server startup.
-        Exports the specified Serializable enum classes to JS.
+        Exports the specified Serializable enum classes to JS, unless PAZAAK_EXPORT_ENUMS_ON_STARTUP is off
+        (production builds run `manage.py export_enums` ahead of time instead).
+        The file is only rewritten when the enums actually changed.
         """
-        write_file = pathlib.Path(_ENUM_WRITE_FILE)
-        export_enums_to_js(write_file)
\ No newline at end of file
+        if getattr(settings, 'PAZAAK_EXPORT_ENUMS_ON_STARTUP', True):
+            export_enums_to_js(enum_write_file())
+
+        warmup.register('pazaak enums', render_enums_js)
+        warmup.register('pazaak game tables', _warm_up_game_tables)
+        warmup.register('pazaak game manager', _warm_up_game_manager)
+        warmup.register('pazaak serializer', _warm_up_serializer)
+
+        metrics.register_gauge('pazaak_games', _game_count, 'Live Pazaak games, including the unloaded ones.')
+        metrics.register_gauge('pazaak_game_memory_bytes', _game_memory, 'Estimated memory held by the live Pazaak games.')
+        metrics.register_gauge('pazaak_matchmaking_waiting', _matchmaking_waiting,
+                               'Players waiting for a player-vs-player game.')
+        metrics.register_gauge('pazaak_archive_dropped_games', _archive_dropped_games,
+                               'Finished Pazaak games dropped from the archive because its queue was full.')
+
+
+def start_snapshots() -> None:
+    """
+    Restores the games of the last snapshot (lazily -- see GameManager.restore()),
+    then snapshots the games every PAZAAK_SNAPSHOT_INTERVAL seconds and once more at exit.
+    Only the processes serving requests call it (see djdashboard/wsgi.py), rather than every management command,
+    and only once; it does nothing unless PAZAAK_SNAPSHOT_FILE is set, or when the games live in shared engines,
+    which `manage.py run_engines` snapshots.
+    """
+    global _snapshot_scheduler
+    snapshot_file = getattr(settings, 'PAZAAK_SNAPSHOT_FILE', None)
+    if not snapshot_file or getattr(settings, 'PAZAAK_ENGINES', []) or _snapshot_scheduler is not None:
+        return
+
+    from pazaak.server.game import PazaakGameView
+    from pazaak.server.snapshots import SnapshotScheduler
+
+    game_manager = PazaakGameView.game_manager
+    game_manager.restore(pathlib.Path(snapshot_file))
+
+    interval = getattr(settings, 'PAZAAK_SNAPSHOT_INTERVAL', _DEFAULT_SNAPSHOT_INTERVAL)
+    _snapshot_scheduler = SnapshotScheduler(game_manager, pathlib.Path(snapshot_file), interval)
+    _snapshot_scheduler.start()
+    atexit.register(_snapshot_scheduler.stop)
+
+
+def _game_count() -> int:
+    from pazaak.server.game import PazaakGameView
+
+    return PazaakGameView.game_manager.game_count()
+
+
+def _game_memory() -> int:
+    from pazaak.server.game import PazaakGameView
+
+    return PazaakGameView.game_manager.stats()['memoryUsage']
+
+
+def _archive_dropped_games() -> int or None:
+    from pazaak.server.game import PazaakGameView
+
+    archive = PazaakGameView.game_manager.stats()['archive']
+    return None if archive is None else archive['dropped']
+
+
+def _matchmaking_waiting() -> int:
+    from pazaak.server.game import PazaakGameView
+
+    return PazaakGameView.matchmaker.waiting_count()
+
+
+def _warm_up_game_tables() -> None:
+    """
+    Imports the game modules, which build their lookup tables at import time, and builds the card flyweights.
+    """
+    from pazaak.game import mcts, state
+    from pazaak.game.cards import PazaakCard
+
+    PazaakCard.empty()
+
+
+def _warm_up_game_manager() -> None:
+    """
+    Builds the views' game manager, whose game pool is dealt up front, or connects to the engines if there are any.
+    """
+    from pazaak.server.game import PazaakGameView
+
+    PazaakGameView.game_manager.game_count()
+
+
+def _warm_up_serializer() -> None:
+    """
+    Serializes and encodes a throwaway game the way responses are, without registering it with the game manager.
+    """
+    from pazaak.game import cards
+    from pazaak.game.game import PazaakGame
+    from pazaak.server.game import export_record
+
+    game = PazaakGame(cards.random_cards(4, positive_only=False, bound=5))
+    game.end_turn(game.turn, game.draw_card())
+    json.dumps(export_record(-1, game), cls=DjangoJSONEncoder)
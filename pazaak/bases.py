@@ -2,16 +2,26 @@ import abc
 import collections
 import datetime
 import enum
+import heapq
+import itertools
+import threading
 
 
 _PRIMITIVE_TYPES = {int, float, bool, str, type(None)}
 
+# numbers every update across all Recordables, to order updates captured at the same time
+_update_sequence = itertools.count(1)
+
 
 class UpdateHistory:
-    def __init__(self, attribute: str, value, time_of_update: datetime.datetime):
+    # updates unpickled from before updates were numbered
+    sequence = 0
+
+    def __init__(self, attribute: str, value, time_of_update: datetime.datetime, sequence=0):
         self.attribute = attribute
         self.value = value
         self.time_of_update = time_of_update
+        self.sequence = sequence
 
     def __repr__(self) -> str:
         return "{0}(attribute='{1}', value={2}, time_of_update={3})".format(
@@ -24,23 +34,61 @@ class UpdateHistory:
     def __str__(self) -> str:
         return repr(self)
 
+    @property
+    def cursor(self) -> (datetime.datetime, int):
+        """
+        The position of this update in a timeline: its time, then its sequence number.
+        """
+        return (self.time_of_update, self.sequence)
+
+
+
+class RecordedField:
+    """
+    Declares a recorded attribute of a Recordable class, and the type of its values:
+    ```
+    class Player(Recordable):
+        _score = RecordedField(int)
+    ```
+    Writes to the attribute are stored in the instance's __dict__ and recorded in its history.
+    The descriptor has no __get__, so reading the attribute is a plain instance __dict__ lookup.
+    To set the attribute without recording it, write to the instance's __dict__ directly.
+
+    Whether the values of `value_type` are recorded is decided once, when the class is created; only writes of
+    other types, to instances with their own recordable types or should_record_value(), ask the instance.
+    """
+    __slots__ = ('_name', '_value_type', '_records_values')
+
+    def __init__(self, value_type: type=None):
+        self._value_type = value_type
+        self._records_values = value_type in _PRIMITIVE_TYPES
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self._name = name
+
+    def __set__(self, instance: 'Recordable', value) -> None:
+        instance.__dict__[self._name] = value
+        if type(value) is self._value_type and instance._default_recording:
+            recorded = value if self._records_values else None
+        else:
+            recorded = value if instance.should_record_value(value) else None
+        instance._history[self._name].append(
+            UpdateHistory(self._name, recorded, datetime.datetime.utcnow(), next(_update_sequence)))
+        instance._size += 1
+
 
 
 class Recordable:
     """
     A base class used to monitor, track, and audit an object's history.
-    Deriving a class from Recordable will allow all updates to its properties to be recorded and stored.
-    Update times are captured in UTC.
+    Updates to the attributes a derived class declares as RecordedFields are recorded and stored;
+    every other attribute is a plain attribute. Update times are captured in UTC.
 
     Recordable.__init__(self) MUST be the very first step that happens in the derived class' __init__ method.
     """
-    _whitelisted_fields = {
-        '_whitelisted_fields',
-        '_history',
-        '_recordable_types',
-        '_size'
-    }
-
+    # whether should_record_value() is the default one, with the default recordable types;
+    # False for objects unpickled from before it was tracked, which then ask should_record_value() every time
+    _default_recording = False
 
     def __init__(self, recordable_types=_PRIMITIVE_TYPES):
         """
@@ -51,8 +99,8 @@ class Recordable:
         Recordable.__init__(self) MUST be the very first step that happens in the derived class' __init__ method.
         """
         self._history = collections.defaultdict(list)
-        self._recordable_types = recordable_types
         self._size = 0
+        self.recordable_types = recordable_types
 
 
     @property
@@ -63,14 +111,8 @@ class Recordable:
     @recordable_types.setter
     def recordable_types(self, new_recordable_types: {type}) -> None:
         self._recordable_types = new_recordable_types
-
-
-    def __setattr__(self, name: str, value):
-        super().__setattr__(name, value)
-        if name not in self._whitelisted_fields:
-            value_to_record = value if self.should_record_value(value) else None
-            self._update(name, value_to_record)
-            self._size += 1
+        self._default_recording = (new_recordable_types is _PRIMITIVE_TYPES
+                                   and type(self).should_record_value is Recordable.should_record_value)
 
 
     def last_modification(self) -> UpdateHistory:
@@ -87,6 +129,14 @@ class Recordable:
         return self._size
 
 
+    def clear_history(self) -> None:
+        """
+        Forgets every update captured so far, e.g. when the object is reset for reuse.
+        """
+        self._history.clear()
+        self._size = 0
+
+
     def timeline(self, descending=True) -> [UpdateHistory]:
         """
         Returns a one-dimensional list of all updates that have been captured, ordered by time-of-update.
@@ -100,6 +150,19 @@ class Recordable:
         return sorted(updates, key=lambda update: update.time_of_update, reverse=descending)
 
 
+    def updates(self, after=None):
+        """
+        Lazily iterates over the updates that come after the cursor `after` (see UpdateHistory.cursor),
+        or over all of them, from least-recent to most-recent.
+        Each attribute's updates are searched for the cursor, so skipping to it costs O(log n).
+        """
+        streams = []
+        for records in self._history.values():
+            start = 0 if after is None else _first_after(records, after)
+            streams.append(_iterate_from(records, start))
+        return heapq.merge(*streams, key=_cursor_of)
+
+
     def report(self) -> {str: [UpdateHistory]}:
         """
         Returns a dictionary whose keys are string attribute fields,
@@ -118,26 +181,53 @@ class Recordable:
         return self.recordable_types is None or type(value) in self.recordable_types
 
 
-    def _update(self, attribute: str, value) -> None:
-        """
-        Given the attribute and value passed into __setattr__,
-        process and record this update.
-        """
-        time_of_update = datetime.datetime.utcnow()
-        update = UpdateHistory(attribute, value, time_of_update)
-        self._history[attribute].append(update)
+
+def _cursor_of(update: UpdateHistory) -> (datetime.datetime, int):
+    return update.cursor
+
+
+def _iterate_from(records: [UpdateHistory], start: int):
+    for index in range(start, len(records)):
+        yield records[index]
+
+
+def _first_after(records: [UpdateHistory], cursor: (datetime.datetime, int)) -> int:
+    """
+    Returns the index of the first of the time-ordered `records` past `cursor`.
+    """
+    low, high = 0, len(records)
+    while low < high:
+        middle = (low + high) // 2
+        if records[middle].cursor <= cursor:
+            low = middle + 1
+        else:
+            high = middle
+    return low
 
 
 
 class IntegerIdentifiable:
+    """
+    Hands out increasing integer IDs, safely across threads.
+    """
     __id = 0
+    __id_lock = threading.Lock()
 
     @classmethod
     def new_id(cls) -> int:
-        result = cls.__id
-        cls.__id += 1
+        with cls.__id_lock:
+            result = cls.__id
+            cls.__id += 1
         return result
 
+    @classmethod
+    def advance_id(cls, minimum: int) -> None:
+        """
+        Makes sure new IDs are at least `minimum`, e.g. after restoring objects that were given IDs in a previous run.
+        """
+        with cls.__id_lock:
+            cls.__id = max(cls.__id, minimum)
+
 
 
 class Serializable(metaclass=abc.ABCMeta):
@@ -0,0 +1,116 @@
+import collections
+import random
+
+from pazaak.data_structures.containers import BaseContainer
+
+
+class Shoe(BaseContainer):
+    """
+    A finite deck of card values, drawn without replacement: `copies` of every value in `values`.
+
+    The values live in one array, whose first `len(self)` slots are the cards still in the shoe.
+    draw() picks a random slot among those and swaps it to the end of the live slots (one step of a Fisher-Yates shuffle),
+    so drawing is O(1), and so is reshuffle(), which only brings every slot back into play.
+    The number of cards left of each value is kept up to date, so count() and probability() are O(1) as well.
+
+    An empty shoe is reshuffled on the next draw, unless `reshuffle_when_empty` is False.
+    """
+    def __init__(self, values=range(1, 11), copies=4, rng=None, reshuffle_when_empty=True):
+        self.__cards = [value for value in values for _ in range(copies)]
+        self._full_counts = collections.Counter(self.__cards)
+        self._counts = dict(self._full_counts)
+        self._remaining = len(self.__cards)
+        self._random = rng or random.Random()
+        self._reshuffle_when_empty = reshuffle_when_empty
+
+    @property
+    def _container(self) -> list:
+        return self.__cards
+
+    def __len__(self) -> int:
+        return self._remaining
+
+    def __iter__(self):
+        yield from self._container[:self._remaining]
+
+    def __contains__(self, value) -> bool:
+        return self._counts.get(value, 0) > 0
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, type(self)) and self._counts == other._counts
+
+    def copy(self) -> 'Shoe':
+        shoe = type(self)(rng=self._random, reshuffle_when_empty=self._reshuffle_when_empty)
+        shoe.__cards = list(self._container)
+        shoe._full_counts = collections.Counter(self._full_counts)
+        shoe._counts = dict(self._counts)
+        shoe._remaining = self._remaining
+        return shoe
+
+    @property
+    def size(self) -> int:
+        """
+        The number of cards in a full shoe.
+        """
+        return len(self._container)
+
+    @property
+    def values(self) -> [int]:
+        """
+        The distinct card values of a full shoe, in ascending order.
+        """
+        return sorted(self._full_counts)
+
+    def draw(self) -> int:
+        """
+        Removes a random card from the shoe, and returns its value.
+        Raises an IndexError if the shoe is empty and isn't reshuffled when it is.
+        """
+        if not self._remaining:
+            if not self._reshuffle_when_empty or not self._container:
+                raise IndexError('draw from an empty shoe')
+            self.reshuffle()
+
+        cards = self._container
+        last = self._remaining - 1
+        index = self._random.randint(0, last)
+        cards[index], cards[last] = cards[last], cards[index]
+        self._remaining = last
+
+        value = cards[last]
+        self._counts[value] -= 1
+        return value
+
+    def reshuffle(self) -> None:
+        """
+        Puts every drawn card back into the shoe.
+        """
+        self._remaining = len(self._container)
+        self._counts = dict(self._full_counts)
+
+    def count(self, value: int) -> int:
+        """
+        Returns the number of cards of `value` left in the shoe.
+        """
+        return self._counts.get(value, 0)
+
+    def probability(self, value: int) -> float:
+        """
+        Returns the probability that the next card drawn is worth `value`.
+        """
+        if not self._remaining:
+            return self._full_counts.get(value, 0) / len(self._container) if self._reshuffle_when_empty else 0.0
+        return self.count(value) / self._remaining
+
+    def distribution(self) -> ([int], [int]):
+        """
+        Returns the values that can be drawn next, and how many cards of each are left (their weights),
+        e.g. for random.choices().
+        """
+        counts = self._counts if self._remaining or not self._reshuffle_when_empty else self._full_counts
+        values = [value for value in sorted(counts) if counts[value]]
+        return values, [counts[value] for value in values]
+
+
+if __name__ == '__main__':
+    pass
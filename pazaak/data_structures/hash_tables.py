@@ -45,6 +45,13 @@ class MultiSet(BaseContainer):
 
         self._size -= 1
 
+    def clear(self) -> None:
+        """
+        Removes every item from the set.
+        """
+        self._container.clear()
+        self._size = 0
+
     def remove(self, item) -> None:
         """
         Removes item from the set.
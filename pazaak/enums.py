@@ -1,7 +1,12 @@
 import enum
+import functools
+import hashlib
 import inspect
+import io
+import os
 import pathlib
 import sys
+import tempfile
 
 from pazaak.bases import SerializableEnum
 
@@ -43,13 +48,16 @@ class Turn(SerializableEnum):
         """
         Given a turn, returns the opposite player's Turn enum.
         """
-        switch = {
-            cls.PLAYER: cls.OPPONENT,
-            cls.OPPONENT: cls.PLAYER
-        }
-        if turn not in switch:
-            raise ValueError('{0} is not a valid Turn'.format(turn))
-        return switch[turn]
+        try:
+            return _OPPOSITE_TURNS[turn]
+        except KeyError:
+            raise ValueError('{0} is not a valid Turn'.format(turn)) from None
+
+
+_OPPOSITE_TURNS = {
+    Turn.PLAYER: Turn.OPPONENT,
+    Turn.OPPONENT: Turn.PLAYER
+}
 
 # ======================================
 
@@ -70,19 +78,31 @@ class GameStatus(SerializableEnum):
 
     @classmethod
     def from_turn(cls, turn: Turn):
-        table = {
-            Turn.PLAYER: cls.PLAYER_WINS,
-            Turn.OPPONENT: cls.OPPONENT_WINS
-        }
-
-        if turn not in table:
-            raise ValueError('unexpected Turn received ({0})'.format(turn))
-
-        return table[turn]
+        try:
+            return _WINS_BY_TURN[turn]
+        except KeyError:
+            raise ValueError('unexpected Turn received ({0})'.format(turn)) from None
 
     def key(self) -> str:
         return self.name.lower()
 
+
+_WINS_BY_TURN = {
+    Turn.PLAYER: GameStatus.PLAYER_WINS,
+    Turn.OPPONENT: GameStatus.OPPONENT_WINS
+}
+
+# ======================================
+
+@enum.unique
+class Difficulty(SerializableEnum):
+    NORMAL = 'normal'
+    HARD = 'hard'
+
+    @classmethod
+    def should_export_to_js(cls) -> bool:
+        return True
+
 # ======================================
 
 @enum.unique
@@ -97,6 +117,15 @@ class GameRule(SerializableEnum):
 
 # ======================================
 
+@enum.unique
+class MoveType(enum.Enum):
+    DRAW = 'draw'
+    HAND = 'hand'
+    STAND = 'stand'
+    FORFEIT = 'forfeit'
+
+# ======================================
+
 @enum.unique
 class RequestType(enum.Enum):
     GET = 'GET'
@@ -117,31 +146,83 @@ class Theme(SerializableEnum):
 # Helper Functions
 # ======================================
 
-def export_enums_to_js(write_file: pathlib.Path):
+def export_enums_to_js(write_file: pathlib.Path) -> bool:
     """
     Automatically generate a JS class representing enums in this module.
     Generated enums must be derived from SerializableEnum,
     and must override the @classmethod should_export_to_js() to return True.
 
-    Generation happens at server startup, in pazaak/apps.py.
+    The file is only rewritten (atomically) when its content hash differs from the generated content,
+    so repeated calls don't touch the disk or trigger React dev-server rebuilds.
+    Returns True if the file was written.
+
+    Generation happens at server startup, in pazaak/apps.py, or ahead of time with `manage.py export_enums`.
+    """
+    content = render_enums_js()
+    if _file_digest(write_file) == _digest(content.encode('utf-8')):
+        return False
+
+    _atomic_write(write_file, content)
+    return True
+
+
+@functools.lru_cache(maxsize=None)
+def render_enums_js() -> str:
+    """
+    Returns the content of the generated JS enums file.
+    The enums are fixed at import time, so the result is cached.
     """
     enums_to_serialize = _get_classes_in_current_module(_should_serialize_to_js)
-    with write_file.open('w') as outfile:
-        header = [
-            '// =========================',
-            '// || AUTO-GENERATED FILE ||',
-            '// ========================='
-        ]
+    outfile = io.StringIO()
+    header = [
+        '// =========================',
+        '// || AUTO-GENERATED FILE ||',
+        '// ========================='
+    ]
+
+    outfile.write('\n'.join(header))
+    outfile.write('\n\n')
 
-        outfile.write('\n'.join(header))
-        outfile.write('\n\n')
+    for enum_class in enums_to_serialize:
+        _write_enum_as_js_class(enum_class, outfile)
+        outfile.write('\n')
 
-        for enum_class in enums_to_serialize:
-            _write_enum_as_js_class(enum_class, outfile)
-            outfile.write('\n')
+    return outfile.getvalue()
 
 
-def _write_enum_as_js_class(cls: SerializableEnum, outfile: open) -> None:
+def _digest(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+def _file_digest(path: pathlib.Path) -> str or None:
+    """
+    Returns the content hash of the file at path, or None if it can't be read.
+    """
+    try:
+        return _digest(path.read_bytes())
+    except OSError:
+        return None
+
+
+def _atomic_write(path: pathlib.Path, content: str) -> None:
+    """
+    Writes to a temporary file in the same directory, then renames it over path.
+    Readers (and other workers exporting at the same time) only ever see a complete file.
+    """
+    descriptor, temp_path = tempfile.mkstemp(dir=str(path.parent), prefix='.{0}.'.format(path.name))
+    try:
+        with os.fdopen(descriptor, 'w', newline='\n') as outfile:
+            outfile.write(content)
+        # mkstemp creates the file as owner-only; keep the permissions a plain open() would have given it
+        mode = path.stat().st_mode if path.exists() else 0o644
+        os.chmod(temp_path, mode & 0o777)
+        os.replace(temp_path, str(path))
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def _write_enum_as_js_class(cls: SerializableEnum, outfile: io.TextIOBase) -> None:
     enum_name = cls.__name__
     if not cls.should_export_to_js():
         raise ValueError('override should_export_to_js() to return True'.format(enum_name))
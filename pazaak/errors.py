@@ -10,4 +10,7 @@ class GameLogicError(_PazaakError):
     pass
 
 class ServerError(_PazaakError):
+    pass
+
+class CapacityError(ServerError):
     pass
\ No newline at end of file
@@ -10,6 +10,7 @@ class PazaakCard(Serializable):
     __id = 0
     __EMPTY_VALUE = 0
     __initializing_empty = False
+    __empty = None
 
     @classmethod
     def empty(cls) -> 'PazaakCard':
@@ -17,17 +18,19 @@ class PazaakCard(Serializable):
         Returns an "empty" Pazaak card.
         This is useful for representing a non-playable Pazaak card, without having to use None.
         It's initialized with a value of 0 -- PazaakCards can't otherwise be initialized with this value (outside of this method).
+        The empty card is a flyweight: it's built once, and shared.
         """
-        cls.__initializing_empty = True
-        card = cls(cls.__EMPTY_VALUE)
-        cls.__initializing_empty = False
-        return card
+        if cls.__empty is None:
+            cls.__initializing_empty = True
+            cls.__empty = cls(cls.__EMPTY_VALUE)
+            cls.__initializing_empty = False
+        return cls.__empty
 
     @classmethod
     def _generate_id(cls) -> int:
         """
         Returns and increments a unique static ID number.
-        Used for hashing PazaakCards.
+        Used to tell individual PazaakCard instances apart.
         """
         result = cls.__id
         cls.__id += 1
@@ -52,10 +55,11 @@ class PazaakCard(Serializable):
         return repr(self)
 
     def __bool__(self) -> bool:
-        return self != PazaakCard.empty()
+        return self._modifier != PazaakCard.__EMPTY_VALUE
 
     def __hash__(self) -> int:
-        return self._id
+        # cards compare equal by modifier, so they must hash by it too (MultiSet hands rely on this)
+        return hash(self.modifier)
 
     def __eq__(self, other: 'PazaakCard') -> bool:
         return isinstance(other, PazaakCard) and self.modifier == other.modifier
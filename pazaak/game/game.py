@@ -1,36 +1,93 @@
 import random
 import time
-from pazaak.game import cards
+from pazaak.game import cards, rules
 from pazaak.game.cards import PazaakCard
+from pazaak.game.moves import Move
 from pazaak.errors import GameLogicError, GameOverError
 from pazaak.game.players import PazaakPlayer
-from pazaak.enums import GameRule, GameStatus, Turn
+from pazaak.game.strategies import HeuristicStrategy, PazaakStrategy
+from pazaak.enums import GameRule, GameStatus, MoveType, Turn
+from pazaak.data_structures.decks import Shoe
 from pazaak.data_structures.hash_tables import MultiSet
-from pazaak.bases import Serializable, Recordable
-from pazaak.utilities.functions import first_true
+from pazaak.bases import Serializable, Recordable, RecordedField
 
 
 _HAND_SIZE = 4
 _MAX_MODIFIER = GameRule.MAX_MODIFIER.value
-_WINNING_SCORE = GameRule.WINNING_SCORE.value
-_FILLED_TABLE_THRESHOLD = GameRule.MAX_CARDS_ON_TABLE.value
+
+
+# Seats are indexed: 0 is the player, 1 is the opponent.
+_SEAT_INDEX = {
+    Turn.PLAYER: 0,
+    Turn.OPPONENT: 1
+}
+_WINS_BY_SEAT = (GameStatus.PLAYER_WINS, GameStatus.OPPONENT_WINS)
+
+# final status -> (player's record field, opponent's record field) to increment
+_RECORD_UPDATES = {
+    GameStatus.PLAYER_WINS: ('wins', 'losses'),
+    GameStatus.OPPONENT_WINS: ('losses', 'wins'),
+    GameStatus.PLAYER_FORFEIT: ('losses', 'wins'),
+    GameStatus.TIE: ('ties', 'ties')
+}
 
 
 class PazaakGame(Serializable, Recordable):
-    def __init__(self, initial_pool: [PazaakCard], hand_size=_HAND_SIZE, max_modifier=_MAX_MODIFIER):
+    """
+    A game of Pazaak between the player and an opponent.
+
+    The game is a state machine over GameStatus: it starts as GAME_ON, and every turn only re-checks
+    the criteria that the turn could have changed (see _evaluate()). Once a final status is reached, it sticks.
+    """
+    _turn = RecordedField(Turn)
+    _status = RecordedField(GameStatus)
+
+    def __init__(self, initial_pool: [PazaakCard], hand_size=_HAND_SIZE, max_modifier=_MAX_MODIFIER, opponent_strategy: PazaakStrategy=None,
+                 shoe: Shoe=None, deal=True):
+        """
+        `opponent_strategy` decides the opponent's moves; defaults to the built-in HeuristicStrategy.
+        Cards are drawn from `shoe` (without replacement) if one is given, e.g. the main deck of Shoe();
+        otherwise, every value from 1 to `max_modifier` is equally likely on every draw.
+        With `deal=False`, both hands start empty and no random number is drawn, e.g. to rebuild a game from a state.
+        """
         Recordable.__init__(self)
         self._hand_size = hand_size
         self._max_modifier = max_modifier
+        self._shoe = shoe
+        self._opponent_strategy = HeuristicStrategy() if opponent_strategy is None else opponent_strategy
 
-        opponent_cards = cards.random_cards(self._hand_size, positive_only=False, bound=5)
-        opponent_hand = self._draw_hand(opponent_cards)
-        player_hand = self._draw_hand(initial_pool)
+        if deal:
+            opponent_hand = self._draw_hand(cards.random_cards(self._hand_size, positive_only=False, bound=5))
+            player_hand = self._draw_hand(initial_pool)
+        else:
+            opponent_hand, player_hand = [], []
 
-        # making the opponent's hand a hash table adds some efficiency gain -- see self._get_opponent_move()
+        # making the opponent's hand a hash table adds some efficiency gain -- see HeuristicStrategy
         self._opponent = PazaakPlayer(opponent_hand, Turn.OPPONENT.value, _hand_container_type=MultiSet)
         self._player = PazaakPlayer(player_hand, Turn.PLAYER.value)
+        self._seats = (self._player, self._opponent)
         self._turn = Turn.PLAYER
-        self._is_over = False
+        self._status = GameStatus.GAME_ON
+        self._undo_stack = []
+
+
+    def reset(self, initial_pool: [PazaakCard], opponent_strategy: PazaakStrategy=None) -> None:
+        """
+        Deals a new game from `initial_pool` into this object, reusing its players and containers.
+        Leaves the game as __init__ would (with the same hand size, maximum modifier and shoe, reshuffled);
+        histories and records start fresh.
+        """
+        self._opponent_strategy = HeuristicStrategy() if opponent_strategy is None else opponent_strategy
+
+        opponent_cards = cards.random_cards(self._hand_size, positive_only=False, bound=5)
+        self._opponent.reset(self._draw_hand(opponent_cards))
+        self._player.reset(self._draw_hand(initial_pool))
+        self._turn = Turn.PLAYER
+        self._status = GameStatus.GAME_ON
+        self._undo_stack.clear()
+        if self._shoe is not None:
+            self._shoe.reshuffle()
+        self.clear_history()
 
 
     @property
@@ -48,31 +105,45 @@ class PazaakGame(Serializable, Recordable):
         return self._turn
 
 
+    @property
+    def status(self) -> GameStatus:
+        return self._status
+
+
     @property
     def is_over(self) -> bool:
-        return self._is_over
+        return self._status != GameStatus.GAME_ON
 
 
-    def _players(self) -> (PazaakPlayer,):
+    @property
+    def max_modifier(self) -> int:
         """
-        Returns a tuple of the players in the game.
+        The highest value a randomly drawn card can have.
         """
-        return (self.player, self.opponent)
+        return self._max_modifier
+
+
+    @property
+    def opponent_strategy(self) -> PazaakStrategy:
+        return self._opponent_strategy
 
 
-    def _game_status_from_player(self, player: PazaakPlayer) -> GameStatus:
+    @property
+    def shoe(self) -> Shoe or None:
         """
-        Given a player, return the GameStatus corresponding to them.
+        The shoe cards are drawn from, or None if draws are unlimited.
         """
-        table = {
-            self.player: GameStatus.PLAYER_WINS,
-            self.opponent: GameStatus.OPPONENT_WINS
-        }
+        return self._shoe
 
-        if player not in table:
-            raise ValueError('received unexpected player {0}'.format(player))
 
-        return table[player]
+    def draw_distribution(self) -> ([int], [int]):
+        """
+        Returns the values the next draw can have, and their weights (see Shoe.distribution()).
+        """
+        if self._shoe is not None:
+            return self._shoe.distribution()
+        values = list(range(1, self._max_modifier + 1))
+        return values, [1] * len(values)
 
 
     def start(self) -> None:
@@ -83,15 +154,11 @@ class PazaakGame(Serializable, Recordable):
         self._print_player_game(self.player)
         self._print_player_game(self.opponent)
         status = GameStatus.GAME_ON
-        switch = {
-            Turn.PLAYER: self.player,
-            Turn.OPPONENT: self.opponent
-        }
 
         while not status:
             try:
                 turn = self._turn
-                current_player = switch[turn]
+                current_player = self._seats[_SEAT_INDEX[turn]]
                 move = self._get_move(current_player)
                 status = self.end_turn(turn, move)
                 self._print_player_game(current_player, show_hand=True)
@@ -111,35 +178,31 @@ class PazaakGame(Serializable, Recordable):
         Given a turn and a move, updates the game for the specified player.
         If the player is already standing, no move will be made.
         Automatically switches self._turn.
-        Calculates and returns the game's updated status.
+        Calculates and returns the game's updated status; once the game is over, its final status is returned as-is.
         """
-        switch = {
-            Turn.PLAYER: self.player,
-            Turn.OPPONENT: self.opponent
-        }
-        player = switch[turn]
-        opposite_turn = Turn.opposite_turn(self._turn)
-        status = GameStatus.GAME_ON
+        if self._status:
+            return self._status
 
-        if player.is_standing or player.forfeited:
-            status = self.winner()
+        seat = _SEAT_INDEX[turn]
+        player = self._seats[seat]
+        placed = busted = False
 
-        else:
-            previous_score = player.score
+        if not (player.is_standing or player.forfeited):
             player.placed.append(move)
-            new_score = player.score + move.modifier
+            new_score, stands, busted = rules.place_card(player.score, move.modifier)
+            placed = True
 
-            if new_score == _WINNING_SCORE:
+            if stands:
                 player.stand()
 
             # ending a turn with a score over 20 is an automatic loss
-            if previous_score > _WINNING_SCORE and new_score > _WINNING_SCORE:
-                status = GameStatus.from_turn(opposite_turn)
-            else:
+            if not busted:
                 player.score = new_score
-                status = self.winner()
 
-        self._turn = opposite_turn
+        status = self._evaluate(seat, placed, busted)
+        self._turn = Turn.opposite_turn(self._turn)
+        if status:
+            self._finish(status)
         return status
 
 
@@ -159,88 +222,139 @@ class PazaakGame(Serializable, Recordable):
         return player.hand.pop(card_index)
 
 
-    def winner(self) -> GameStatus:
-        criteria = (self._forfeited, self._outscored, self._filled_table)
-        invoker = lambda f: f()
-        results = map(invoker, criteria)
+    def apply(self, move: Move) -> GameStatus:
+        """
+        Plays `move` for the player whose turn it is, following the same rules as end_turn(),
+        and returns the resulting GameStatus.
 
-        status = first_true(results, default=GameStatus.GAME_ON)
-        self._is_over = status != GameStatus.GAME_ON
+        Meant for search and analysis: nothing is recorded in the Recordable histories and no records are updated.
+        Only the fields the move changes are saved, on an undo stack -- see undo().
+        Draws aren't random here: a DRAW move carries the card that was drawn.
+        Raises a GameOverError once the game is over.
+        """
+        if self._status:
+            raise GameOverError('the game is already over: {0}'.format(self._status.name))
+
+        turn = self._turn
+        seat = _SEAT_INDEX[turn]
+        player = self._seats[seat]
+        score = player.score
+        is_standing = player.is_standing
+        forfeited = player.forfeited
+        previous_status = self._status
+        kind = move.kind
+        hand_index = placed = None
+        busted = False
+
+        if kind == MoveType.FORFEIT:
+            _set_silently(player, '_forfeited', True)
+        elif kind == MoveType.STAND:
+            _set_silently(player, '_is_standing', True)
+
+        if not (player.is_standing or player.forfeited):
+            if kind == MoveType.HAND:
+                hand_index = _take_from_hand(player.hand, move.card)
+            placed = move.card
+            player.placed.append(placed)
+            new_score, stands, busted = rules.place_card(score, placed.modifier)
+
+            if stands:
+                _set_silently(player, '_is_standing', True)
+            if not busted:
+                _set_silently(player, '_score', new_score)
+
+        status = self._evaluate(seat, placed is not None, busted)
+        _set_silently(self, '_status', status)
+        _set_silently(self, '_turn', Turn.opposite_turn(turn))
+        self._undo_stack.append((turn, player, score, is_standing, forfeited, placed, hand_index, previous_status))
+        return status
 
-        self._update_records(status)
 
-        return status
+    def undo(self) -> None:
+        """
+        Takes back the last move made with apply().
+        """
+        if not self._undo_stack:
+            raise GameLogicError('there is no applied move to undo')
 
+        turn, player, score, is_standing, forfeited, placed, hand_index, status = self._undo_stack.pop()
+        if placed is not None:
+            player.placed.pop()
+            if hand_index is not None:
+                _return_to_hand(player.hand, placed, hand_index)
 
-    def _forfeited(self) -> GameStatus:
-        forfeited_player = first_true(self._players(), lambda player: player.forfeited)
-        # for now, the only person that can forfeit is the player
-        return GameStatus.GAME_ON if forfeited_player is None else GameStatus.PLAYER_FORFEIT
+        _set_silently(player, '_score', score)
+        _set_silently(player, '_is_standing', is_standing)
+        _set_silently(player, '_forfeited', forfeited)
+        _set_silently(self, '_turn', turn)
+        _set_silently(self, '_status', status)
 
 
-    def _outscored(self) -> GameStatus:
+    def restore(self, turn: Turn, status: GameStatus) -> None:
         """
-        Determines if any player has won by outscore.
-        Outscoring happens when both players are standing - the one with the highest score <= 20 wins.
-        Returns the applicable GameStatus.
+        Puts the game on `turn` with `status`, without recording either.
+        Used when rebuilding a game from another representation (see pazaak.game.state);
+        the players' fields must be restored separately.
         """
-        status = None
-
-        if all(player.is_standing for player in self._players()):
-            if self.player.score == self.opponent.score:
-                status = GameStatus.TIE
-            else:
-                winning_player = max(self._players(), key=lambda player: (player.score <= _WINNING_SCORE, player.score))
-                status = self._game_status_from_player(winning_player)
+        _set_silently(self, '_turn', turn)
+        _set_silently(self, '_status', status)
 
-        else:
-            status = GameStatus.GAME_ON
 
-        return status
+    def winner(self) -> GameStatus:
+        """
+        Returns the game's current status.
+        """
+        return self._status
 
 
-    def _filled_table(self) -> GameStatus:
+    def _evaluate(self, seat: int, placed: bool, busted: bool) -> GameStatus:
         """
-        Determines if any player has won by filling the table.
-        Filling the table happens when has placed 9 cards without going bust, and still has a score under 20.
-        This is an automatic win.
-        Returns the applicable GameStatus.
-        :return:
+        Returns the game's status after `seat` ended its turn, while the game was still on.
+        A turn can only change its own seat's score, table, or standing/forfeit flags,
+        so only the criteria those fields feed are checked -- in the same order of precedence as rules.status().
         """
-        results = {self._game_status_from_player(player): self._player_filled_table(player) for player in self._players()}
-        return first_true(results, predicate=lambda status: results[status], default=GameStatus.GAME_ON)
+        if busted:
+            return _WINS_BY_SEAT[1 - seat]
+
+        player, opponent = self._seats
+        if player.forfeited or opponent.forfeited:
+            return GameStatus.PLAYER_FORFEIT
 
+        if player.is_standing and opponent.is_standing:
+            return rules.outscored((player.score, opponent.score), (True, True))
 
-    def _player_filled_table(self, player: PazaakPlayer) -> bool:
-        return len(player.placed) >= _FILLED_TABLE_THRESHOLD and player.score <= _WINNING_SCORE
+        current = self._seats[seat]
+        if placed and rules.filled_table(len(current.placed), current.score):
+            return _WINS_BY_SEAT[seat]
+
+        return GameStatus.GAME_ON
+
+
+    def _finish(self, status: GameStatus) -> None:
+        """
+        Transitions the game to its final status.
+        """
+        self._status = status
+        self._update_records(status)
 
 
     def _update_records(self, status: GameStatus) -> None:
-        if status == GameStatus.PLAYER_WINS:
-            self.player.record.wins += 1
-            self.opponent.record.losses += 1
-        elif status in (GameStatus.OPPONENT_WINS, GameStatus.PLAYER_FORFEIT):
-            self.player.record.losses += 1
-            self.opponent.record.wins += 1
-        elif status == GameStatus.TIE:
-            self.player.record.ties += 1
-            self.opponent.record.ties += 1
+        if status not in _RECORD_UPDATES:
+            return
+        for player, field in zip(self._seats, _RECORD_UPDATES[status]):
+            record = player.record
+            setattr(record, field, getattr(record, field) + 1)
 
 
     def _get_move(self, player: PazaakPlayer) -> PazaakCard:
         if player.is_standing:
             return PazaakCard.empty()
 
-        table = {
-            self.player: self._get_player_move,
-            self.opponent: self._get_opponent_move
-        }
-
-        if player not in table:
-            raise ValueError('received unexpected player {0}'.format(player))
-
-        method = table[player]
-        return method()
+        if player is self._player:
+            return self._get_player_move()
+        if player is self._opponent:
+            return self._get_opponent_move()
+        raise ValueError('received unexpected player {0}'.format(player))
 
 
     def _get_player_move(self) -> PazaakCard:
@@ -275,48 +389,26 @@ class PazaakGame(Serializable, Recordable):
             self.player.forfeit()
 
         else:
-            move = cards.random_card(positive_only=True, bound=self._max_modifier)
+            move = self.draw_card()
 
         return move
 
 
     def _get_opponent_move(self) -> PazaakCard:
         """
-        Returns the opponent's next move.
-        There's some limited intelligence here:
-        1) if their score is higher than the player's score (but under 20), AND the player is standing,
-           then the opponent will stand (causing the them to win).
-        2) if the opponent has a card in their hand that, when played, will get their score to 20,
-           then they'll play it.
-
-        Otherwise, they'll just draw a random card.
-        """
-        card = None
-        value_needed_to_win = _WINNING_SCORE - self.opponent.score
-        card_needed_to_win = PazaakCard.empty() if value_needed_to_win == 0 else PazaakCard(_WINNING_SCORE - self.opponent.score)
-        player_stood_too_early = self.player.is_standing and \
-                                 ((self.player.score <= self.opponent.score <= _WINNING_SCORE) or \
-                                  (self.player.score > _WINNING_SCORE and self.opponent.score <= _WINNING_SCORE))
-
-        if self.opponent.score == _WINNING_SCORE or player_stood_too_early:
-            self.opponent.stand()
-            card = PazaakCard.empty()
-
-        elif card_needed_to_win in self.opponent.hand:
-            self.opponent.hand.remove(card_needed_to_win)
-            card = card_needed_to_win
-
-        elif self.opponent.score > _WINNING_SCORE:
-            # if their score is over 20,
-            # find a card from their hand that will maximize their score under 20
-            card_needed = max(self.opponent.hand, key=lambda card: self.opponent.score + card.modifier <= _WINNING_SCORE)
-            self.opponent.hand.remove(card_needed)
-            card = card_needed
+        Returns the opponent's next move, as decided by the game's opponent strategy.
+        See pazaak.game.strategies for the available strategies.
+        """
+        return self._opponent_strategy.move(self, self.opponent, self.player)
 
-        else:
-            card = cards.random_card(positive_only=True, bound=self._max_modifier)
 
-        return card
+    def draw_card(self) -> PazaakCard:
+        """
+        Returns a random card to be placed on the table when a player ends their turn.
+        """
+        if self._shoe is not None:
+            return PazaakCard(self._shoe.draw())
+        return cards.random_card(positive_only=True, bound=self._max_modifier)
 
 
     def _print_player_game(self, player: PazaakPlayer, show_hand=True) -> None:
@@ -357,6 +449,33 @@ class PazaakGame(Serializable, Recordable):
         }
 
 
+def _set_silently(recordable: Recordable, name: str, value) -> None:
+    """
+    Sets an attribute without it being recorded in the object's history (see RecordedField).
+    """
+    recordable.__dict__[name] = value
+
+
+def _take_from_hand(hand, card: PazaakCard) -> int:
+    """
+    Removes card from the hand, returning where it was so that it can be put back.
+    MultiSet hands are unordered, so their position is reported as -1.
+    """
+    if isinstance(hand, MultiSet):
+        hand.remove(card)
+        return -1
+    index = hand.index(card)
+    del hand[index]
+    return index
+
+
+def _return_to_hand(hand, card: PazaakCard, index: int) -> None:
+    if isinstance(hand, MultiSet):
+        hand.add(card)
+    else:
+        hand.insert(index, card)
+
+
 if __name__ == '__main__':
     pool = cards.random_cards(10, positive_only=False, bound=5)
     game = PazaakGame(pool)
@@ -0,0 +1,307 @@
+# Monte Carlo tree search opponent.
+#
+# The search runs over a compact, hashable tuple state instead of PazaakGame objects,
+# so that simulating thousands of turns neither copies players nor grows their Recordable histories.
+# Turns are resolved with the same functions PazaakGame uses (pazaak.game.rules).
+#
+# State layout (index 0 = player seat, 1 = opponent seat):
+#   (turn, (score0, score1), (placed0, placed1), (standing0, standing1), (hand0, hand1))
+# where each hand is a sorted tuple of card modifiers.
+# Drawn cards follow the odds of the game's shoe at the time of the move (see PazaakGame.draw_distribution());
+# the search doesn't deplete the shoe as it simulates.
+import collections
+import functools
+import itertools
+import logging
+import math
+import random
+import time
+
+from pazaak.game import rules
+from pazaak.game.cards import PazaakCard
+from pazaak.game.players import PazaakPlayer
+from pazaak.game.strategies import HeuristicStrategy, PazaakStrategy
+from pazaak.enums import GameRule, GameStatus
+
+
+logger = logging.getLogger(__name__)
+
+_WINNING_SCORE = GameRule.WINNING_SCORE.value
+_MAX_MODIFIER = GameRule.MAX_MODIFIER.value
+
+_DEFAULT_BUDGET_MS = 5
+# estimated memory held by a transposition table entry, in bytes (measured with tracemalloc on CPython 3)
+NODE_SIZE = 736
+# memory the transposition table of one game may hold, in bytes, unless told otherwise
+_DEFAULT_MEMORY_BUDGET = 1024 * 1024
+_EXPLORATION = math.sqrt(2)
+# a rollout stands once it reaches this score
+_ROLLOUT_STAND_SCORE = 17
+
+# actions: a hand card is played by its modifier
+_DRAW = 'draw'
+_STAND = 'stand'
+
+_VALUES = {
+    GameStatus.PLAYER_WINS: (1.0, 0.0),
+    GameStatus.OPPONENT_WINS: (0.0, 1.0),
+    GameStatus.TIE: (0.5, 0.5),
+    GameStatus.PLAYER_FORFEIT: (0.0, 1.0),
+}
+
+
+SearchReport = collections.namedtuple('SearchReport', ['iterations', 'nodes', 'expanded', 'table_size', 'elapsed_ms'])
+
+
+class _Node:
+    """
+    Transposition table entry: visit counts and accumulated values for every action available in a state.
+    Values are stored from the searching seat's point of view.
+    """
+    __slots__ = ('visits', 'actions', 'action_visits', 'action_values')
+
+    def __init__(self, actions: tuple):
+        self.visits = 0
+        self.actions = actions
+        self.action_visits = [0] * len(actions)
+        self.action_values = [0.0] * len(actions)
+
+
+class MonteCarloStrategy(PazaakStrategy):
+    """
+    A harder opponent that picks its moves with Monte Carlo tree search.
+
+    Every move searches for at most `budget_ms` milliseconds (and at most `max_iterations` iterations, if given);
+    the deadline is checked before each iteration, and an iteration is bounded by the length of a game.
+    The transposition table is kept across this strategy's moves, so a strategy instance should serve one game.
+    It's capped at as many entries as fit in `memory_budget` bytes (see NODE_SIZE), beyond which the search keeps
+    sampling without growing the tree.
+
+    The outcome of the last search is kept in `last_report`.
+    """
+
+    def __init__(self, budget_ms=_DEFAULT_BUDGET_MS, max_iterations=None, memory_budget=_DEFAULT_MEMORY_BUDGET, seed=None):
+        if budget_ms is None and max_iterations is None:
+            raise ValueError('either budget_ms or max_iterations must bound the search')
+        self._budget = None if budget_ms is None else budget_ms / 1000
+        self._max_iterations = max_iterations
+        self._max_nodes = max(memory_budget // NODE_SIZE, 1)
+        self._random = random.Random(seed)
+        self._table = {}
+        self._fallback = HeuristicStrategy()
+        self.last_report = None
+
+    def __getstate__(self) -> dict:
+        # the transposition table is only a cache -- don't ship it around with the strategy
+        state = self.__dict__.copy()
+        state['_table'] = {}
+        return state
+
+    @property
+    def table_size(self) -> int:
+        return len(self._table)
+
+    def move(self, game: 'PazaakGame', player: PazaakPlayer, other: PazaakPlayer) -> PazaakCard:
+        seat = 0 if player is game.player else 1
+        root = _state_from_game(game, seat)
+        action = self.search(root, seat, max_modifier=game.max_modifier, draws=game.draw_distribution())
+
+        if action is None:
+            # nothing could be searched within the budget -- play it safe
+            return self._fallback.move(game, player, other)
+
+        if action == _STAND:
+            player.stand()
+            return PazaakCard.empty()
+
+        if action == _DRAW:
+            return game.draw_card()
+
+        card = next(card for card in player.hand if card.modifier == action)
+        player.hand.remove(card)
+        return card
+
+    def search(self, root: tuple, seat: int, max_modifier=_MAX_MODIFIER, draws=None) -> str or int or None:
+        """
+        Searches from `root` for the seat to move (`seat`), and returns the most-visited action.
+        Returns None if no iteration could be completed within the budget.
+        Draws are simulated from `draws`, the (values, weights) of PazaakGame.draw_distribution(), if given,
+        or else uniformly from 1 to `max_modifier`.
+        """
+        start = time.perf_counter()
+        draw = _drawer(self._random, max_modifier, draws)
+        deadline = None if self._budget is None else start + self._budget
+        table = self._table
+        iterations = nodes = expanded = 0
+
+        while (deadline is None or time.perf_counter() < deadline) and \
+              (self._max_iterations is None or iterations < self._max_iterations):
+            path = []
+            state = root
+            status = GameStatus.GAME_ON
+
+            # selection: walk the tree until reaching a terminal or unexpanded state
+            while True:
+                node = table.get(state)
+                if node is None:
+                    if len(table) < self._max_nodes:
+                        table[state] = _Node(_actions(state))
+                        expanded += 1
+                    break
+
+                nodes += 1
+                index = self._select(node, state[0] == seat)
+                path.append((node, index))
+                state, status = _step(state, node.actions[index], draw)
+                if status:
+                    break
+
+            # simulation
+            if not status:
+                status = _rollout(state, draw)
+            value = _VALUES[status][seat]
+
+            # backpropagation
+            for node, index in path:
+                node.visits += 1
+                node.action_visits[index] += 1
+                node.action_values[index] += value
+
+            iterations += 1
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.last_report = SearchReport(iterations, nodes, expanded, len(table), elapsed_ms)
+        logger.debug('%s searched %s', type(self).__name__, self.last_report)
+
+        root_node = table.get(root)
+        if root_node is None or not root_node.visits:
+            return None
+        best = max(range(len(root_node.actions)), key=lambda i: root_node.action_visits[i])
+        return root_node.actions[best]
+
+    @staticmethod
+    def _select(node: _Node, maximizing: bool) -> int:
+        """
+        UCB1 over the node's actions. The seat that isn't searching minimizes the searching seat's value.
+        """
+        best_index = 0
+        best_score = -1.0
+        log_visits = math.log(node.visits) if node.visits else 0.0
+        for index, visits in enumerate(node.action_visits):
+            if not visits:
+                return index
+            mean = node.action_values[index] / visits
+            if not maximizing:
+                mean = 1.0 - mean
+            score = mean + _EXPLORATION * math.sqrt(log_visits / visits)
+            if score > best_score:
+                best_index, best_score = index, score
+        return best_index
+
+
+def _state_from_game(game: 'PazaakGame', turn: int) -> tuple:
+    players = (game.player, game.opponent)
+    return (
+        turn,
+        tuple(player.score for player in players),
+        tuple(len(player.placed) for player in players),
+        tuple(player.is_standing for player in players),
+        tuple(tuple(sorted(card.modifier for card in player.hand)) for player in players),
+    )
+
+
+def _actions(state: tuple) -> tuple:
+    """
+    Returns the actions available to the seat to move: a standing seat can only pass.
+    """
+    turn, _, _, standing, hands = state
+    if standing[turn]:
+        return (_STAND,)
+    return (_DRAW, _STAND) + tuple(sorted(set(hands[turn])))
+
+
+def _replace(pair: tuple, index: int, value) -> tuple:
+    return (value, pair[1]) if index == 0 else (pair[0], value)
+
+
+def _drawer(rng: random.Random, max_modifier: int, draws=None):
+    """
+    Returns a function drawing a card value: weighted by `draws` (values, weights) if given, otherwise uniform.
+    """
+    if draws is None:
+        return functools.partial(rng.randint, 1, max_modifier)
+
+    values, weights = draws
+    cumulative_weights = list(itertools.accumulate(weights))
+    return lambda: rng.choices(values, cum_weights=cumulative_weights)[0]
+
+
+def _step(state: tuple, action: str or int, draw) -> (tuple, GameStatus):
+    """
+    Applies `action` for the seat to move, mirroring PazaakGame.end_turn.
+    Returns the next state and the resulting GameStatus.
+    """
+    turn, scores, placed, standing, hands = state
+    next_turn = 1 - turn
+
+    if standing[turn]:
+        return (next_turn, scores, placed, standing, hands), GameStatus.GAME_ON
+
+    if action == _STAND:
+        standing = _replace(standing, turn, True)
+        return (next_turn, scores, placed, standing, hands), rules.status(scores, placed, standing)
+
+    if action == _DRAW:
+        modifier = draw()
+    else:
+        modifier = action
+        hand = list(hands[turn])
+        hand.remove(modifier)
+        hands = _replace(hands, turn, tuple(hand))
+
+    placed = _replace(placed, turn, placed[turn] + 1)
+    new_score, stands, busted = rules.place_card(scores[turn], modifier)
+    if stands:
+        standing = _replace(standing, turn, True)
+
+    if busted:
+        status = GameStatus.OPPONENT_WINS if turn == 0 else GameStatus.PLAYER_WINS
+        return (next_turn, scores, placed, standing, hands), status
+
+    scores = _replace(scores, turn, new_score)
+    return (next_turn, scores, placed, standing, hands), rules.status(scores, placed, standing)
+
+
+def _rollout_action(state: tuple) -> str or int:
+    """
+    Cheap default policy used to finish games during simulation.
+    """
+    turn, scores, _, standing, hands = state
+    if standing[turn]:
+        return _STAND
+
+    score = scores[turn]
+    hand = hands[turn]
+    needed = _WINNING_SCORE - score
+    if needed in hand:
+        return needed
+
+    if score > _WINNING_SCORE:
+        rescues = [modifier for modifier in hand if score + modifier <= _WINNING_SCORE]
+        return max(rescues) if rescues else _DRAW
+
+    other = 1 - turn
+    if score >= _ROLLOUT_STAND_SCORE or (standing[other] and scores[other] < score):
+        return _STAND
+    return _DRAW
+
+
+def _rollout(state: tuple, draw) -> GameStatus:
+    status = GameStatus.GAME_ON
+    while not status:
+        state, status = _step(state, _rollout_action(state), draw)
+    return status
+
+
+if __name__ == '__main__':
+    pass
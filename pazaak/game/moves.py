@@ -0,0 +1,33 @@
+import collections
+
+from pazaak.game.cards import PazaakCard
+from pazaak.enums import MoveType
+
+
+class Move(collections.namedtuple('Move', ['kind', 'card'])):
+    """
+    A single turn's action, as consumed by PazaakGame.apply().
+    `card` is the drawn card for MoveType.DRAW, the card taken from the hand for MoveType.HAND,
+    and the empty card otherwise.
+    """
+    __slots__ = ()
+
+    @classmethod
+    def draw(cls, card: PazaakCard) -> 'Move':
+        return cls(MoveType.DRAW, card)
+
+    @classmethod
+    def hand(cls, card: PazaakCard) -> 'Move':
+        return cls(MoveType.HAND, card)
+
+    @classmethod
+    def stand(cls) -> 'Move':
+        return cls(MoveType.STAND, PazaakCard.empty())
+
+    @classmethod
+    def forfeit(cls) -> 'Move':
+        return cls(MoveType.FORFEIT, PazaakCard.empty())
+
+
+if __name__ == '__main__':
+    pass
@@ -1,10 +1,14 @@
 from pazaak.game.cards import PazaakCard
 from pazaak.game.records import Record
 from pazaak.errors import GameLogicError
-from pazaak.bases import Serializable, Recordable
+from pazaak.bases import Serializable, Recordable, RecordedField
 
 
 class PazaakPlayer(Serializable, Recordable):
+    _score = RecordedField(int)
+    _is_standing = RecordedField(bool)
+    _forfeited = RecordedField(bool)
+
     def __init__(self, hand: [PazaakCard], identifier: str, _hand_container_type=list):
         """
         Initialize a PazaakPlayer object.
@@ -23,6 +27,22 @@ class PazaakPlayer(Serializable, Recordable):
         self._record = Record()
 
 
+    def reset(self, hand: [PazaakCard]) -> None:
+        """
+        Puts the player back in the state __init__ leaves them in, with a new `hand` and an empty history, so that the object can be reused.
+        The hand and table containers are refilled in place rather than rebuilt.
+        """
+        self._hand.clear()
+        for card in hand:
+            _add_to_hand(self._hand, card)
+        self._placed.clear()
+        self._score = 0
+        self._is_standing = False
+        self._forfeited = False
+        self._record.reset()
+        self.clear_history()
+
+
     def __str__(self) -> str:
         return 'PazaakPlayer({0})'.format(self.identifier)
 
@@ -98,5 +118,12 @@ class PazaakPlayer(Serializable, Recordable):
         }
 
 
+def _add_to_hand(hand, card: PazaakCard) -> None:
+    if hasattr(hand, 'add'):
+        hand.add(card)
+    else:
+        hand.append(card)
+
+
 if __name__ == '__main__':
     pass
\ No newline at end of file
@@ -7,6 +7,11 @@ class Record(Serializable):
         self.losses = 0
         self.ties = 0
 
+    def reset(self) -> None:
+        self.wins = 0
+        self.losses = 0
+        self.ties = 0
+
     def context(self) -> {str: int}:
         return {
             'wins': self.wins,
@@ -0,0 +1,70 @@
+# The rules of Pazaak as pure functions over plain values.
+#
+# PazaakGame applies these to its players, and search code (see pazaak/game/mcts.py) applies them
+# to lightweight state, so both always agree on how a turn resolves and who has won.
+# Per-seat arguments are (player, opponent) pairs.
+from pazaak.enums import GameRule, GameStatus
+
+
+_WINNING_SCORE = GameRule.WINNING_SCORE.value
+_FILLED_TABLE_THRESHOLD = GameRule.MAX_CARDS_ON_TABLE.value
+
+
+def place_card(score: int, modifier: int) -> (int, bool, bool):
+    """
+    Resolves a player with `score` placing a card worth `modifier`.
+    Returns a 3-tuple of (new score, whether the player now stands, whether the player went bust).
+    Reaching exactly 20 automatically stands; ending a turn over 20 when already over 20 is an automatic loss.
+    """
+    new_score = score + modifier
+    busted = score > _WINNING_SCORE and new_score > _WINNING_SCORE
+    return new_score, new_score == _WINNING_SCORE, busted
+
+
+def forfeited(forfeits: (bool, bool)) -> GameStatus:
+    # for now, the only person that can forfeit is the player
+    return GameStatus.PLAYER_FORFEIT if any(forfeits) else GameStatus.GAME_ON
+
+
+def outscored(scores: (int, int), standing: (bool, bool)) -> GameStatus:
+    """
+    Outscoring happens when both players are standing - the one with the highest score <= 20 wins.
+    """
+    if not all(standing):
+        return GameStatus.GAME_ON
+
+    player_score, opponent_score = scores
+    if player_score == opponent_score:
+        return GameStatus.TIE
+
+    player_key = (player_score <= _WINNING_SCORE, player_score)
+    opponent_key = (opponent_score <= _WINNING_SCORE, opponent_score)
+    return GameStatus.PLAYER_WINS if player_key > opponent_key else GameStatus.OPPONENT_WINS
+
+
+def filled_table(placed_count: int, score: int) -> bool:
+    """
+    Filling the table happens when a player has placed 9 cards and still has a score of at most 20.
+    This is an automatic win.
+    """
+    return placed_count >= _FILLED_TABLE_THRESHOLD and score <= _WINNING_SCORE
+
+
+def status(scores: (int, int), placed_counts: (int, int), standing: (bool, bool), forfeits=(False, False)) -> GameStatus:
+    """
+    Returns the GameStatus of a game in the given position.
+    Criteria are checked in order: forfeit, outscore, then filled table (player first).
+    """
+    result = forfeited(forfeits)
+    if not result:
+        result = outscored(scores, standing)
+    if not result:
+        if filled_table(placed_counts[0], scores[0]):
+            result = GameStatus.PLAYER_WINS
+        elif filled_table(placed_counts[1], scores[1]):
+            result = GameStatus.OPPONENT_WINS
+    return result
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,263 @@
+# Packed, immutable game state for simulation and solving.
+#
+# A PazaakState holds everything the rules read -- per seat: score, number of placed cards,
+# standing and forfeit flags and how many of each card value is in the hand; plus the turn and the status --
+# packed into a single int. States are hashable and compare by value, so they can be used directly
+# as memoization keys (functools.lru_cache, dicts) instead of PazaakGame object graphs.
+#
+# Bit layout of one seat (seat 0 = player in the low bits, seat 1 = opponent above it):
+#   score + 64 (7 bits) | placed count (4 bits) | standing (1 bit) | forfeited (1 bit) | 3-bit count per hand value
+# followed by the turn (1 bit) and the GameStatus value (3 bits).
+from pazaak.game import rules
+from pazaak.game.cards import PazaakCard
+from pazaak.game.game import PazaakGame, _set_silently
+from pazaak.game.moves import Move
+from pazaak.game.players import _add_to_hand
+from pazaak.errors import GameLogicError
+from pazaak.enums import GameRule, GameStatus, MoveType, Turn
+
+
+_MAX_MODIFIER = GameRule.MAX_MODIFIER.value
+
+_SCORE_OFFSET = 64
+_SCORE_BITS = 7
+_PLACED_SHIFT = _SCORE_BITS
+_PLACED_BITS = 4
+_STANDING_SHIFT = _PLACED_SHIFT + _PLACED_BITS
+_FORFEITED_SHIFT = _STANDING_SHIFT + 1
+_HAND_SHIFT = _FORFEITED_SHIFT + 1
+_COUNT_BITS = 3
+
+# hand cards can be any non-zero value within the maximum modifier
+_HAND_VALUES = tuple(value for value in range(-_MAX_MODIFIER, _MAX_MODIFIER + 1) if value)
+_HAND_VALUE_SHIFTS = {value: _HAND_SHIFT + _COUNT_BITS * index for index, value in enumerate(_HAND_VALUES)}
+
+_SEAT_BITS = _HAND_SHIFT + _COUNT_BITS * len(_HAND_VALUES)
+_SEAT_MASK = (1 << _SEAT_BITS) - 1
+_TURN_SHIFT = 2 * _SEAT_BITS
+_STATUS_SHIFT = _TURN_SHIFT + 1
+
+_SCORE_MASK = (1 << _SCORE_BITS) - 1
+_PLACED_MASK = (1 << _PLACED_BITS) - 1
+_COUNT_MASK = (1 << _COUNT_BITS) - 1
+
+_TURNS = (Turn.PLAYER, Turn.OPPONENT)
+_WINS_BY_SEAT = (GameStatus.PLAYER_WINS, GameStatus.OPPONENT_WINS)
+
+
+class PazaakState:
+    """
+    Immutable game state packed into a single int. See the module comments for the layout.
+    Seats are indexed: 0 is the player, 1 is the opponent.
+    """
+    __slots__ = ('_packed',)
+
+    def __init__(self, packed: int):
+        object.__setattr__(self, '_packed', packed)
+
+    @classmethod
+    def new(cls, scores=(0, 0), placed_counts=(0, 0), standing=(False, False), forfeits=(False, False),
+            hands=((), ()), turn=Turn.PLAYER, status=GameStatus.GAME_ON) -> 'PazaakState':
+        """
+        Builds a state from per-seat (player, opponent) values. Hands are iterables of card modifiers.
+        """
+        packed = 0
+        for seat in (0, 1):
+            field = _pack_seat(scores[seat], placed_counts[seat], standing[seat], forfeits[seat], hands[seat])
+            packed |= field << (seat * _SEAT_BITS)
+        packed |= _TURNS.index(turn) << _TURN_SHIFT
+        packed |= status.value << _STATUS_SHIFT
+        return cls(packed)
+
+    @classmethod
+    def from_game(cls, game: PazaakGame) -> 'PazaakState':
+        players = (game.player, game.opponent)
+        return cls.new(
+            scores=tuple(player.score for player in players),
+            placed_counts=tuple(len(player.placed) for player in players),
+            standing=tuple(player.is_standing for player in players),
+            forfeits=tuple(player.forfeited for player in players),
+            hands=tuple([card.modifier for card in player.hand] for player in players),
+            turn=game.turn,
+            status=game.status
+        )
+
+    def to_game(self, opponent_strategy=None, max_modifier=_MAX_MODIFIER) -> PazaakGame:
+        """
+        Rebuilds a PazaakGame in this state, such that `PazaakState.from_game(state.to_game()) == state`.
+        Only the number of placed cards is part of the state, so the rebuilt tables hold empty cards;
+        the fields are set without being recorded, so histories and win/loss records start fresh.
+        Nothing is dealt, so rebuilding a game leaves the `random` module's state alone.
+        """
+        game = PazaakGame([], max_modifier=max_modifier, opponent_strategy=opponent_strategy, deal=False)
+        for seat, player in enumerate((game.player, game.opponent)):
+            _set_silently(player, '_score', self.score(seat))
+            _set_silently(player, '_is_standing', self.is_standing(seat))
+            _set_silently(player, '_forfeited', self.forfeited(seat))
+            player.placed.extend(PazaakCard.empty() for _ in range(self.placed_count(seat)))
+            for modifier in self.hand(seat):
+                _add_to_hand(player.hand, PazaakCard(modifier))
+        game.restore(self.turn, self.status)
+        return game
+
+    def __setattr__(self, name: str, value):
+        raise AttributeError('{0} is immutable'.format(type(self).__name__))
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, PazaakState) and self._packed == other._packed
+
+    def __hash__(self) -> int:
+        return hash(self._packed)
+
+    def __repr__(self) -> str:
+        seats = ', '.join('{0}(score={1}, placed={2}, standing={3}, forfeited={4}, hand={5})'.format(
+            _TURNS[seat].value, self.score(seat), self.placed_count(seat), self.is_standing(seat),
+            self.forfeited(seat), list(self.hand(seat))) for seat in (0, 1))
+        return '{0}({1}, turn={2}, status={3})'.format(type(self).__name__, seats, self.turn.value, self.status.name)
+
+    def __str__(self) -> str:
+        return repr(self)
+
+    def __reduce__(self):
+        return (type(self), (self._packed,))
+
+    @property
+    def packed(self) -> int:
+        return self._packed
+
+    @property
+    def turn(self) -> Turn:
+        return _TURNS[(self._packed >> _TURN_SHIFT) & 1]
+
+    @property
+    def status(self) -> GameStatus:
+        return GameStatus(self._packed >> _STATUS_SHIFT)
+
+    def _seat(self, seat: int) -> int:
+        return (self._packed >> (seat * _SEAT_BITS)) & _SEAT_MASK
+
+    def score(self, seat: int) -> int:
+        return (self._seat(seat) & _SCORE_MASK) - _SCORE_OFFSET
+
+    def placed_count(self, seat: int) -> int:
+        return (self._seat(seat) >> _PLACED_SHIFT) & _PLACED_MASK
+
+    def is_standing(self, seat: int) -> bool:
+        return bool((self._seat(seat) >> _STANDING_SHIFT) & 1)
+
+    def forfeited(self, seat: int) -> bool:
+        return bool((self._seat(seat) >> _FORFEITED_SHIFT) & 1)
+
+    def hand_count(self, seat: int, modifier: int) -> int:
+        """
+        Returns how many cards of value `modifier` are in the seat's hand.
+        """
+        if modifier not in _HAND_VALUE_SHIFTS:
+            return 0
+        return (self._seat(seat) >> _HAND_VALUE_SHIFTS[modifier]) & _COUNT_MASK
+
+    def hand(self, seat: int) -> (int,):
+        """
+        Returns the seat's hand as a sorted tuple of modifiers.
+        """
+        field = self._seat(seat)
+        result = []
+        for modifier, shift in _HAND_VALUE_SHIFTS.items():
+            result.extend([modifier] * ((field >> shift) & _COUNT_MASK))
+        return tuple(result)
+
+
+def step(state: PazaakState, move: Move) -> PazaakState:
+    """
+    Returns the state after the seat to move plays `move`, mirroring PazaakGame.end_turn()/apply().
+    A finished game doesn't change.
+    """
+    packed = state.packed
+    if packed >> _STATUS_SHIFT != GameStatus.GAME_ON.value:
+        return state
+
+    seat = (packed >> _TURN_SHIFT) & 1
+    shift = seat * _SEAT_BITS
+    field = (packed >> shift) & _SEAT_MASK
+    kind = move.kind
+    busted = placed = False
+
+    if kind == MoveType.FORFEIT:
+        field |= 1 << _FORFEITED_SHIFT
+    elif kind == MoveType.STAND:
+        field |= 1 << _STANDING_SHIFT
+
+    if not (field >> _STANDING_SHIFT) & 0b11:
+        modifier = move.card.modifier
+        if kind == MoveType.HAND:
+            value_shift = _HAND_VALUE_SHIFTS.get(modifier)
+            if value_shift is None or not (field >> value_shift) & _COUNT_MASK:
+                raise GameLogicError('{0} is not in the hand of seat {1}'.format(move.card, seat))
+            field -= 1 << value_shift
+
+        placed_count = ((field >> _PLACED_SHIFT) & _PLACED_MASK) + 1
+        if placed_count > _PLACED_MASK:
+            raise GameLogicError('too many cards placed to fit in a {0}'.format(PazaakState.__name__))
+        field = (field & ~(_PLACED_MASK << _PLACED_SHIFT)) | (placed_count << _PLACED_SHIFT)
+        placed = True
+
+        new_score, stands, busted = rules.place_card((field & _SCORE_MASK) - _SCORE_OFFSET, modifier)
+        if stands:
+            field |= 1 << _STANDING_SHIFT
+        if not busted:
+            field = (field & ~_SCORE_MASK) | _pack_score(new_score)
+
+    packed = (packed & ~(_SEAT_MASK << shift)) | (field << shift)
+    status = _evaluate(packed, seat, placed, busted)
+    packed ^= 1 << _TURN_SHIFT
+    packed = (packed & ~(0b111 << _STATUS_SHIFT)) | (status.value << _STATUS_SHIFT)
+    return PazaakState(packed)
+
+
+def _evaluate(packed: int, seat: int, placed: bool, busted: bool) -> GameStatus:
+    """
+    Same criteria, in the same order, as PazaakGame._evaluate().
+    """
+    if busted:
+        return _WINS_BY_SEAT[1 - seat]
+
+    fields = (packed & _SEAT_MASK, (packed >> _SEAT_BITS) & _SEAT_MASK)
+    if any((field >> _FORFEITED_SHIFT) & 1 for field in fields):
+        return GameStatus.PLAYER_FORFEIT
+
+    scores = tuple((field & _SCORE_MASK) - _SCORE_OFFSET for field in fields)
+    if all((field >> _STANDING_SHIFT) & 1 for field in fields):
+        return rules.outscored(scores, (True, True))
+
+    if placed and rules.filled_table((fields[seat] >> _PLACED_SHIFT) & _PLACED_MASK, scores[seat]):
+        return _WINS_BY_SEAT[seat]
+
+    return GameStatus.GAME_ON
+
+
+def _pack_score(score: int) -> int:
+    packed = score + _SCORE_OFFSET
+    if not 0 <= packed <= _SCORE_MASK:
+        raise ValueError('score {0} does not fit in a {1}'.format(score, PazaakState.__name__))
+    return packed
+
+
+def _pack_seat(score: int, placed_count: int, standing: bool, forfeited: bool, hand) -> int:
+    if not 0 <= placed_count <= _PLACED_MASK:
+        raise ValueError('placed count {0} does not fit in a {1}'.format(placed_count, PazaakState.__name__))
+
+    field = _pack_score(score) | (placed_count << _PLACED_SHIFT)
+    field |= int(bool(standing)) << _STANDING_SHIFT
+    field |= int(bool(forfeited)) << _FORFEITED_SHIFT
+    for modifier in hand:
+        if modifier not in _HAND_VALUE_SHIFTS:
+            raise ValueError('hand card {0} does not fit in a {1}'.format(modifier, PazaakState.__name__))
+        shift = _HAND_VALUE_SHIFTS[modifier]
+        if (field >> shift) & _COUNT_MASK == _COUNT_MASK:
+            raise ValueError('too many {0} cards to fit in a {1}'.format(modifier, PazaakState.__name__))
+        field += 1 << shift
+    return field
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,106 @@
+import abc
+
+from pazaak.game import cards
+from pazaak.game.cards import PazaakCard
+from pazaak.game.players import PazaakPlayer
+from pazaak.enums import GameRule
+
+
+_WINNING_SCORE = GameRule.WINNING_SCORE.value
+
+
+class PazaakStrategy(metaclass=abc.ABCMeta):
+    """
+    Base class for the logic that decides a seat's next move.
+    A strategy is handed the game, the player it's moving for, and that player's adversary.
+
+    The returned move follows the same conventions as the console game:
+      * to stand, call `player.stand()` and return PazaakCard.empty().
+      * to play from the hand, remove the card from `player.hand` and return it.
+      * to end the turn, return a freshly drawn card (see `PazaakGame.draw_card()`).
+    """
+
+    @property
+    def name(self) -> str:
+        return type(self).__name__
+
+    @abc.abstractmethod
+    def move(self, game: 'PazaakGame', player: PazaakPlayer, other: PazaakPlayer) -> PazaakCard:
+        """
+        Returns the next move for `player`.
+        """
+        pass
+
+
+
+class HeuristicStrategy(PazaakStrategy):
+    """
+    The original built-in opponent. There's some limited intelligence here:
+    1) if their score is higher than the other player's score (but under 20), AND the other player is standing,
+       then they will stand (causing them to win).
+    2) if they have a card in their hand that, when played, will get their score to 20,
+       then they'll play it.
+    3) if their score is over 20, they'll play the first hand card that brings it back under 20.
+
+    Otherwise, they'll just draw a random card.
+    """
+
+    def move(self, game: 'PazaakGame', player: PazaakPlayer, other: PazaakPlayer) -> PazaakCard:
+        card = None
+        value_needed_to_win = _WINNING_SCORE - player.score
+        card_needed_to_win = PazaakCard.empty() if value_needed_to_win == 0 else PazaakCard(value_needed_to_win)
+        other_stood_too_early = other.is_standing and \
+                                ((other.score <= player.score <= _WINNING_SCORE) or \
+                                 (other.score > _WINNING_SCORE and player.score <= _WINNING_SCORE))
+
+        if player.score == _WINNING_SCORE or other_stood_too_early:
+            player.stand()
+            card = PazaakCard.empty()
+
+        elif card_needed_to_win in player.hand:
+            player.hand.remove(card_needed_to_win)
+            card = card_needed_to_win
+
+        elif player.score > _WINNING_SCORE and player.hand:
+            # if their score is over 20,
+            # find a card from their hand that will maximize their score under 20
+            card_needed = max(player.hand, key=lambda card: player.score + card.modifier <= _WINNING_SCORE)
+            player.hand.remove(card_needed)
+            card = card_needed
+
+        else:
+            card = game.draw_card()
+
+        return card
+
+
+
+class ThresholdStrategy(PazaakStrategy):
+    """
+    A deliberately simple strategy: play a hand card that makes 20 if there is one, stand once the score
+    reaches `threshold`, and draw otherwise. Mostly useful as a point of comparison in tournaments.
+    """
+
+    def __init__(self, threshold=17):
+        self._threshold = threshold
+
+    @property
+    def name(self) -> str:
+        return '{0}({1})'.format(type(self).__name__, self._threshold)
+
+    def move(self, game: 'PazaakGame', player: PazaakPlayer, other: PazaakPlayer) -> PazaakCard:
+        value_needed_to_win = _WINNING_SCORE - player.score
+        for card in player.hand:
+            if card.modifier == value_needed_to_win:
+                player.hand.remove(card)
+                return card
+
+        if self._threshold <= player.score <= _WINNING_SCORE:
+            player.stand()
+            return PazaakCard.empty()
+
+        return game.draw_card()
+
+
+if __name__ == '__main__':
+    pass
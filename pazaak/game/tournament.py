@@ -0,0 +1,212 @@
+import argparse
+import collections
+import functools
+import itertools
+import math
+import multiprocessing
+import random
+
+from pazaak.game import cards
+from pazaak.game.cards import PazaakCard
+from pazaak.game.game import PazaakGame
+from pazaak.game.mcts import MonteCarloStrategy
+from pazaak.game.strategies import HeuristicStrategy, ThresholdStrategy
+from pazaak.enums import GameRule, GameStatus, Turn
+from pazaak.errors import GameLogicError
+
+
+_HAND_SIZE = 4
+# every turn either places a card or is taken by a standing player, so a game can't outlast this
+_MAX_TURNS = 4 * GameRule.MAX_CARDS_ON_TABLE.value
+_DEFAULT_CHUNK_SIZE = 64
+
+# strategies played by default, keyed by a friendly name.
+# Search-based strategies are bounded by iterations rather than time here, so that results stay deterministic.
+STRATEGIES = {
+    'heuristic': HeuristicStrategy,
+    'threshold': ThresholdStrategy,
+    'mcts': functools.partial(MonteCarloStrategy, budget_ms=None, max_iterations=300, seed=0),
+}
+
+
+class MatchupResult:
+    """
+    Tally of the games played between two strategies, from the point of view of the first one.
+    """
+    def __init__(self, wins=0, losses=0, ties=0):
+        self.wins = wins
+        self.losses = losses
+        self.ties = ties
+
+    def __repr__(self) -> str:
+        return '{0}(wins={1}, losses={2}, ties={3})'.format(type(self).__name__, self.wins, self.losses, self.ties)
+
+    def __str__(self) -> str:
+        return repr(self)
+
+    @property
+    def games(self) -> int:
+        return self.wins + self.losses + self.ties
+
+    def win_rate(self) -> float:
+        return self.wins / self.games if self.games else 0.0
+
+    def confidence_interval(self, z=1.96) -> (float, float):
+        """
+        Returns the Wilson score interval of the win rate.
+        The default `z` gives a 95% interval.
+        """
+        n = self.games
+        if not n:
+            return (0.0, 1.0)
+
+        p = self.win_rate()
+        denominator = 1 + z * z / n
+        centre = (p + z * z / (2 * n)) / denominator
+        margin = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denominator
+        return (max(0.0, centre - margin), min(1.0, centre + margin))
+
+    def add(self, other: 'MatchupResult') -> None:
+        self.wins += other.wins
+        self.losses += other.losses
+        self.ties += other.ties
+
+    def reversed(self) -> 'MatchupResult':
+        """
+        Returns the same tally from the point of view of the other strategy.
+        """
+        return MatchupResult(wins=self.losses, losses=self.wins, ties=self.ties)
+
+
+
+class TournamentResult:
+    """
+    Win-rate matrix of a round-robin tournament.
+    `result[a, b]` is the MatchupResult of strategy `a` against strategy `b`.
+    """
+    def __init__(self, names: [str], matchups: {(str, str): MatchupResult}):
+        self._names = list(names)
+        self._matchups = matchups
+
+    def __getitem__(self, pair: (str, str)) -> MatchupResult:
+        return self._matchups[pair]
+
+    def __str__(self) -> str:
+        width = max(len(name) for name in self._names) + 2
+        cell = 22
+        lines = [' ' * width + ''.join(name.rjust(cell) for name in self._names)]
+        for row in self._names:
+            line = row.ljust(width)
+            for column in self._names:
+                if row == column:
+                    line += '-'.rjust(cell)
+                    continue
+                result = self[row, column]
+                low, high = result.confidence_interval()
+                line += '{0:.3f} [{1:.3f}, {2:.3f}]'.format(result.win_rate(), low, high).rjust(cell)
+            lines.append(line)
+        return '\n'.join(lines)
+
+    @property
+    def names(self) -> [str]:
+        return list(self._names)
+
+    def win_rate(self, name: str, against: str) -> float:
+        return self[name, against].win_rate()
+
+    def confidence_interval(self, name: str, against: str, z=1.96) -> (float, float):
+        return self[name, against].confidence_interval(z=z)
+
+
+def play_game(player_strategy, opponent_strategy, seed: int) -> GameStatus:
+    """
+    Plays one headless game between two strategy instances and returns its final GameStatus.
+    All randomness (hands and draws) is driven from `seed`, so the same seed always plays out the same game.
+    """
+    random.seed(seed)
+    pool = cards.random_cards(_HAND_SIZE, positive_only=False, bound=5)
+    game = PazaakGame(pool, opponent_strategy=opponent_strategy)
+    seats = {
+        Turn.PLAYER: (player_strategy, game.player, game.opponent),
+        Turn.OPPONENT: (opponent_strategy, game.opponent, game.player)
+    }
+
+    status = GameStatus.GAME_ON
+    for _ in range(_MAX_TURNS):
+        turn = game.turn
+        strategy, player, other = seats[turn]
+        move = PazaakCard.empty() if player.is_standing else strategy.move(game, player, other)
+        status = game.end_turn(turn, move)
+        if status:
+            return status
+
+    raise GameLogicError('game with seed {0} did not finish within {1} turns'.format(seed, _MAX_TURNS))
+
+
+def _play_chunk(task: (str, callable, str, callable, [int])) -> (str, str, MatchupResult):
+    """
+    Process pool worker: plays every seed in the chunk twice, once from each seat.
+    Strategies are built fresh for every game so that no state leaks between games.
+    """
+    name, factory, other_name, other_factory, seeds = task
+    result = MatchupResult()
+    for seed in seeds:
+        for first_seat in (True, False):
+            if first_seat:
+                status = play_game(factory(), other_factory(), seed)
+            else:
+                status = play_game(other_factory(), factory(), seed)
+
+            if status == GameStatus.TIE:
+                result.ties += 1
+            elif (status == GameStatus.PLAYER_WINS) == first_seat:
+                result.wins += 1
+            else:
+                result.losses += 1
+
+    return name, other_name, result
+
+
+def round_robin(strategies: {str: callable}, seeds: [int], processes=None, chunk_size=_DEFAULT_CHUNK_SIZE) -> TournamentResult:
+    """
+    Plays every pair of strategies against each other over the shared `seeds`, once from each seat per seed.
+    `strategies` maps a name to a zero-argument factory (a class or functools.partial) returning a new strategy;
+    factories must be picklable, since games are spread across a process pool of `processes` workers
+    (defaults to the number of CPUs; 1 runs everything in this process).
+
+    Every game is seeded independently, so results are deterministic for a given seed set
+    regardless of the number of processes.
+    """
+    names = list(strategies)
+    seeds = list(seeds)
+    chunks = [seeds[i:i + chunk_size] for i in range(0, len(seeds), chunk_size)]
+    tasks = [(name, strategies[name], other, strategies[other], chunk)
+             for name, other in itertools.combinations(names, 2)
+             for chunk in chunks]
+
+    if processes == 1:
+        outcomes = map(_play_chunk, tasks)
+        return _tabulate(names, outcomes)
+
+    with multiprocessing.Pool(processes=processes) as pool:
+        outcomes = pool.imap_unordered(_play_chunk, tasks)
+        return _tabulate(names, outcomes)
+
+
+def _tabulate(names: [str], outcomes) -> TournamentResult:
+    matchups = collections.defaultdict(MatchupResult)
+    for name, other, result in outcomes:
+        matchups[name, other].add(result)
+        matchups[other, name].add(result.reversed())
+    return TournamentResult(names, dict(matchups))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser('Pazaak strategy tournament')
+    parser.add_argument('-n', '--games', type=int, default=1000, help='number of seeds each pair plays (from both seats)')
+    parser.add_argument('-s', '--seed', type=int, default=0, help='first seed of the shared seed set')
+    parser.add_argument('-p', '--processes', type=int, default=None, help='worker processes (defaults to the CPU count)')
+    args = parser.parse_args()
+
+    result = round_robin(STRATEGIES, range(args.seed, args.seed + args.games), processes=args.processes)
+    print(result)
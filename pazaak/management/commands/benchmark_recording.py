@@ -0,0 +1,80 @@
+import datetime
+import timeit
+
+from django.core.management.base import BaseCommand
+
+from pazaak.bases import Recordable, UpdateHistory
+from pazaak.game.players import PazaakPlayer
+
+
+class _Plain:
+    def __init__(self):
+        self._placed = None
+
+
+class _Intercepting(Recordable):
+    """
+    Records writes the way Recordable did before RecordedField: by intercepting every attribute write
+    in __setattr__, and recording any attribute that isn't whitelisted.
+    """
+    _whitelisted_fields = {'_whitelisted_fields', '_history', '_recordable_types', '_default_recording', '_size'}
+
+    def __init__(self):
+        super().__init__()
+        self._placed = None
+        self._score = 0
+
+    def __setattr__(self, name: str, value):
+        super().__setattr__(name, value)
+        if name not in self._whitelisted_fields:
+            value_to_record = value if self.should_record_value(value) else None
+            self._history[name].append(UpdateHistory(name, value_to_record, datetime.datetime.utcnow()))
+            self._size += 1
+
+
+class Command(BaseCommand):
+    help = ('Times attribute writes on a PazaakPlayer, recorded (RecordedField) and unrecorded, '
+            'against writes on a plain object and writes recorded by intercepting __setattr__, as before RecordedField.')
+    requires_system_checks = False
+
+    def add_arguments(self, parser):
+        parser.add_argument('-n', '--number', type=int, default=200000, help='writes per timing (default: %(default)s)')
+        parser.add_argument('-r', '--repeat', type=int, default=5, help='timings to keep the best of (default: %(default)s)')
+
+    def handle(self, *args, **options):
+        plain = _Plain()
+        player = PazaakPlayer([], 'player')
+        before = _Intercepting()
+
+        def write_plain():
+            plain._placed = 1
+
+        def write_before():
+            before._placed = 1
+
+        def write_whitelisted_before():
+            before._size = 1
+
+        def write_unrecorded():
+            player._placed = 1
+
+        def write_recorded():
+            player._score = 1
+
+        def write_recorded_value_of_other_type():
+            player._score = 1.5
+
+        def read_recorded():
+            return player._score
+
+        for label, operation in (('plain object write', write_plain),
+                                 ('before: any write (recorded)', write_before),
+                                 ('before: whitelisted write', write_whitelisted_before),
+                                 ('unrecorded write', write_unrecorded),
+                                 ('recorded write', write_recorded),
+                                 ('recorded write, undeclared type', write_recorded_value_of_other_type),
+                                 ('recorded read', read_recorded)):
+            player.clear_history()
+            before.clear_history()
+            best = min(timeit.repeat(operation, number=options['number'], repeat=options['repeat']))
+            self.stdout.write('{0:<34}{1:>8.0f} ns'.format(label, best / options['number'] * 1e9))
@@ -0,0 +1,23 @@
+import pathlib
+
+from django.core.management.base import BaseCommand
+
+from pazaak.apps import enum_write_file
+from pazaak.enums import export_enums_to_js
+
+
+class Command(BaseCommand):
+    help = 'Generates the JS enums file consumed by the Pazaak React client.'
+    # runs as a build step, so it shouldn't need the rest of the project (URLconf, flick credentials, ...) to load
+    requires_system_checks = False
+
+    def add_arguments(self, parser):
+        parser.add_argument('-o', '--output', default=None,
+                            help='file to write (defaults to the React client\'s enums.js)')
+
+    def handle(self, *args, **options):
+        write_file = pathlib.Path(options['output']) if options['output'] else enum_write_file()
+        if export_enums_to_js(write_file):
+            self.stdout.write('Wrote {0}'.format(write_file))
+        else:
+            self.stdout.write('{0} is already up to date'.format(write_file))
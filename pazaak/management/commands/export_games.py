@@ -0,0 +1,80 @@
+import json
+import os
+import pathlib
+import urllib.parse
+import urllib.request
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+_DEFAULT_URL = 'http://localhost:8000/pazaak/api/export-games'
+_WRITE_BUFFER_SIZE = 1 << 16
+_TAIL_BLOCK_SIZE = 1 << 12
+
+
+class Command(BaseCommand):
+    help = 'Exports the finished games of a running Pazaak server to a newline-delimited JSON file.'
+    # talks to the server over HTTP, so it doesn't need the rest of the project to load
+    requires_system_checks = False
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help='NDJSON file to write, one game per line')
+        parser.add_argument('--url', default=_DEFAULT_URL, help='export endpoint of the running server')
+        parser.add_argument('--token', default=None,
+                            help='bearer token accepted by the server (defaults to the PAZAAK_EXPORT_TOKEN setting)')
+        parser.add_argument('--after', type=int, default=None,
+                            help='only export games with a greater ID (defaults to resuming after the last game in the output)')
+
+    def handle(self, *args, **options):
+        output = pathlib.Path(options['output'])
+        token = options['token'] or getattr(settings, 'PAZAAK_EXPORT_TOKEN', None)
+        after = options['after']
+        if after is None:
+            after = _last_game_id(output)
+
+        url = '{0}?{1}'.format(options['url'], urllib.parse.urlencode({'after': after}))
+        request = urllib.request.Request(url)
+        if token:
+            request.add_header('Authorization', 'Bearer {0}'.format(token))
+
+        count = 0
+        try:
+            with urllib.request.urlopen(request) as response, open(output, 'ab', buffering=_WRITE_BUFFER_SIZE) as file:
+                for line in response:
+                    # a connection dropped mid-line leaves a partial line -- leave it out, and resume before it
+                    if not line.endswith(b'\n'):
+                        break
+                    file.write(line)
+                    after = json.loads(line)['gameId']
+                    count += 1
+        except OSError as e:
+            raise CommandError('export stopped after {0} games (resume after game {1}): {2}'.format(count, after, e))
+
+        self.stdout.write('Exported {0} games to {1}; last game ID {2}'.format(count, output, after))
+
+
+def _last_game_id(path: pathlib.Path) -> int:
+    """
+    Returns the "gameId" of the last complete line of a previous export, or -1 if there's none.
+    Reads the file backwards from the end, so only the last line is ever loaded.
+    """
+    if not path.exists():
+        return -1
+
+    with open(path, 'rb') as file:
+        file.seek(0, os.SEEK_END)
+        position = file.tell()
+        tail = b''
+        while position > 0:
+            step = min(_TAIL_BLOCK_SIZE, position)
+            position -= step
+            file.seek(position)
+            tail = file.read(step) + tail
+            lines = tail.rstrip(b'\n').split(b'\n')
+            if len(lines) > 1 or position == 0:
+                last_line = lines[-1]
+                return json.loads(last_line)['gameId'] if last_line else -1
+
+    return -1
+
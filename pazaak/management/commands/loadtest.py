@@ -0,0 +1,92 @@
+import functools
+import secrets
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from pazaak.enums import Difficulty
+from pazaak.server import loadtest
+
+
+_DEFAULT_MIX = 'end-turn=70,hand-card=15,stand=15'
+
+
+class Command(BaseCommand):
+    help = ('Plays full Pazaak games with concurrent virtual clients, and reports throughput, latency percentiles '
+            'per endpoint, error rates, and the growth of the server\'s estimated game memory (and of its RSS, '
+            'in-process). Runs the app in-process unless --url is given.')
+    # in-process runs only need the Pazaak app, and --url runs none of the project
+    requires_system_checks = False
+
+    def add_arguments(self, parser):
+        parser.add_argument('-c', '--clients', type=int, default=10, help='number of concurrent virtual clients')
+        parser.add_argument('-g', '--games', type=int, default=None,
+                            help='games every client plays (defaults to 5, or to unlimited with --duration)')
+        parser.add_argument('-d', '--duration', type=float, default=None, help='seconds to keep playing for')
+        parser.add_argument('--mix', default=_DEFAULT_MIX,
+                            help='relative weights of the behaviors clients pick their actions from (default: %(default)s)')
+        parser.add_argument('--difficulty', default=Difficulty.NORMAL.value, choices=[level.value for level in Difficulty],
+                            help='difficulty of the games (default: %(default)s)')
+        parser.add_argument('--url', default=None,
+                            help='base URL of the API of a running server, e.g. http://localhost:8000/pazaak/api')
+        parser.add_argument('--token', default=None,
+                            help='bearer token for the server\'s admin stats endpoint, with --url '
+                                 '(defaults to the PAZAAK_EXPORT_TOKEN setting)')
+        parser.add_argument('--seed', type=int, default=None, help='seeds the clients\' choices')
+        parser.add_argument('--throttle', action='store_true',
+                            help='keep the PAZAAK_THROTTLE_RATES limits of in-process runs (they are lifted by default)')
+
+    def handle(self, *args, **options):
+        try:
+            mix = loadtest.parse_mix(options['mix'])
+        except ValueError as e:
+            raise CommandError(e)
+        if options['clients'] < 1:
+            raise CommandError('a load test needs at least one client')
+
+        games = options['games']
+        if games is None and options['duration'] is None:
+            games = 5
+        run = functools.partial(loadtest.run_load, clients=options['clients'], games=games, duration=options['duration'],
+                                mix=mix, difficulty=Difficulty(options['difficulty']), seed=options['seed'])
+
+        url = options['url']
+        if url:
+            token = options['token'] or getattr(settings, 'PAZAAK_EXPORT_TOKEN', None)
+            probe = functools.partial(_game_memory, loadtest.HttpTransport(-1, url, token=token))
+            try:
+                probe()
+            except OSError as e:
+                raise CommandError('could not reach the server at {0}: {1}'.format(url, e))
+            report = run(functools.partial(loadtest.HttpTransport, base_url=url), memory_probe=probe)
+        else:
+            # a one-off token, for the memory probe to read the admin stats endpoint
+            token = secrets.token_urlsafe()
+            overrides = {'ALLOWED_HOSTS': list(settings.ALLOWED_HOSTS) + ['testserver'], 'PAZAAK_EXPORT_TOKEN': token}
+            if not options['throttle']:
+                overrides['PAZAAK_THROTTLE_RATES'] = {}
+            with override_settings(**overrides):
+                report = run(loadtest.InProcessTransport,
+                             memory_probe=functools.partial(_in_process_memory, loadtest.InProcessTransport(-1, token=token)))
+
+        self.stdout.write(loadtest.format_report(report))
+
+
+def _game_memory(transport) -> {str: int}:
+    """
+    The server's estimate of the memory held by its games, from its admin-only stats endpoint;
+    nothing if the transport isn't allowed to read it. It isn't the server's RSS, which only in-process runs measure.
+    """
+    status, stats = transport.request('GET', 'stats')
+    if status != 200 or not stats:
+        return {}
+    return {'estimated game memory (not RSS)': stats['memoryUsage']}
+
+
+def _in_process_memory(transport) -> {str: int}:
+    memory = _game_memory(transport)
+    resident = loadtest.resident_memory()
+    if resident is not None:
+        memory['process RSS'] = resident
+    return memory
@@ -0,0 +1,56 @@
+import pathlib
+import signal
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from pazaak.apps import _DEFAULT_SNAPSHOT_INTERVAL
+from pazaak.errors import ServerError
+from pazaak.server.engine import EngineGameManager, EngineService, engine_addresses
+from pazaak.server.game import game_manager_factory
+from pazaak.server.snapshots import SnapshotScheduler
+
+
+class Command(BaseCommand):
+    help = ('Runs the Pazaak engine processes at the PAZAAK_ENGINES addresses, for every web server process to share, '
+            'until interrupted. Restores and snapshots their games when PAZAAK_SNAPSHOT_FILE is set.')
+    # the engines only need the Pazaak app
+    requires_system_checks = False
+
+    def handle(self, *args, **options):
+        addresses = engine_addresses()
+        if not addresses:
+            raise CommandError('PAZAAK_ENGINES lists no engine addresses')
+
+        service = EngineService(game_manager_factory(len(addresses)), addresses)
+        try:
+            service.start()
+        except ServerError as e:
+            raise CommandError(e)
+
+        stopped = threading.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: stopped.set())
+
+        scheduler = None
+        snapshot_file = getattr(settings, 'PAZAAK_SNAPSHOT_FILE', None)
+        client = EngineGameManager(addresses)
+        try:
+            if snapshot_file:
+                client.restore(pathlib.Path(snapshot_file))
+                interval = getattr(settings, 'PAZAAK_SNAPSHOT_INTERVAL', _DEFAULT_SNAPSHOT_INTERVAL)
+                scheduler = SnapshotScheduler(client, pathlib.Path(snapshot_file), interval)
+                scheduler.start()
+            self.stdout.write('Serving {0} Pazaak engines at {1}'.format(len(addresses), addresses))
+
+            # wake up now and then, to notice engines dying
+            while not stopped.wait(1) and service.is_alive():
+                pass
+            if not stopped.is_set():
+                self.stderr.write('A Pazaak engine died, stopping the others')
+        finally:
+            if scheduler is not None:
+                scheduler.stop()
+            client.close()
+            service.stop()
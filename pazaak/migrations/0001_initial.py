@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedGame',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('game_id', models.BigIntegerField(db_index=True)),
+                ('status', models.PositiveSmallIntegerField(choices=[(0, 'Player wins'), (1, 'Opponent wins'), (2, 'Tie'), (4, 'Player forfeit')])),
+                ('player_score', models.SmallIntegerField()),
+                ('opponent_score', models.SmallIntegerField()),
+                ('player_moves', models.TextField()),
+                ('opponent_moves', models.TextField()),
+                ('opponent_strategy', models.CharField(max_length=64)),
+                ('started_at', models.DateTimeField(null=True)),
+                ('finished_at', models.DateTimeField(db_index=True)),
+            ],
+        ),
+    ]
@@ -1,3 +1,26 @@
 from django.db import models
 
-# Create your models here.
+from pazaak.enums import GameStatus
+
+
+class ArchivedGame(models.Model):
+    """
+    A finished game, archived in the background by pazaak.server.archive once it's over.
+    Moves are JSON lists of the modifiers of the cards each side placed, in order.
+    """
+    STATUS_CHOICES = tuple((status.value, status.name.replace('_', ' ').capitalize())
+                           for status in GameStatus if status != GameStatus.GAME_ON)
+
+    game_id = models.BigIntegerField(db_index=True)
+    status = models.PositiveSmallIntegerField(choices=STATUS_CHOICES)
+    player_score = models.SmallIntegerField()
+    opponent_score = models.SmallIntegerField()
+    player_moves = models.TextField()
+    opponent_moves = models.TextField()
+    opponent_strategy = models.CharField(max_length=64)
+    # unknown for games restored from a snapshot
+    started_at = models.DateTimeField(null=True)
+    finished_at = models.DateTimeField(db_index=True)
+
+    def __str__(self) -> str:
+        return 'ArchivedGame({0}, {1})'.format(self.game_id, GameStatus(self.status).name)
@@ -10,6 +10,11 @@ export const Action = {
     STAND_PLAYER: 'stand-player',
 };
 
+export const Difficulty = {
+    NORMAL: 'normal',
+    HARD: 'hard',
+};
+
 export const GameRule = {
     MAX_CARDS_ON_TABLE: 9,
     WINNING_SCORE: 20,
@@ -0,0 +1,185 @@
+# Write-behind archival of finished games.
+#
+# When a game ends, the request that ended it only builds a small record of the game (see archive_record())
+# and hands it to a GameArchiver. The archiver's thread collects records into batches and inserts them with
+# bulk_create once a batch is full or has waited long enough, so requests never wait on the database.
+#
+# The queue is bounded: when the database can't keep up, a request waits for room for at most `put_timeout_ms`,
+# which slows the requests down to the pace of the database for a moment, and only then drops its record
+# (counted in stats()), so that neither the backlog nor request latency grows unbounded.
+# Closing the archiver doesn't wait on a stuck database for longer than its timeout either.
+import atexit
+import datetime
+import json
+import logging
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.utils import timezone
+
+from pazaak.game.game import PazaakGame
+
+
+logger = logging.getLogger(__name__)
+
+_DEFAULT_BATCH_SIZE = 100
+_DEFAULT_FLUSH_INTERVAL_MS = 1000
+_DEFAULT_MAX_PENDING = 10000
+_DEFAULT_PUT_TIMEOUT_MS = 50
+_DEFAULT_CLOSE_TIMEOUT = 10
+
+# sent to the archiver's thread to flush and stop
+_STOP = None
+
+
+class GameArchiver:
+    """
+    Inserts archive records into the ArchivedGame table from a background thread,
+    `batch_size` records at a time, or every `flush_interval_ms` milliseconds when there are fewer.
+    At most `max_pending` records wait to be written; submit() waits up to `put_timeout_ms` for room,
+    then drops the record.
+    close() (also run at exit) writes everything still pending.
+    """
+    def __init__(self, batch_size=_DEFAULT_BATCH_SIZE, flush_interval_ms=_DEFAULT_FLUSH_INTERVAL_MS,
+                 max_pending=_DEFAULT_MAX_PENDING, put_timeout_ms=_DEFAULT_PUT_TIMEOUT_MS):
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval_ms / 1000
+        self._put_timeout = put_timeout_ms / 1000
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._counts_lock = threading.Lock()
+        self._archived = self._dropped = self._failed = 0
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='pazaak-archiver', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    @classmethod
+    def from_settings(cls) -> 'GameArchiver':
+        return cls(batch_size=getattr(settings, 'PAZAAK_ARCHIVE_BATCH_SIZE', _DEFAULT_BATCH_SIZE),
+                   flush_interval_ms=getattr(settings, 'PAZAAK_ARCHIVE_FLUSH_INTERVAL_MS', _DEFAULT_FLUSH_INTERVAL_MS),
+                   max_pending=getattr(settings, 'PAZAAK_ARCHIVE_MAX_PENDING', _DEFAULT_MAX_PENDING),
+                   put_timeout_ms=getattr(settings, 'PAZAAK_ARCHIVE_PUT_TIMEOUT_MS', _DEFAULT_PUT_TIMEOUT_MS))
+
+    def submit(self, record: dict) -> bool:
+        """
+        Queues a record (see archive_record()) to be written, waiting a little for room if the queue is full.
+        Returns False if it had to be dropped.
+        """
+        if not self._closed:
+            try:
+                self._queue.put(record, timeout=self._put_timeout)
+                return True
+            except queue.Full:
+                pass
+
+        with self._counts_lock:
+            self._dropped += 1
+        logger.warning('dropped the archive record of game %s: the archive queue is full', record['game_id'])
+        return False
+
+    def close(self, timeout=_DEFAULT_CLOSE_TIMEOUT) -> None:
+        """
+        Writes the pending records and stops the archiver's thread,
+        giving up after `timeout` seconds if the database doesn't keep up.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            logger.warning('stopped waiting on the archiver: %s records were not written', self._queue.qsize())
+            return
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logger.warning('stopped waiting on the archiver: it is still writing')
+
+    def stats(self) -> dict:
+        with self._counts_lock:
+            return {
+                'pending': self._queue.qsize(),
+                'archived': self._archived,
+                'dropped': self._dropped,
+                'failed': self._failed,
+            }
+
+    def _run(self) -> None:
+        from django.db import connection
+
+        stopping = False
+        try:
+            while not stopping:
+                batch, stopping = self._next_batch()
+                if batch:
+                    self._write(batch)
+        finally:
+            connection.close()
+
+    def _next_batch(self) -> ([dict], bool):
+        """
+        Waits for the first record, then collects records until the batch is full or the flush interval passed.
+        Returns the batch, and whether the archiver was asked to stop.
+        """
+        record = self._queue.get()
+        if record is _STOP:
+            return [], True
+
+        batch = [record]
+        deadline = time.monotonic() + self._flush_interval
+        while len(batch) < self._batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                record = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if record is _STOP:
+                return batch + self._drain(), True
+            batch.append(record)
+        return batch, False
+
+    def _drain(self) -> [dict]:
+        records = []
+        while True:
+            try:
+                records.append(self._queue.get_nowait())
+            except queue.Empty:
+                return [record for record in records if record is not _STOP]
+
+    def _write(self, batch: [dict]) -> None:
+        from pazaak.models import ArchivedGame
+
+        try:
+            for start in range(0, len(batch), self._batch_size):
+                ArchivedGame.objects.bulk_create([ArchivedGame(**record) for record in batch[start:start + self._batch_size]])
+        except Exception:
+            logger.exception('could not archive %s games', len(batch))
+            with self._counts_lock:
+                self._failed += len(batch)
+        else:
+            with self._counts_lock:
+                self._archived += len(batch)
+
+
+def archive_record(game_id: int, game: PazaakGame, started_at: float or None) -> dict:
+    """
+    Returns the ArchivedGame fields of a finished game. `started_at` is a time.time() timestamp.
+    """
+    return {
+        'game_id': game_id,
+        'status': game.status.value,
+        'player_score': game.player.score,
+        'opponent_score': game.opponent.score,
+        'player_moves': json.dumps([card.modifier for card in game.player.placed]),
+        'opponent_moves': json.dumps([card.modifier for card in game.opponent.placed]),
+        'opponent_strategy': game.opponent_strategy.name[:64],
+        'started_at': None if started_at is None else datetime.datetime.fromtimestamp(started_at, timezone.utc),
+        'finished_at': timezone.now(),
+    }
+
+
+if __name__ == '__main__':
+    pass
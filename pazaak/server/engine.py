@@ -0,0 +1,478 @@
+# Engine mode: games live in a pool of engine processes shared by every web server process, instead of in their memory.
+#
+# Each engine listens on its own address (a Unix socket or a TCP port, see PAZAAK_ENGINES), owns a GameManager holding
+# the games whose IDs map to it (game_id % number of engines), and allocates the IDs of the games it starts:
+# engine i of n hands out i, i + n, i + 2n, ... so IDs are unique whichever web server process asked for the game,
+# and always lead back to the engine holding it.
+# Views talk to EngineGameManager exactly as they'd talk to a GameManager; every command is forwarded to the owning
+# engine, which runs it and sends back the pre-encoded response bytes. Game objects therefore never cross process
+# boundaries, and CPU-heavy opponent moves spread over all engines. The first engine also runs the matchmaker,
+# so that players are matched whichever web server process they reach.
+#
+# EngineService runs the engines -- `manage.py run_engines` runs it for the web server processes to share.
+# It starts them with the 'spawn' start method: every engine is a fresh interpreter that sets Django (and so its own
+# logging) up, rather than a fork of a threaded process that would inherit its locks and its logging queues,
+# without the threads serving them.
+import heapq
+import itertools
+import logging
+import multiprocessing
+import multiprocessing.connection
+import os
+import pathlib
+import pickle
+import signal
+import threading
+import time
+
+from django.conf import settings
+from django.utils.crypto import salted_hmac
+
+from pazaak.enums import Difficulty, Turn
+from pazaak.errors import ServerError
+from pazaak.server.matchmaking import Match, Matchmaker
+
+
+logger = logging.getLogger(__name__)
+
+# sent to an engine to shut it down
+_STOP = None
+_MATCHMAKER_PREFIX = 'matchmaker.'
+# GameManager commands the engines run as they are; start_game, new_match and restore go through _EngineServer
+_MANAGER_COMMANDS = frozenset(('play', 'game_state', 'audit_game', 'export_games', 'remove_game', 'clean_games',
+                               'game_count', 'stats', 'snapshot'))
+_MATCHMAKER_COMMANDS = frozenset(('join', 'poll', 'leave', 'waiting_count', 'stats'))
+_DEFAULT_START_TIMEOUT = 60
+_STOP_TIMEOUT = 10
+
+
+def engine_addresses() -> list:
+    """
+    Returns the addresses of the engines from PAZAAK_ENGINES: a path (for a Unix socket) or a (host, port) pair each.
+    """
+    return [address if isinstance(address, str) else tuple(address)
+            for address in getattr(settings, 'PAZAAK_ENGINES', [])]
+
+
+def engine_authkey() -> bytes:
+    """
+    Returns PAZAAK_ENGINE_AUTHKEY, or a key derived from SECRET_KEY if it isn't set.
+    """
+    authkey = getattr(settings, 'PAZAAK_ENGINE_AUTHKEY', None)
+    if authkey is None:
+        return salted_hmac('pazaak.server.engine', 'authkey').digest()
+    return authkey.encode() if isinstance(authkey, str) else authkey
+
+
+class _Engine:
+    """
+    A web server process's handle on one engine: the connections to it not in use at the moment.
+    Every thread sending a command takes a connection of its own, opening one if none is idle.
+    """
+    def __init__(self, index: int, address, authkey: bytes):
+        self.index = index
+        self.address = address
+        self._authkey = authkey
+        self._idle = []
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+
+    def checkout(self) -> multiprocessing.connection.Connection:
+        with self._lock:
+            if self._pid != os.getpid():
+                # the connections were opened by the process this one was forked from, which still uses them
+                self._idle, self._pid = [], os.getpid()
+            if self._idle:
+                return self._idle.pop()
+        return multiprocessing.connection.Client(self.address, authkey=self._authkey)
+
+
+    def checkin(self, connection: multiprocessing.connection.Connection) -> None:
+        with self._lock:
+            if self._pid == os.getpid():
+                self._idle.append(connection)
+                return
+        connection.close()
+
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            connection.close()
+
+
+class EngineGameManager:
+    """
+    Serves the GameManager command API (start_game, new_match, play, game_state, audit_game, export_games, remove_game,
+    clean_games, game_count, stats, snapshot, restore) from the engines listening at `addresses`.
+    New games are started on the engines in turn, and get their IDs from them.
+    """
+    def __init__(self, addresses: list, authkey=None):
+        if not addresses:
+            raise ValueError('an engine game manager needs at least one engine')
+        authkey = engine_authkey() if authkey is None else authkey
+        self._engines = [_Engine(index, address, authkey) for index, address in enumerate(addresses)]
+        self._turns = itertools.count()
+
+
+    def start_game(self, difficulty=Difficulty.NORMAL, game_id=None) -> bytes:
+        """
+        Starts a game on the next engine, which picks its ID unless it's given.
+        """
+        engine = self._next_engine() if game_id is None else self._owner(game_id)
+        return self._send(engine, 'start_game', difficulty, game_id)
+
+
+    def new_match(self, game_id=None) -> (int, {Turn: str}):
+        engine = self._next_engine() if game_id is None else self._owner(game_id)
+        return self._send(engine, 'new_match', game_id)
+
+
+    def play(self, game_id: int, payload: dict) -> bytes:
+        return self._send(self._owner(game_id), 'play', game_id, payload)
+
+
+    def game_state(self, game_id: int, etags=()) -> (str, bytes or None):
+        return self._send(self._owner(game_id), 'game_state', game_id, tuple(etags))
+
+
+    def audit_game(self, game_id: int, after, limit: int) -> bytes:
+        return self._send(self._owner(game_id), 'audit_game', game_id, after, limit)
+
+
+    def export_games(self, after: int, limit: int) -> [(int, bytes)]:
+        """
+        Merges every engine's first `limit` finished games after `after` into one ID-ordered batch of at most `limit` games.
+        """
+        batches = [self._send(engine, 'export_games', after, limit) for engine in self._engines]
+        merged = heapq.merge(*batches, key=lambda exported: exported[0])
+        return list(itertools.islice(merged, limit))
+
+
+    def remove_game(self, game_id: int) -> None:
+        self._send(self._owner(game_id), 'remove_game', game_id)
+
+
+    def clean_games(self) -> None:
+        for engine in self._engines:
+            self._send(engine, 'clean_games')
+
+
+    def game_count(self) -> int:
+        return sum(self._send(engine, 'game_count') for engine in self._engines)
+
+
+    def stats(self) -> dict:
+        """
+        Returns the engines' GameManager.stats() added together.
+        """
+        result = {}
+        for engine in self._engines:
+            result = _add_stats(result, self._send(engine, 'stats'))
+        return result
+
+
+    def snapshot(self, path: pathlib.Path, only_if_changed=False) -> int or None:
+        """
+        Snapshots every engine into its own file, named after `path` (see engine_snapshot_path()).
+        Returns the number of games written, or None if no engine had to write anything.
+        """
+        counts = [self._send(engine, 'snapshot', engine_snapshot_path(path, engine.index), only_if_changed)
+                  for engine in self._engines]
+        written = [count for count in counts if count is not None]
+        return sum(written) if written else None
+
+
+    def restore(self, path: pathlib.Path) -> int:
+        """
+        Restores every engine from the file written by snapshot(). The number of engines must not have changed.
+        """
+        return max(self._send(engine, 'restore', engine_snapshot_path(path, engine.index)) for engine in self._engines)
+
+
+    def matchmaking(self, method: str, *args):
+        """
+        Runs a Matchmaker method on the matchmaker of the first engine.
+        """
+        return self._send(self._engines[0], _MATCHMAKER_PREFIX + method, *args)
+
+
+    def close(self) -> None:
+        """
+        Closes this process's connections to the engines. The engines, and their games, stay up.
+        """
+        for engine in self._engines:
+            engine.close()
+
+
+    def _next_engine(self) -> _Engine:
+        return self._engines[next(self._turns) % len(self._engines)]
+
+
+    def _owner(self, game_id: int) -> _Engine:
+        if isinstance(game_id, bool) or not isinstance(game_id, int):
+            raise ServerError('Unknown game received')
+        return self._engines[game_id % len(self._engines)]
+
+
+    @staticmethod
+    def _send(engine: _Engine, method: str, *args):
+        try:
+            connection = engine.checkout()
+        except (OSError, multiprocessing.AuthenticationError) as e:
+            raise ServerError('engine {0} is unavailable'.format(engine.index)) from e
+
+        try:
+            connection.send((method, args))
+            succeeded, result = connection.recv()
+        except (EOFError, OSError) as e:
+            connection.close()
+            raise ServerError('engine {0} is unavailable'.format(engine.index)) from e
+        engine.checkin(connection)
+
+        if not succeeded:
+            raise result
+        return result
+
+
+class EngineMatchmaker:
+    """
+    Serves the Matchmaker API (join, poll, leave, waiting_count, stats) from the matchmaker of the engines.
+    """
+    def __init__(self, engine_manager: EngineGameManager):
+        self._engine_manager = engine_manager
+
+
+    def join(self, rating: float) -> str:
+        return self._engine_manager.matchmaking('join', rating)
+
+
+    def poll(self, ticket_id: str) -> Match or None:
+        return self._engine_manager.matchmaking('poll', ticket_id)
+
+
+    def leave(self, ticket_id: str) -> None:
+        self._engine_manager.matchmaking('leave', ticket_id)
+
+
+    def waiting_count(self) -> int:
+        return self._engine_manager.matchmaking('waiting_count')
+
+
+    def stats(self) -> dict:
+        return self._engine_manager.matchmaking('stats')
+
+
+class EngineService:
+    """
+    Runs one engine process per address of `addresses`, each serving a manager built by `manager_factory`
+    (a picklable callable, as the engines are spawned), until stop().
+    """
+    def __init__(self, manager_factory, addresses: list, authkey=None):
+        if not addresses:
+            raise ValueError('an engine service needs at least one engine')
+        self._manager_factory = manager_factory
+        self._addresses = list(addresses)
+        self._authkey = engine_authkey() if authkey is None else authkey
+        self._processes = []
+
+
+    def start(self, timeout=_DEFAULT_START_TIMEOUT) -> None:
+        """
+        Starts the engines, and waits until every one of them is listening.
+        """
+        context = multiprocessing.get_context('spawn')
+        started = []
+        for index in range(len(self._addresses)):
+            ready = context.Event()
+            process = context.Process(target=_serve,
+                                      args=(index, self._addresses, self._authkey, self._manager_factory, ready),
+                                      name='pazaak-engine-{0}'.format(index),
+                                      daemon=True)
+            process.start()
+            started.append((process, ready))
+        self._processes = [process for process, _ in started]
+
+        deadline = time.monotonic() + timeout
+        for index, (process, ready) in enumerate(started):
+            if not ready.wait(max(deadline - time.monotonic(), 0)):
+                self.stop()
+                raise ServerError('engine {0} did not start listening at {1}'.format(index, self._addresses[index]))
+            logger.info('started Pazaak engine %s (pid %s) at %s', index, process.pid, self._addresses[index])
+
+
+    def stop(self) -> None:
+        """
+        Stops the engines, after they've closed their managers. Their games are lost, unless they were snapshotted.
+        """
+        processes, self._processes = self._processes, []
+        for address, process in zip(self._addresses, processes):
+            if not process.is_alive():
+                continue
+            try:
+                with multiprocessing.connection.Client(address, authkey=self._authkey) as connection:
+                    connection.send(_STOP)
+            except (OSError, multiprocessing.AuthenticationError):
+                pass
+
+        for process in processes:
+            process.join(_STOP_TIMEOUT)
+            if process.is_alive():
+                logger.warning('Pazaak engine %s did not stop, terminating it', process.name)
+                process.terminate()
+                process.join()
+
+
+    def is_alive(self) -> bool:
+        return bool(self._processes) and all(process.is_alive() for process in self._processes)
+
+
+class _EngineServer:
+    """
+    What an engine serves: its manager's commands, with the IDs of new games allocated by the engine,
+    and, on the first engine, the matchmaker's.
+    """
+    def __init__(self, manager, index: int, engines: int):
+        self.manager = manager
+        self.matchmaker = Matchmaker.from_settings(self.new_match) if index == 0 else None
+        self._index = index
+        self._engines = engines
+        self._next_id = index
+        self._id_lock = threading.Lock()
+
+
+    def new_id(self) -> int:
+        with self._id_lock:
+            result = self._next_id
+            self._next_id += self._engines
+        return result
+
+
+    def start_game(self, difficulty=Difficulty.NORMAL, game_id=None) -> bytes:
+        return self.manager.start_game(difficulty, self.new_id() if game_id is None else game_id)
+
+
+    def new_match(self, game_id=None) -> (int, {Turn: str}):
+        return self.manager.new_match(self.new_id() if game_id is None else game_id)
+
+
+    def restore(self, path: pathlib.Path) -> int:
+        """
+        Restores the manager, and skips the IDs up to the highest one restored.
+        """
+        max_id = self.manager.restore(path)
+        with self._id_lock:
+            while self._next_id <= max_id:
+                self._next_id += self._engines
+        return max_id
+
+
+    def run(self, method: str, args: tuple):
+        if method.startswith(_MATCHMAKER_PREFIX):
+            method = method[len(_MATCHMAKER_PREFIX):]
+            if self.matchmaker is None or method not in _MATCHMAKER_COMMANDS:
+                raise ServerError('engine {0} has no matchmaker command "{1}"'.format(self._index, method))
+            return getattr(self.matchmaker, method)(*args)
+        if method in ('start_game', 'new_match', 'restore'):
+            return getattr(self, method)(*args)
+        if method in _MANAGER_COMMANDS:
+            return getattr(self.manager, method)(*args)
+        raise ServerError('engine {0} has no command "{1}"'.format(self._index, method))
+
+
+def _add_stats(total: dict, stats: dict) -> dict:
+    """
+    Adds up two stats dictionaries, key by key (recursively for nested dictionaries). None stays None.
+    """
+    result = dict(total)
+    for key, value in stats.items():
+        if isinstance(value, dict) or (value is None and isinstance(result.get(key), dict)):
+            result[key] = _add_stats(result.get(key) or {}, value or {})
+        elif value is None or (key in result and result[key] is None):
+            result[key] = None
+        else:
+            result[key] = result.get(key, 0) + value
+    return result
+
+
+def engine_snapshot_path(path: pathlib.Path, index: int) -> pathlib.Path:
+    path = pathlib.Path(path)
+    return path.with_name('{0}.{1}'.format(path.name, index))
+
+
+def _serve(index: int, addresses: list, authkey: bytes, manager_factory, ready) -> None:
+    """
+    Engine process main: listens at its address, and serves every connection on a thread of its own,
+    until a connection sends _STOP.
+    """
+    import django
+    django.setup()
+    # Ctrl-C reaches the whole process group; the service stops the engines itself, once it's done with them
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    address = addresses[index]
+    if isinstance(address, str) and os.path.exists(address):
+        # left behind by an engine that didn't shut down cleanly
+        os.unlink(address)
+
+    server = _EngineServer(manager_factory(), index, len(addresses))
+    stopping = threading.Event()
+    listener = multiprocessing.connection.Listener(address, authkey=authkey)
+    threading.Thread(target=_accept, args=(listener, server, stopping), name='pazaak-engine-accept', daemon=True).start()
+    ready.set()
+    stopping.wait()
+
+    listener.close()
+    # engine processes exit without running atexit handlers, so let the manager and the logging queues wrap up here
+    server.manager.close()
+    from djdashboard import logs
+    logs.stop()
+
+
+def _accept(listener: multiprocessing.connection.Listener, server: _EngineServer, stopping: threading.Event) -> None:
+    while not stopping.is_set():
+        try:
+            connection = listener.accept()
+        except multiprocessing.AuthenticationError:
+            logger.warning('refused a connection to Pazaak engine: authentication failed')
+            continue
+        except OSError:
+            if not stopping.is_set():
+                logger.exception('Pazaak engine failed to accept a connection')
+            continue
+        threading.Thread(target=_handle, args=(connection, server, stopping), name='pazaak-engine-connection',
+                         daemon=True).start()
+
+
+def _handle(connection: multiprocessing.connection.Connection, server: _EngineServer, stopping: threading.Event) -> None:
+    """
+    Runs each (method, args) command received on `connection`, and replies with (True, result) or (False, exception).
+    """
+    with connection:
+        while True:
+            try:
+                command = connection.recv()
+            except (EOFError, OSError):
+                return
+            if command is _STOP:
+                stopping.set()
+                return
+
+            method, args = command
+            try:
+                reply = (True, server.run(method, args))
+            except Exception as e:
+                reply = (False, e)
+
+            try:
+                connection.send(reply)
+            except (pickle.PicklingError, TypeError, AttributeError) as e:
+                connection.send((False, ServerError('engine could not send the result of {0}: {1}'.format(method, e))))
+            except OSError:
+                return
+
+
+if __name__ == '__main__':
+    pass
@@ -1,115 +1,591 @@
 import abc
-
+import collections
+import contextlib
+import functools
+import heapq
+import hmac
+import itertools
+import json
+import pathlib
+import secrets
+import threading
+import time
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse
 from django.utils.decorators import method_decorator
 from django.views.generic.base import View
 from django.views.decorators.csrf import csrf_exempt
 
-from pazaak.server.users import UserAccount
+from pazaak.server import snapshots
+from pazaak.server.archive import GameArchiver, archive_record
+from pazaak.server.engine import EngineGameManager, EngineMatchmaker, engine_addresses
+from pazaak.server.matchmaking import Matchmaker
 from pazaak.server.url_tools import AutoParseableViewURL
-from pazaak.enums import Action, GameRule, GameStatus, Turn
+from pazaak.enums import Action, Difficulty, GameStatus, Turn
 from pazaak.game import cards
-from pazaak.errors import GameLogicError, GameOverError, ServerError
+from pazaak.game import mcts
+from pazaak.game.mcts import MonteCarloStrategy
+from pazaak.game.strategies import HeuristicStrategy, PazaakStrategy
+from pazaak.errors import CapacityError, GameLogicError, GameOverError, ServerError
 from pazaak.game.game import PazaakGame, PazaakCard
 from pazaak.bases import IntegerIdentifiable, serialize
+from pazaak.data_structures.decks import Shoe
 from pazaak.utilities.contracts import expects
 
 
-_MAX_MODIFIER = GameRule.MAX_MODIFIER.value
+_DEFAULT_MCTS_BUDGET_MS = 5
+_DEFAULT_GAME_MEMORY_LIMIT = 1024 * 1024
+_DEFAULT_LOCK_STRIPES = 64
+_DEFAULT_POOL_SIZE = 32
+
+# Rough memory costs (in bytes) used to estimate a game's footprint, measured with tracemalloc on CPython 3:
+# a freshly dealt game, and every Recordable history entry (see mcts.NODE_SIZE for the opponent's search nodes).
+_GAME_BASE_SIZE = 4096
+_HISTORY_ENTRY_SIZE = 288
+# Recordable history entries of both players by the end of a long game
+_LONG_GAME_HISTORY = 100
+
+# finished games exported per export_games() call
+EXPORT_BATCH_SIZE = 100
+# Recordable updates returned per audit_game() call, by default and at most
+AUDIT_PAGE_SIZE = 100
+MAX_AUDIT_PAGE_SIZE = 1000
+
+
+def _opponent_strategy(difficulty: Difficulty) -> PazaakStrategy:
+    """
+    Returns a new opponent strategy for the given difficulty level.
+    The hard opponent's per-move search budget is the PAZAAK_MCTS_BUDGET_MS setting, and its search table gets
+    what's left of the PAZAAK_GAME_MEMORY_LIMIT of a game once its Recordable histories are accounted for.
+    """
+    if difficulty == Difficulty.HARD:
+        budget_ms = getattr(settings, 'PAZAAK_MCTS_BUDGET_MS', _DEFAULT_MCTS_BUDGET_MS)
+        return MonteCarloStrategy(budget_ms=budget_ms, memory_budget=_search_memory_budget())
+    return HeuristicStrategy()
+
+
+def _search_memory_budget() -> int:
+    """
+    Returns the memory (in bytes) a game's search table may hold: the game's PAZAAK_GAME_MEMORY_LIMIT,
+    less the size of a game whose histories are as long as they get in a long game.
+    """
+    limit = getattr(settings, 'PAZAAK_GAME_MEMORY_LIMIT', _DEFAULT_GAME_MEMORY_LIMIT)
+    return max(limit - _GAME_BASE_SIZE - _HISTORY_ENTRY_SIZE * _LONG_GAME_HISTORY, 0)
+
+
+class RemotePlayerStrategy(PazaakStrategy):
+    """
+    Marks the opponent seat as played by a second human (see pazaak/server/matchmaking.py), so it never moves on its own.
+    Holds the secret token each seat's client has to send along with its moves.
+    """
+
+    def __init__(self, seat_tokens: {Turn: str}):
+        self._seat_tokens = dict(seat_tokens)
+
+    @property
+    def seat_tokens(self) -> {Turn: str}:
+        return dict(self._seat_tokens)
+
+    def authorize(self, seat: Turn, token: str) -> None:
+        expected = self._seat_tokens.get(seat)
+        if expected is None or not isinstance(token, str) or not hmac.compare_digest(expected, token):
+            raise ServerError('invalid seat token for the {0} seat'.format(seat.value))
+
+    def move(self, game: PazaakGame, player, other) -> PazaakCard:
+        raise GameLogicError('the opponent is a remote player, and moves on their own')
+
+
+def _initial_pool() -> [PazaakCard]:
+    return cards.random_cards(4, positive_only=False, bound=5)
+
+
+def _new_shoe() -> Shoe or None:
+    """
+    Returns the main deck new games draw from, if the PAZAAK_FINITE_SHOE setting is on.
+    """
+    return Shoe() if getattr(settings, 'PAZAAK_FINITE_SHOE', False) else None
+
+
+def _init_game(difficulty=Difficulty.NORMAL) -> PazaakGame:
+    return PazaakGame(_initial_pool(), opponent_strategy=_opponent_strategy(difficulty), shoe=_new_shoe())
 
-def _init_game() -> PazaakGame:
-    return PazaakGame(cards.random_cards(4, positive_only=False, bound=5))
+
+def estimate_game_size(game: PazaakGame) -> int:
+    """
+    Returns an estimate of the memory held by `game`, in bytes.
+    It's cheap enough to recompute after every move: the players' Recordable histories,
+    which grow with the length of the game, and the opponent's search table dominate the footprint.
+    """
+    history = game.player.diff_count() + game.opponent.diff_count()
+    search_nodes = getattr(game.opponent_strategy, 'table_size', 0)
+    return _GAME_BASE_SIZE + _HISTORY_ENTRY_SIZE * history + mcts.NODE_SIZE * search_nodes
 
 
 class GameManager(IntegerIdentifiable):
-    def __init__(self):
-        self._games = {}
+    """
+    Holds the games currently being played, keyed by ID. Safe to share between request threads:
+      * the games table itself is guarded by one lock, held only for the table operation.
+      * each game is guarded by one of `lock_stripes` striped locks (see lock()).
+        Requests for different games usually proceed in parallel, while requests for the same game are serialized.
+      * a game is marked in use while a request works on it (see checkout()), and games in use are neither evicted
+        nor recycled.
+
+    If `memory_budget` (in bytes) is given, the estimated size of all games (see estimate_game_size()), spare ones
+    included, is kept under it: starting a game that wouldn't fit first evicts the finished games, then drops spare games,
+    and only then evicts the least recently played games still going on -- skipping the games in use --
+    and raises CapacityError if that's still not enough.
+
+    Games that leave the manager are recycled (see PazaakGame.reset()) into a pool of up to `pool_size` spare games,
+    which is filled up front, so starting a game rarely has to build one from scratch.
+
+    Given an `archiver_factory` (such as GameArchiver.from_settings), every game that ends is archived to the database
+    by the GameArchiver it builds, in the background. The archiver is built on the first finished game.
+
+    The live games can be written to a snapshot file (see snapshot()), and restored from one after a restart (see restore()).
+
+    Views only go through the command methods -- start_game(), new_match(), play(), game_state(), export_games(), remove_game(),
+    clean_games(), game_count(), stats(), snapshot() and restore() -- whose arguments and results are plain, picklable values (responses are pre-encoded JSON bytes).
+    That lets EngineGameManager (see pazaak/server/engine.py) serve the same API from engine processes.
+    """
+    def __init__(self, lock_stripes=_DEFAULT_LOCK_STRIPES, memory_budget=None, pool_size=0, archiver_factory=None):
+        # ordered from least to most recently played
+        self._games = collections.OrderedDict()
+        self._sizes = {}
+        # bumped every time a game is played, to tell clients whether their copy is stale
+        self._versions = {}
+        self._memory_usage = 0
+        self._memory_budget = memory_budget
+        self._evictions = 0
+        self._games_lock = threading.Lock()
+        self._stripes = tuple(threading.RLock() for _ in range(lock_stripes))
+        # game ID -> number of checkouts of the game in progress
+        self._in_use = collections.Counter()
+        # spare games and their sizes, oldest first, counted in the memory usage
+        self._pool = collections.deque()
+        self._pool_size = pool_size
+        for _ in range(pool_size):
+            self._recycle(_init_game())
+        # games restored from a snapshot are loaded on first access; `_taken` are the IDs already loaded (or removed)
+        self._snapshot = None
+        self._taken = set()
+        # counts changes to the games table and to games, so that unchanged games aren't snapshotted again
+        self._changes = 0
+        self._snapshotted_changes = 0
+        # start times of the games, and the games already archived
+        self._started = {}
+        self._archived = set()
+        self._archiver_factory = archiver_factory
+        self._archiver = None
+
+
+    def lock(self, game_id: int) -> threading.RLock:
+        """
+        Returns the lock guarding game_id. The lock is shared with other games; to work on a game, use checkout().
+        """
+        return self._stripes[hash(game_id) % len(self._stripes)]
+
+
+    @contextlib.contextmanager
+    def checkout(self, game_id: int, missing_ok=False) -> PazaakGame:
+        """
+        Holds the game's lock and marks the game in use for the duration of the block, which gets the game:
+
+            with game_manager.checkout(game_id) as game:
+                ...
+
+        Raises ServerError if there's no such game, or gives None instead if `missing_ok`.
+        """
+        with self.lock(game_id):
+            self._ensure_loaded(game_id)
+            with self._games_lock:
+                game = self._games.get(game_id)
+                if game is not None:
+                    self._in_use[game_id] += 1
+            if game is None and not missing_ok:
+                raise ServerError('Unknown game received')
+
+            try:
+                yield game
+            finally:
+                if game is not None:
+                    with self._games_lock:
+                        self._in_use[game_id] -= 1
+                        if not self._in_use[game_id]:
+                            del self._in_use[game_id]
+
+
+    def new_game(self, difficulty=Difficulty.NORMAL, game_id=None) -> int:
+        """
+        Starts a new game and returns its ID. An engine process is handed the ID to use.
+        """
+        return self._add_game(self._deal(_opponent_strategy(difficulty)), game_id)
 
 
-    def new_game(self) -> int:
-        game_id = self.new_id()
-        game = _init_game()
-        self._games[game_id] = game
+    def new_match(self, game_id=None) -> (int, {Turn: str}):
+        """
+        Starts a game between two human players, whose clients drive their seat through the usual endpoints
+        by sending their "seat" and its "seatToken" with every move.
+        Returns the game ID and the secret token of each seat.
+        """
+        seat_tokens = {seat: secrets.token_urlsafe(16) for seat in (Turn.PLAYER, Turn.OPPONENT)}
+        game_id = self._add_game(self._deal(RemotePlayerStrategy(seat_tokens)), game_id)
+        return game_id, seat_tokens
+
+
+    def _add_game(self, game: PazaakGame, game_id=None) -> int:
+        if game_id is None:
+            game_id = self.new_id()
+        size = estimate_game_size(game)
+        with self._games_lock:
+            self._make_room(size)
+            self._games[game_id] = game
+            self._versions[game_id] = 0
+            self._started[game_id] = time.time()
+            self._resize(game_id, size)
+            self._changes += 1
         return game_id
 
 
-    @expects(lambda self, game_id: game_id in self._games,
+    @expects(lambda self, game_id: self._ensure_loaded(game_id),
              exception=ServerError,
              message='Unknown game received')
     def get_game(self, game_id: int) -> PazaakGame:
         return self._games[game_id]
 
 
+    def export_games(self, after=-1, limit=EXPORT_BATCH_SIZE) -> [(int, bytes)]:
+        """
+        Returns up to `limit` finished games with an ID greater than `after`, in ID order,
+        as (game ID, encoded NDJSON line) pairs. The last ID returned is the cursor to resume from.
+        See export_record() for the content of a line. Restored games that haven't been loaded yet aren't exported.
+        """
+        with self._games_lock:
+            game_ids = heapq.nsmallest(limit, (game_id for game_id, game in self._games.items()
+                                               if game_id > after and game.is_over))
+
+        result = []
+        for game_id in game_ids:
+            with self.checkout(game_id, missing_ok=True) as game:
+                if game is not None:
+                    result.append((game_id, _encode(export_record(game_id, game)) + b'\n'))
+        return result
+
+
     def remove_game(self, game_id: int) -> None:
-        if game_id in self._games:
-            del self._games[game_id]
+        with self._games_lock:
+            self._discard(game_id)
 
 
     def clean_games(self) -> None:
-        games_to_remove = (game_id for game_id, game in self._games.items() if game.is_over)
-        for game_id in games_to_remove:
-            self.remove_game(game_id)
+        with self._games_lock:
+            games_to_remove = [game_id for game_id, game in self._games.items() if game.is_over]
+            for game_id in games_to_remove:
+                self._discard(game_id)
 
 
     def game_count(self) -> int:
-        return len(self._games)
-
+        return len(self._games) + self._unloaded_count()
 
-class PazaakGameView(View, AutoParseableViewURL, metaclass=abc.ABCMeta):
-    """
-    Intermediate class encapsulating common data for each View endpoint (in views.py).
-    To support simultaneous games, PazaakGameView stores a static collection of all currently-ongoing games.
-    Starting a new game generates a unique ID, which is persisted throughout all web requests made by the client.
-    Upon receiving a request, the server verifies that the ID is valid, then retrieves the game mapped to that ID.
-    One notable thing about this implementation is that separate browser tabs will have separate game instances.
 
-    Each View must be derived from PazaakGameView to maintain state.
-    """
-    PLAYER_TAG = 'player'
-    OPPONENT_TAG = 'opponent'
-    game_manager = GameManager()
+    def stats(self) -> dict:
+        """
+        Returns the number of games, their estimated memory usage (spare games included) and budget (in bytes),
+        and how many were evicted.
+        """
+        with self._games_lock:
+            return {
+                'games': len(self._games) + self._unloaded_count(),
+                'memoryUsage': self._memory_usage,
+                'memoryBudget': self._memory_budget,
+                'evictions': self._evictions,
+                'pooledGames': len(self._pool),
+                'archive': None if self._archiver is None else self._archiver.stats(),
+            }
+
+
+    def snapshot(self, path: pathlib.Path, only_if_changed=False) -> int or None:
+        """
+        Atomically writes every game, including restored games that haven't been loaded yet, to the snapshot file `path`.
+        Each game is copied with its lock held, so the snapshot never holds a half-played turn.
+        Returns the number of games written, or None if `only_if_changed` and nothing changed since the last snapshot
+        (or restore) -- so that a process that never served a game doesn't overwrite the snapshot of one that did.
+        """
+        with self._games_lock:
+            if only_if_changed and self._changes == self._snapshotted_changes:
+                return None
+            changes = self._changes
+            game_ids = sorted(self._games)
+            snapshot = self._snapshot
+            taken = set(self._taken)
+
+        unloaded = ((game_id, record) for game_id, record in (snapshot or ()) if game_id not in taken)
+        loaded = (item for item in map(self._snapshot_record, game_ids) if item is not None)
+        count = snapshots.write_snapshot(path, heapq.merge(loaded, unloaded, key=lambda item: item[0]))
+        with self._games_lock:
+            self._snapshotted_changes = max(self._snapshotted_changes, changes)
+        return count
+
+
+    def close(self) -> None:
+        """
+        Writes out the games still waiting to be archived.
+        """
+        if self._archiver is not None:
+            self._archiver.close()
 
 
-    @method_decorator(csrf_exempt)
-    def dispatch(self, request, *args, **kwargs):
+    def restore(self, path: pathlib.Path) -> int:
         """
-        The sole purpose of this override is to remove all CSRF requirements on requests.
-        This may not be suitable if Pazaak is ever used in a production environment.
+        Makes the games of the snapshot file `path` available, each to be loaded on its first access,
+        so restoring takes the same time however many games there are. Meant to be called once, at startup.
+        New games get IDs above the restored ones. Returns the highest restored ID, or -1 if nothing was restored.
+        """
+        path = pathlib.Path(path)
+        if not path.exists():
+            return -1
+
+        snapshot = snapshots.Snapshot(path)
+        with self._games_lock:
+            if self._snapshot is not None:
+                self._snapshot.close()
+            self._snapshot = snapshot
+            self._taken = set()
+            self._snapshotted_changes = self._changes
+        self.advance_id(snapshot.max_id + 1)
+        return snapshot.max_id
+
+
+    def start_game(self, difficulty=Difficulty.NORMAL, game_id=None) -> bytes:
         """
-        return super().dispatch(request, *args, **kwargs)
+        Starts a new game and returns the encoded response for the client, including the new "gameId".
+        """
+        game_id = self.new_game(difficulty, game_id=game_id)
+        with self.checkout(game_id) as game:
+            context = game.json()
+        context['gameId'] = game_id
+        return _encode(context)
 
 
-    def process_post(self, payload: dict) -> dict:
+    def play(self, game_id: int, payload: dict) -> bytes:
         """
-        Entry point for all View requests.
-        The payload should always contain 2 things:
-          1) the unique game ID.
-          2) the action being taken.
-
-        Based on the action, updates the state of the game and returns the relevant JSON response as a dictionary.
+        Applies the client's action in `payload` to the game, and returns the encoded response.
+        Requests for the same game are processed one at a time.
         """
-        game = self._get_game_from_payload(payload)
-        context = self._process_player_move(game, payload)
-        content = game.json()
+        with self.checkout(game_id) as game:
+            try:
+                context = self._process_player_move(game, payload)
+                content = game.json()
+            finally:
+                self._played(game_id, game)
+
         turn = context['turn']['justWent']['value']
         if turn not in content:
             raise GameLogicError('expected turn to be one of ("player", "opponent")')
 
         context.update(content[turn])
-        return context
+        return _encode(context)
+
+
+    def game_state(self, game_id: int, etags=()) -> (str, bytes or None):
+        """
+        Returns the ETag of the game's current state, along with the encoded game.
+        If the ETag is one of `etags` (the client already has this state), the game isn't serialized and None is returned instead.
+        """
+        etag = self._etag(game_id)
+        if etag in etags or '*' in etags:
+            return etag, None
+
+        with self.checkout(game_id) as game:
+            # the game may have been played since the ETag was taken
+            etag = self._etag(game_id)
+            context = game.json()
+        context['gameId'] = game_id
+        return etag, _encode(context)
+
+
+    def audit_game(self, game_id: int, after=None, limit=AUDIT_PAGE_SIZE) -> bytes:
+        """
+        Returns one encoded page of the game's audit trail (see audit_page()), starting after the cursor `after`.
+        """
+        with self.checkout(game_id) as game:
+            return _encode(audit_page(game_id, game, after, limit))
+
+
+    def _played(self, game_id: int, game: PazaakGame) -> None:
+        """
+        Marks the game as the most recently played, and updates its estimated size.
+        Hands the game to the archiver the first time it's seen over. Must be called with the game checked out.
+        """
+        size = estimate_game_size(game)
+        with self._games_lock:
+            if game_id not in self._games:
+                return
+            self._games.move_to_end(game_id)
+            self._versions[game_id] += 1
+            self._resize(game_id, size)
+            self._changes += 1
+            archive = self._archiver_factory is not None and game.is_over and game_id not in self._archived
+            if archive:
+                self._archived.add(game_id)
+                if self._archiver is None:
+                    self._archiver = self._archiver_factory()
+
+        if archive:
+            self._archiver.submit(archive_record(game_id, game, self._started.get(game_id)))
+
+
+    def _etag(self, game_id: int) -> str:
+        self._ensure_loaded(game_id)
+        with self._games_lock:
+            if game_id not in self._versions:
+                raise ServerError('Unknown game received')
+            return '"{0}-{1}"'.format(game_id, self._versions[game_id])
+
+
+    def _make_room(self, size: int) -> None:
+        """
+        Frees memory until `size` more bytes fit in the memory budget: evicts the finished games first,
+        then drops spare games, and only then evicts the games still going on, least recently played first.
+        Must be called with the games lock held.
+        """
+        if self._fits(size):
+            return
+
+        self._evict([game_id for game_id, game in self._games.items() if game.is_over], size)
+        while self._pool and not self._fits(size):
+            _, pooled_size = self._pool.popleft()
+            self._memory_usage -= pooled_size
+        self._evict(list(self._games), size)
+
+        if not self._fits(size):
+            raise CapacityError('no room for the game: {0} of {1} bytes in use'.format(self._memory_usage, self._memory_budget))
+
+
+    def _evict(self, game_ids: [int], size: int) -> None:
+        """
+        Evicts the games of `game_ids` that aren't in use, in order, until `size` more bytes fit in the memory budget.
+        Must be called with the games lock held.
+        """
+        for game_id in game_ids:
+            if self._fits(size):
+                return
+            if game_id in self._in_use:
+                continue
+            # recycling the game would hold on to the memory being freed
+            self._discard(game_id, recycle=False)
+            self._evictions += 1
+
+
+    def _fits(self, size: int) -> bool:
+        return self._memory_budget is None or self._memory_usage + size <= self._memory_budget
+
+
+    def _ensure_loaded(self, game_id: int) -> bool:
+        """
+        Returns whether the game exists, loading it from the restored snapshot if it hasn't been yet.
+        A loaded game has to fit in the memory budget like a new one: raises CapacityError if there's no room for it,
+        and leaves it in the snapshot for later.
+        """
+        if game_id in self._games:
+            return True
+        if self._snapshot is None:
+            return False
+
+        with self._games_lock:
+            if game_id in self._games:
+                return True
+            if game_id in self._taken:
+                return False
+            game = self._snapshot.load(game_id)
+            if game is None:
+                return False
+
+            size = estimate_game_size(game)
+            self._make_room(size)
+            self._taken.add(game_id)
+            self._games[game_id] = game
+            self._versions[game_id] = 0
+            self._resize(game_id, size)
+        return True
+
+
+    def _snapshot_record(self, game_id: int) -> (int, bytes) or None:
+        with self.checkout(game_id, missing_ok=True) as game:
+            return None if game is None else (game_id, snapshots.encode_game(game))
+
+
+    def _unloaded_count(self) -> int:
+        return 0 if self._snapshot is None else len(self._snapshot) - len(self._taken)
+
+
+    def _deal(self, opponent_strategy: PazaakStrategy) -> PazaakGame:
+        """
+        Returns a new game, recycling a pooled one if there's any.
+        """
+        with self._games_lock:
+            game, size = self._pool.pop() if self._pool else (None, 0)
+            self._memory_usage -= size
+        if game is None:
+            return PazaakGame(_initial_pool(), opponent_strategy=opponent_strategy, shoe=_new_shoe())
+        game.reset(_initial_pool(), opponent_strategy=opponent_strategy)
+        return game
+
+
+    def _resize(self, game_id: int, size: int) -> None:
+        self._memory_usage += size - self._sizes.get(game_id, 0)
+        self._sizes[game_id] = size
+
+
+    def _discard(self, game_id: int, recycle=True) -> None:
+        """
+        Removes the game, and pools it if `recycle` and nobody is using it. Must be called with the games lock held.
+        """
+        game = self._games.pop(game_id, None)
+        self._changes += 1
+        self._versions.pop(game_id, None)
+        self._started.pop(game_id, None)
+        self._archived.discard(game_id)
+        self._memory_usage -= self._sizes.pop(game_id, 0)
+        if self._snapshot is not None and game_id in self._snapshot:
+            # removed games must not come back from the snapshot
+            self._taken.add(game_id)
+        # once out of the table, the game can't be checked out anymore: if nobody has it, nobody will
+        if game is not None and recycle and self._pool_size and game_id not in self._in_use:
+            self._recycle(game)
+
+
+    def _recycle(self, game: PazaakGame) -> None:
+        """
+        Pools the game, dropping the oldest spare game if the pool is full. Must be called with the games lock held.
+        """
+        if len(self._pool) >= self._pool_size:
+            _, dropped_size = self._pool.popleft()
+            self._memory_usage -= dropped_size
+        size = estimate_game_size(game)
+        self._pool.append((game, size))
+        self._memory_usage += size
 
 
     @expects(lambda self, game, payload: Action.ACTION.value in payload,
              exception=GameLogicError,
              message='did not receive "action" from payload')
     def _process_player_move(self, game: PazaakGame, payload: dict) -> dict:
+        """
+        The "player" actions are taken by the client's seat: the player's, unless the game is between two humans
+        and the payload says otherwise (see new_match()).
+        """
         action = payload['action']
         action = action.strip().lower()
+        seat = self._get_seat(game, payload)
+        human = game.player if seat == Turn.PLAYER else game.opponent
         turn = None
         move = PazaakCard.empty()
 
         # player ends turn - the opponent makes a move now
         if action == Action.END_TURN_PLAYER.value:
-            turn = Turn.PLAYER
+            turn = seat
 
         # opponent ends turn - the player makes a move now
         elif action == Action.END_TURN_OPPONENT.value:
@@ -118,36 +594,57 @@ class PazaakGameView(View, AutoParseableViewURL, metaclass=abc.ABCMeta):
         elif action == Action.HAND_PLAYER.value:
             card_index = payload['cardIndex']
             assert type(card_index) is int
-            move = game.choose_from_hand(game.player, card_index)
-            turn = Turn.PLAYER
+            move = game.choose_from_hand(human, card_index)
+            turn = seat
 
         elif action == Action.STAND_PLAYER.value:
-            game.player.stand()
-            turn = Turn.PLAYER
+            human.stand()
+            turn = seat
 
         else:
             raise GameLogicError('invalid action "{0}" received from client'.format(action))
 
-        return self._next_move(game, turn, move=move)
+        return self._next_move(game, turn, move=move, human=turn == seat)
 
 
-    def _next_move(self, game: PazaakGame, turn: Turn, move: PazaakCard) -> dict:
+    @staticmethod
+    def _get_seat(game: PazaakGame, payload: dict) -> Turn:
+        """
+        Returns the seat the client plays, after checking that it may play it now.
+        """
+        try:
+            seat = Turn(payload.get('seat', Turn.PLAYER.value))
+        except ValueError:
+            raise GameLogicError('invalid seat "{0}" received from client'.format(payload.get('seat')))
+        strategy = game.opponent_strategy
+        if not isinstance(strategy, RemotePlayerStrategy):
+            if seat != Turn.PLAYER:
+                raise GameLogicError('only the player seat can be played against the computer')
+            return seat
+
+        strategy.authorize(seat, payload.get('seatToken'))
+        if game.turn != seat and not game.is_over:
+            raise GameLogicError('it is not the {0} seat\'s turn'.format(seat.value))
+        return seat
+
+
+    def _next_move(self, game: PazaakGame, turn: Turn, move: PazaakCard, human=True) -> dict:
         player = None
 
-        if turn == Turn.PLAYER:
-            player = game.player
-            if game.player.is_standing:
+        if turn not in (Turn.PLAYER, Turn.OPPONENT):
+            raise GameLogicError('invalid turn "{0}" received'.format(turn))
+
+        elif human:
+            player = game.player if turn == Turn.PLAYER else game.opponent
+            if player.is_standing:
                 move = PazaakCard.empty()
             elif not move:
-                move = cards.random_card(positive_only=True, bound=_MAX_MODIFIER)
+                move = game.draw_card()
 
-        elif turn == Turn.OPPONENT:
+        else:
             player = game.opponent
             move = game._get_opponent_move()
 
-        else:
-            raise GameLogicError('invalid turn "{0}" received'.format(turn))
-
         context = {
             'status': GameStatus.GAME_ON.value,   # TODO fix in serialize()
             'move': move,
@@ -164,10 +661,147 @@ class PazaakGameView(View, AutoParseableViewURL, metaclass=abc.ABCMeta):
         return serialize(context)
 
 
-    @classmethod
-    def _get_game_from_payload(cls, payload: dict) -> PazaakGame:
+def export_record(game_id: int, game: PazaakGame) -> dict:
+    """
+    Returns the exported form of a game: its ID and final status, and for each side,
+    the side's state along with its Recordable timeline (oldest update first).
+    """
+    record = game.json()
+    record['gameId'] = game_id
+    record['status'] = serialize(game.status)
+    for turn, player in ((Turn.PLAYER, game.player), (Turn.OPPONENT, game.opponent)):
+        record[turn.value]['timeline'] = [{
+            'attribute': update.attribute,
+            'value': update.value,
+            'time': update.time_of_update.isoformat(),
+        } for update in player.timeline(descending=False)]
+    return record
+
+
+def audit_page(game_id: int, game: PazaakGame, after=None, limit=AUDIT_PAGE_SIZE) -> dict:
+    """
+    Returns the first `limit` updates of the Recordable histories of the game and both players past the cursor `after`
+    (a (time, sequence) pair, see UpdateHistory.cursor), oldest first, along with how many updates every attribute has had.
+    "next" is the cursor to pass for the next page, or None on the last page.
+    Only the updates of the page are looked at and serialized.
+    """
+    limit = max(1, min(limit, MAX_AUDIT_PAGE_SIZE))
+    sources = (('game', game), (Turn.PLAYER.value, game.player), (Turn.OPPONENT.value, game.opponent))
+    streams = [zip(itertools.repeat(source), recordable.updates(after)) for source, recordable in sources]
+    merged = heapq.merge(*streams, key=lambda sourced: sourced[1].cursor)
+    page = list(itertools.islice(merged, limit + 1))
+
+    updates = [{
+        'source': source,
+        'attribute': update.attribute,
+        'value': update.value,
+        'time': update.time_of_update.isoformat(),
+        'sequence': update.sequence,
+    } for source, update in page[:limit]]
+
+    next_cursor = None
+    if len(page) > limit:
+        last = page[limit - 1][1]
+        next_cursor = {'time': last.time_of_update.isoformat(), 'sequence': last.sequence}
+
+    return {
+        'gameId': game_id,
+        'counts': {source: {attribute: len(records) for attribute, records in recordable.report().items()}
+                   for source, recordable in sources},
+        'updates': updates,
+        'next': next_cursor,
+    }
+
+
+def _encode(context: dict) -> bytes:
+    return json.dumps(context, cls=DjangoJSONEncoder).encode()
+
+
+def game_manager_factory(engines=0):
+    """
+    Returns a callable building the GameManager of the views, or of every engine when there are `engines` engines
+    (see pazaak/server/engine.py). PAZAAK_GAME_MEMORY_BUDGET optionally caps the estimated memory used by the games,
+    in bytes, and is shared equally between the engines; PAZAAK_GAME_POOL_SIZE sets the number of spare games each
+    manager keeps, and PAZAAK_ARCHIVE_GAMES turns on archiving finished games to the database.
+    """
+    memory_budget = getattr(settings, 'PAZAAK_GAME_MEMORY_BUDGET', None)
+    if memory_budget is not None and engines:
+        memory_budget //= engines
+    pool_size = getattr(settings, 'PAZAAK_GAME_POOL_SIZE', _DEFAULT_POOL_SIZE)
+    archiver_factory = GameArchiver.from_settings if getattr(settings, 'PAZAAK_ARCHIVE_GAMES', False) else None
+    return functools.partial(GameManager, memory_budget=memory_budget, pool_size=pool_size,
+                             archiver_factory=archiver_factory)
+
+
+def _game_manager() -> GameManager or EngineGameManager:
+    """
+    Returns the manager shared by all views: an in-process GameManager by default,
+    or an EngineGameManager reaching the engines at the PAZAAK_ENGINES addresses.
+    """
+    addresses = engine_addresses()
+    if addresses:
+        return EngineGameManager(addresses)
+    return game_manager_factory()()
+
+
+def _matchmaker(game_manager: GameManager or EngineGameManager) -> Matchmaker or EngineMatchmaker:
+    if isinstance(game_manager, EngineGameManager):
+        return EngineMatchmaker(game_manager)
+    return Matchmaker.from_settings(game_manager.new_match)
+
+
+class PazaakGameView(View, AutoParseableViewURL, metaclass=abc.ABCMeta):
+    """
+    Intermediate class encapsulating common data for each View endpoint (in views.py).
+    To support simultaneous games, PazaakGameView stores a static collection of all currently-ongoing games.
+    Starting a new game generates a unique ID, which is persisted throughout all web requests made by the client.
+    Upon receiving a request, the server verifies that the ID is valid, then retrieves the game mapped to that ID.
+    One notable thing about this implementation is that separate browser tabs will have separate game instances.
+
+    Each View must be derived from PazaakGameView to maintain state.
+    With the PAZAAK_ENGINES setting, the games live in engine processes shared by every server process instead,
+    and so do the players waiting for a player-vs-player game (see pazaak/server/engine.py).
+    """
+    PLAYER_TAG = 'player'
+    OPPONENT_TAG = 'opponent'
+    game_manager = _game_manager()
+    matchmaker = _matchmaker(game_manager)
+
+
+    @method_decorator(csrf_exempt)
+    def dispatch(self, request, *args, **kwargs):
+        """
+        Removes all CSRF requirements on requests.
+        This may not be suitable if Pazaak is ever used in a production environment.
+        Also answers 503 when there's no room for a game the request needs (e.g. one still to load from the snapshot),
+        as the new game endpoints do: the client should try again later.
+        """
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        except CapacityError as e:
+            return JsonResponse({'error': str(e)}, status=503)
+
+
+    def process_post(self, payload: dict) -> bytes:
+        """
+        Entry point for all View requests.
+        The payload should always contain 2 things:
+          1) the unique game ID.
+          2) the action being taken.
+
+        Based on the action, updates the state of the game and returns the relevant JSON response, already encoded.
+        """
+        game_id = self._get_game_id_from_payload(payload)
+        return self.game_manager.play(game_id, payload)
+
+
+    @staticmethod
+    def _get_game_id_from_payload(payload: dict) -> int:
         key = 'gameId'
         if key not in payload:
             raise ValueError('Front-end did not send up a game ID')
-        game_id = payload[key]
-        return cls.game_manager.get_game(game_id)
\ No newline at end of file
+        return payload[key]
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,351 @@
+# Load testing: virtual clients playing full Pazaak games against the API (see `manage.py loadtest`).
+#
+# Every virtual client runs on its own thread and plays games the way the React client does:
+# it starts a game, then takes one of its own actions (end its turn, play a hand card, or stand -- picked at random
+# according to the behavior mix), has the opponent take its turn, and so on until the game is over.
+#
+# Clients either talk to the app in-process, through Django's test client (the whole middleware and view stack,
+# without a network), or to a running server over HTTP, with one keep-alive connection each.
+# Every request is timed per endpoint; the report gives the throughput, latency percentiles, error rates,
+# and how much memory the server grew by: the server's estimate of the memory held by its games (from its admin-only
+# stats endpoint), and for in-process runs the RSS of the process as well. A remote server's RSS isn't measured.
+# Measure remote latencies behind the production WSGI server rather than runserver: runserver writes the headers and
+# the body of a response separately, which on a keep-alive connection adds a delayed-ACK wait (~40 ms) to every request.
+# A remote server also applies its PAZAAK_THROTTLE_RATES, and all clients of one machine share its address.
+import collections
+import http.client
+import json
+import math
+import os
+import random
+import threading
+import time
+import urllib.parse
+
+from pazaak.enums import Action, Difficulty, GameStatus
+
+
+_DEFAULT_MIX = {'end-turn': 70, 'hand-card': 15, 'stand': 15}
+# every action places a card or stands, so a game can't last longer than this many player actions
+_MAX_TURNS = 64
+_PERCENTILES = (50, 95, 99)
+
+# behavior -> (endpoint, action)
+_BEHAVIORS = {
+    'end-turn': ('end-turn', Action.END_TURN_PLAYER),
+    'hand-card': ('select-hand-card', Action.HAND_PLAYER),
+    'stand': ('stand', Action.STAND_PLAYER),
+}
+
+
+def parse_mix(mix: str) -> {str: float}:
+    """
+    Parses a behavior mix such as "end-turn=70,hand-card=15,stand=15" into relative weights.
+    """
+    weights = {}
+    for part in mix.split(','):
+        behavior, _, weight = part.partition('=')
+        behavior = behavior.strip()
+        if behavior not in _BEHAVIORS:
+            raise ValueError('unknown behavior "{0}" (expected one of {1})'.format(behavior, ', '.join(_BEHAVIORS)))
+        weights[behavior] = float(weight)
+    if not any(weight > 0 for weight in weights.values()):
+        raise ValueError('the behavior mix needs a positive weight')
+    return weights
+
+
+
+class InProcessTransport:
+    """
+    Sends requests through Django's test client, so the app runs in this process and no network is involved.
+    Every transport gets its own client address, so that clients are throttled separately.
+    Requests carry `token` as a bearer token, if given, for the admin endpoints.
+    """
+    def __init__(self, index: int, prefix='/pazaak/api', token=None):
+        from django.test import Client
+
+        headers = {} if token is None else {'HTTP_AUTHORIZATION': 'Bearer ' + token}
+        self._client = Client(REMOTE_ADDR='10.{0}.{1}.{2}'.format(index >> 16 & 255, index >> 8 & 255, index & 255),
+                              **headers)
+        self._prefix = prefix.rstrip('/')
+
+    def request(self, method: str, endpoint: str, payload=None) -> (int, dict or None):
+        path = '{0}/{1}/'.format(self._prefix, endpoint)
+        if method == 'GET':
+            response = self._client.get(path)
+        else:
+            response = self._client.post(path, data=json.dumps(payload), content_type='application/json')
+        return response.status_code, _decode(response.content)
+
+    def close(self) -> None:
+        pass
+
+
+
+class HttpTransport:
+    """
+    Sends requests to a running server, over one keep-alive connection.
+    Requests carry `token` as a bearer token, if given, for the admin endpoints.
+    """
+    def __init__(self, index: int, base_url: str, timeout=30, token=None):
+        url = urllib.parse.urlsplit(base_url)
+        connection_type = http.client.HTTPSConnection if url.scheme == 'https' else http.client.HTTPConnection
+        self._connection = connection_type(url.netloc, timeout=timeout)
+        self._prefix = url.path.rstrip('/')
+        self._headers = {} if token is None else {'Authorization': 'Bearer ' + token}
+
+    def request(self, method: str, endpoint: str, payload=None) -> (int, dict or None):
+        path = '{0}/{1}/'.format(self._prefix, endpoint)
+        body = None if payload is None else json.dumps(payload).encode()
+        headers = dict(self._headers)
+        if body is not None:
+            headers['Content-Type'] = 'application/json'
+        try:
+            self._connection.request(method, path, body=body, headers=headers)
+            response = self._connection.getresponse()
+            return response.status, _decode(response.read())
+        except (http.client.HTTPException, OSError):
+            # start over on a new connection next time
+            self._connection.close()
+            raise
+
+    def close(self) -> None:
+        self._connection.close()
+
+
+
+class LoadStats:
+    """
+    Latencies and outcomes of the requests made by all virtual clients, per endpoint. Thread-safe.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latencies = collections.defaultdict(list)
+        self._errors = collections.Counter()
+        self._rejected = collections.Counter()
+        self._games = 0
+
+    def add(self, endpoint: str, seconds: float, status: int or None) -> None:
+        with self._lock:
+            self._latencies[endpoint].append(seconds)
+            if status == 429:
+                self._rejected[endpoint] += 1
+            elif status is None or status >= 400:
+                self._errors[endpoint] += 1
+
+    def add_game(self) -> None:
+        with self._lock:
+            self._games += 1
+
+    @property
+    def games(self) -> int:
+        return self._games
+
+    def endpoints(self) -> {str: dict}:
+        """
+        Returns, for every endpoint, its number of requests, errors and throttled (429) requests,
+        and its latency percentiles in milliseconds.
+        """
+        with self._lock:
+            latencies = {endpoint: sorted(values) for endpoint, values in self._latencies.items()}
+            errors = dict(self._errors)
+            rejected = dict(self._rejected)
+
+        result = {}
+        for endpoint, values in sorted(latencies.items()):
+            result[endpoint] = {
+                'requests': len(values),
+                'errors': errors.get(endpoint, 0),
+                'rejected': rejected.get(endpoint, 0),
+            }
+            for percentile in _PERCENTILES:
+                result[endpoint]['p{0}'.format(percentile)] = _percentile(values, percentile) * 1000
+        return result
+
+
+
+class VirtualClient:
+    """
+    Plays games through a transport, picking its actions from the behavior `mix`.
+    """
+    def __init__(self, transport, stats: LoadStats, mix=_DEFAULT_MIX, difficulty=Difficulty.NORMAL, rng=None):
+        self._transport = transport
+        self._stats = stats
+        self._behaviors = list(mix)
+        self._weights = [mix[behavior] for behavior in self._behaviors]
+        self._difficulty = difficulty
+        self._random = rng or random.Random()
+        self._game_id = None
+
+    def play_game(self) -> bool:
+        """
+        Plays one game to its end. Returns False if the game had to be given up because of an error.
+        """
+        payload = {'difficulty': self._difficulty.value}
+        if self._game_id is not None:
+            # like the React client, hand the finished game back when starting the next one
+            payload['gameId'] = self._game_id
+        status, context = self._request('POST', 'new-game', payload)
+        if status != 200:
+            self._game_id = None
+            return False
+
+        self._game_id = context['gameId']
+        hand_size = len(context['player']['hand'])
+        for _ in range(_MAX_TURNS):
+            behavior = self._choose(hand_size)
+            endpoint, action = _BEHAVIORS[behavior]
+            payload = {'gameId': self._game_id, 'action': action.value}
+            if action == Action.HAND_PLAYER:
+                payload['cardIndex'] = self._random.randrange(hand_size)
+            status, context = self._request('POST', endpoint, payload)
+            if status != 200:
+                return False
+            hand_size = len(context['hand']) if 'hand' in context else hand_size
+            if _is_over(context):
+                break
+
+            status, context = self._request('POST', 'end-turn',
+                                            {'gameId': self._game_id, 'action': Action.END_TURN_OPPONENT.value})
+            if status != 200:
+                return False
+            if _is_over(context):
+                break
+        else:
+            return False
+
+        self._stats.add_game()
+        return True
+
+    def _choose(self, hand_size: int) -> str:
+        """
+        Picks the next behavior. Without hand cards left, the hand-card behavior is left out.
+        """
+        choices = [(behavior, weight) for behavior, weight in zip(self._behaviors, self._weights)
+                   if weight > 0 and (hand_size or behavior != 'hand-card')]
+        if not choices:
+            return 'end-turn'
+        behaviors, weights = zip(*choices)
+        return self._random.choices(behaviors, weights)[0]
+
+    def _request(self, method: str, endpoint: str, payload=None) -> (int or None, dict or None):
+        start = time.perf_counter()
+        try:
+            status, context = self._transport.request(method, endpoint, payload)
+        except Exception:
+            status, context = None, None
+        self._stats.add(endpoint, time.perf_counter() - start, status)
+        return status, context
+
+
+
+LoadReport = collections.namedtuple('LoadReport', ['clients', 'elapsed', 'games', 'endpoints', 'memory'])
+
+
+def run_load(transport_factory, clients: int, games=None, duration=None, mix=_DEFAULT_MIX, difficulty=Difficulty.NORMAL,
+             seed=None, memory_probe=None) -> LoadReport:
+    """
+    Runs `clients` virtual clients at once, each on its own thread, with a transport from `transport_factory(index)`.
+    Every client plays `games` games, or keeps playing for `duration` seconds (at least one must be given).
+    `memory_probe`, if given, returns a dictionary of memory measurements (in bytes);
+    it's measured before and after the run, and the report holds both along with the growth.
+    """
+    if games is None and duration is None:
+        raise ValueError('a load test needs a number of games or a duration')
+
+    stats = LoadStats()
+    before = memory_probe() if memory_probe else {}
+    deadline = None if duration is None else time.perf_counter() + duration
+
+    def run_client(index: int) -> None:
+        transport = transport_factory(index)
+        rng = random.Random(None if seed is None else seed + index)
+        client = VirtualClient(transport, stats, mix=mix, difficulty=difficulty, rng=rng)
+        played = 0
+        try:
+            while (games is None or played < games) and (deadline is None or time.perf_counter() < deadline):
+                client.play_game()
+                played += 1
+        finally:
+            transport.close()
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=run_client, args=(index,), name='pazaak-load-{0}'.format(index), daemon=True)
+               for index in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    after = memory_probe() if memory_probe else {}
+    memory = {name: {'before': before[name], 'after': after[name], 'growth': after[name] - before[name]}
+              for name in before if name in after}
+    return LoadReport(clients, elapsed, stats.games, stats.endpoints(), memory)
+
+
+def format_report(report: LoadReport) -> str:
+    endpoints = report.endpoints
+    requests = sum(endpoint['requests'] for endpoint in endpoints.values())
+    errors = sum(endpoint['errors'] for endpoint in endpoints.values())
+    rejected = sum(endpoint['rejected'] for endpoint in endpoints.values())
+    elapsed = report.elapsed or float('inf')
+
+    lines = [
+        '{0} clients played {1} games in {2:.2f} s: {3:.1f} games/s, {4:.1f} requests/s'.format(
+            report.clients, report.games, report.elapsed, report.games / elapsed, requests / elapsed),
+        'errors: {0} ({1:.2%}), throttled: {2} ({3:.2%})'.format(
+            errors, errors / requests if requests else 0, rejected, rejected / requests if requests else 0),
+        '',
+        '{0:<18}{1:>10}{2:>9}{3:>11}{4:>11}{5:>11}{6:>11}'.format('endpoint', 'requests', 'errors', 'throttled',
+                                                                  'p50 ms', 'p95 ms', 'p99 ms'),
+    ]
+    for name, endpoint in endpoints.items():
+        lines.append('{0:<18}{1:>10}{2:>9}{3:>11}{4:>11.2f}{5:>11.2f}{6:>11.2f}'.format(
+            name, endpoint['requests'], endpoint['errors'], endpoint['rejected'],
+            endpoint['p50'], endpoint['p95'], endpoint['p99']))
+
+    if report.memory:
+        lines.append('')
+        for name, memory in report.memory.items():
+            lines.append('{0}: {1:.1f} MiB -> {2:.1f} MiB ({3:+.1f} MiB)'.format(
+                name, memory['before'] / 2**20, memory['after'] / 2**20, memory['growth'] / 2**20))
+    return '\n'.join(lines)
+
+
+def resident_memory() -> int or None:
+    """
+    Returns the resident set size of this process in bytes, or None where /proc isn't available.
+    """
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _percentile(values: [float], percentile: int) -> float:
+    """
+    Nearest-rank percentile of the sorted `values`.
+    """
+    if not values:
+        return 0.0
+    rank = max(1, math.ceil(percentile / 100 * len(values)))
+    return values[rank - 1]
+
+
+def _is_over(context: dict) -> bool:
+    status = context.get('status')
+    # a move on a finished game reports the final status as a plain message
+    return not isinstance(status, dict) or status.get('value') != GameStatus.GAME_ON.value
+
+
+def _decode(content: bytes) -> dict or None:
+    try:
+        return json.loads(content)
+    except ValueError:
+        return None
+
+
+if __name__ == '__main__':
+    pass
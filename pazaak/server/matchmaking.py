@@ -0,0 +1,268 @@
+# Matchmaking for player-vs-player games.
+#
+# Waiting players are kept in min-heaps (oldest first), one per rating bucket of `bucket_width` points.
+# A player is matched with the oldest player of the nearest bucket within their window, which starts at
+# their own bucket and widens by a bucket every 1 / `widen_per_second` seconds they wait, up to `max_radius`.
+# Matching a player looks at no more than 2 * max_radius + 1 heap tops, so it costs O(log n)
+# however many players are waiting.
+#
+# Players that leave, are matched, or stop polling are dropped from the ticket table right away;
+# their heap entries are left behind and skipped (and popped) when they come up to the top of a heap.
+# So are the entries a ticket had before it was queued again: only the entry with its current sequence number counts.
+import collections
+import heapq
+import itertools
+import math
+import secrets
+import threading
+import time
+
+from django.conf import settings
+
+from pazaak.enums import Turn
+from pazaak.errors import CapacityError, ServerError
+
+
+_DEFAULT_BUCKET_WIDTH = 100
+_DEFAULT_WIDEN_PER_SECOND = 1.0
+_DEFAULT_MAX_RADIUS = 5
+_DEFAULT_ABANDON_AFTER = 30
+
+
+# what a matched player gets back: the game to play, the seat they play in it, and the token to send with their moves
+Match = collections.namedtuple('Match', ['game_id', 'seat', 'seat_token'])
+
+
+class _Ticket:
+    __slots__ = ('rating', 'bucket', 'joined_at', 'last_seen', 'sequence')
+
+    def __init__(self, rating: float, bucket: int, joined_at: float):
+        self.rating = rating
+        self.bucket = bucket
+        self.joined_at = joined_at
+        self.last_seen = joined_at
+        # the sequence number of the ticket's live heap entry
+        self.sequence = None
+
+
+class Matchmaker:
+    """
+    Pairs waiting players by rating (see the module comments). Every pair gets a new game from `create_match`,
+    a callable returning a game ID and the token of each seat (see GameManager.new_match());
+    the player that waited longest takes the player seat, and so moves first.
+    The pair is taken out of the queue while its game is created, without holding up the other players;
+    if that fails, both go back where they were.
+
+    Players join(), then poll() with their ticket until they get a Match. A ticket that isn't polled for
+    `abandon_after` seconds is dropped, and so is a Match that isn't collected within that time.
+    """
+    def __init__(self, create_match, bucket_width=_DEFAULT_BUCKET_WIDTH, widen_per_second=_DEFAULT_WIDEN_PER_SECOND,
+                 max_radius=_DEFAULT_MAX_RADIUS, abandon_after=_DEFAULT_ABANDON_AFTER, clock=time.monotonic):
+        if bucket_width <= 0:
+            raise ValueError('the rating buckets must be wider than 0')
+        self._create_match = create_match
+        self._bucket_width = bucket_width
+        self._widen_per_second = widen_per_second
+        self._max_radius = max_radius
+        self._abandon_after = abandon_after
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._sequence = itertools.count()
+        # bucket -> heap of (joined_at, sequence, ticket ID)
+        self._buckets = {}
+        # waiting tickets, least recently polled first
+        self._tickets = collections.OrderedDict()
+        # ticket ID -> ticket, for the pairs whose game is being created
+        self._pending = {}
+        # ticket ID -> (Match, matched at), oldest first
+        self._matches = collections.OrderedDict()
+        self._matched = 0
+
+    @classmethod
+    def from_settings(cls, create_match) -> 'Matchmaker':
+        return cls(create_match,
+                   bucket_width=getattr(settings, 'PAZAAK_MATCHMAKING_BUCKET_WIDTH', _DEFAULT_BUCKET_WIDTH),
+                   widen_per_second=getattr(settings, 'PAZAAK_MATCHMAKING_WIDEN_PER_SECOND', _DEFAULT_WIDEN_PER_SECOND),
+                   max_radius=getattr(settings, 'PAZAAK_MATCHMAKING_MAX_RADIUS', _DEFAULT_MAX_RADIUS),
+                   abandon_after=getattr(settings, 'PAZAAK_MATCHMAKING_ABANDON_AFTER', _DEFAULT_ABANDON_AFTER))
+
+    def join(self, rating: float) -> str:
+        """
+        Puts a player with `rating` in the queue, and returns their ticket.
+        The player may be matched right away; poll() tells.
+        """
+        if isinstance(rating, bool) or not isinstance(rating, (int, float)) or \
+                (isinstance(rating, float) and not math.isfinite(rating)):
+            raise ServerError('invalid rating "{0}" received'.format(rating))
+
+        with self._lock:
+            now = self._clock()
+            self._expire(now)
+            ticket_id = secrets.token_urlsafe(16)
+            self._tickets[ticket_id] = _Ticket(rating, int(rating // self._bucket_width), now)
+            self._enqueue(ticket_id)
+            pair = self._take_pair(ticket_id, now)
+
+        if pair is not None:
+            try:
+                self._match(pair, now)
+            except CapacityError:
+                # no room for the game yet -- the player stays queued, and is matched on a later poll()
+                pass
+        return ticket_id
+
+    def poll(self, ticket_id: str) -> Match or None:
+        """
+        Returns the ticket's Match (only once), or None if the player is still waiting.
+        Raises CapacityError if there's no room for their game yet; they stay queued.
+        """
+        with self._lock:
+            now = self._clock()
+            self._expire(now)
+            if ticket_id in self._matches:
+                return self._matches.pop(ticket_id)[0]
+            if ticket_id in self._pending:
+                return None
+
+            ticket = self._tickets.get(ticket_id)
+            if ticket is None:
+                raise ServerError('Unknown matchmaking ticket received')
+            ticket.last_seen = now
+            self._tickets.move_to_end(ticket_id)
+            pair = self._take_pair(ticket_id, now)
+
+        if pair is None:
+            return None
+        self._match(pair, now)
+        with self._lock:
+            match = self._matches.pop(ticket_id, None)
+        return match[0] if match is not None else None
+
+    def leave(self, ticket_id: str) -> None:
+        with self._lock:
+            self._tickets.pop(ticket_id, None)
+            self._pending.pop(ticket_id, None)
+            self._matches.pop(ticket_id, None)
+
+    def waiting_count(self) -> int:
+        with self._lock:
+            return len(self._tickets) + len(self._pending)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'waiting': len(self._tickets) + len(self._pending),
+                'buckets': len(self._buckets),
+                'uncollected': len(self._matches),
+                'matched': self._matched,
+            }
+
+    def _enqueue(self, ticket_id: str) -> None:
+        """
+        Pushes a new heap entry for the waiting ticket, which makes any older entry of it stale.
+        """
+        ticket = self._tickets[ticket_id]
+        ticket.sequence = next(self._sequence)
+        heapq.heappush(self._buckets.setdefault(ticket.bucket, []), (ticket.joined_at, ticket.sequence, ticket_id))
+
+    def _take_pair(self, ticket_id: str, now: float) -> [(str, _Ticket)] or None:
+        """
+        Finds the oldest ticket of the nearest bucket within the ticket's window, if there's any,
+        and moves both from the queue to the pending tickets. Returns them oldest first.
+        """
+        ticket = self._tickets[ticket_id]
+        radius = min(self._max_radius, int((now - ticket.joined_at) * self._widen_per_second))
+
+        # the ticket is never its own partner: take it off the top of its heap while looking
+        own_entry = None
+        if self._peek(ticket.bucket)[2] == ticket_id:
+            own_entry = heapq.heappop(self._buckets[ticket.bucket])
+
+        partner = None
+        for distance in range(radius + 1):
+            for bucket in {ticket.bucket - distance, ticket.bucket + distance}:
+                entry = self._peek(bucket)
+                if entry is not None and (partner is None or entry < partner[1]):
+                    partner = (bucket, entry)
+            if partner is not None:
+                break
+
+        if partner is None:
+            if own_entry is not None:
+                heapq.heappush(self._buckets.setdefault(ticket.bucket, []), own_entry)
+            return None
+
+        bucket, (_, _, partner_id) = partner
+        heapq.heappop(self._buckets[bucket])
+        for emptied in (bucket, ticket.bucket):
+            if not self._buckets.get(emptied, True):
+                del self._buckets[emptied]
+
+        # any entry of the ticket left in its heap is stale from now on, and skipped
+        pair = [(partner_id, self._tickets.pop(partner_id)), (ticket_id, self._tickets.pop(ticket_id))]
+        pair.sort(key=lambda item: item[1].joined_at)
+        self._pending.update(pair)
+        return pair
+
+    def _match(self, pair: [(str, _Ticket)], now: float) -> None:
+        """
+        Creates the game of a pair taken from the queue, outside the lock, and hands out its seats.
+        If that fails, the tickets still pending go back in the queue with their place in it.
+        """
+        try:
+            game_id, seat_tokens = self._create_match()
+        except Exception:
+            with self._lock:
+                for ticket_id, ticket in pair:
+                    if self._pending.pop(ticket_id, None) is not None:
+                        self._tickets[ticket_id] = ticket
+                        self._enqueue(ticket_id)
+            raise
+
+        with self._lock:
+            # a player that left meanwhile never takes their seat, as if they had left right after the match
+            for (ticket_id, _), seat in zip(pair, (Turn.PLAYER, Turn.OPPONENT)):
+                if self._pending.pop(ticket_id, None) is not None:
+                    self._matches[ticket_id] = (Match(game_id, seat, seat_tokens[seat]), now)
+                    self._matched += 1
+
+    def _peek(self, bucket: int) -> tuple or None:
+        """
+        Returns the oldest live entry of the bucket's heap, popping the stale ones above it.
+        """
+        heap = self._buckets.get(bucket)
+        if heap is None:
+            return None
+
+        while heap and not self._is_live(heap[0]):
+            heapq.heappop(heap)
+        if not heap:
+            del self._buckets[bucket]
+            return None
+        return heap[0]
+
+    def _is_live(self, entry: tuple) -> bool:
+        _, sequence, ticket_id = entry
+        ticket = self._tickets.get(ticket_id)
+        return ticket is not None and ticket.sequence == sequence
+
+    def _expire(self, now: float) -> None:
+        """
+        Drops the tickets that stopped polling and the matches nobody collected.
+        """
+        deadline = now - self._abandon_after
+        while self._tickets:
+            ticket_id, ticket = next(iter(self._tickets.items()))
+            if ticket.last_seen > deadline:
+                break
+            del self._tickets[ticket_id]
+
+        while self._matches:
+            ticket_id, (_, matched_at) = next(iter(self._matches.items()))
+            if matched_at > deadline:
+                break
+            del self._matches[ticket_id]
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,186 @@
+# Snapshots of the live games, so that games survive server restarts.
+#
+# A snapshot is a single file:
+#   magic | game records | index | footer
+# where every game record is a zlib-compressed pickle of one PazaakGame, the index is an array of
+# (game ID, offset, length) entries sorted by game ID, and the footer holds the index's offset, its length and the magic again.
+#
+# Reading a snapshot memory-maps the file and binary-searches the index in place, so opening one costs the same
+# however many games it holds, and a game is only unpickled when it's first looked up.
+# Snapshots are written to a temporary file that's renamed over the previous one, so readers never see a partial file;
+# a reader of the previous snapshot keeps its (unlinked) file mapped until it's closed.
+#
+# Snapshots are pickles: only restore files written by this server.
+import logging
+import mmap
+import os
+import pathlib
+import pickle
+import struct
+import tempfile
+import threading
+import zlib
+
+from pazaak.game.game import PazaakGame
+
+
+logger = logging.getLogger(__name__)
+
+_MAGIC = b'PZSNAP01'
+_ENTRY = struct.Struct('<QQI')
+_FOOTER = struct.Struct('<QQ8s')
+
+
+class Snapshot:
+    """
+    A memory-mapped snapshot file. Game IDs can be looked up without reading the rest of the file.
+    """
+    def __init__(self, path: pathlib.Path):
+        self._path = pathlib.Path(path)
+        with open(str(self._path), 'rb') as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self._map) < len(_MAGIC) + _FOOTER.size or self._map[:len(_MAGIC)] != _MAGIC:
+            self.close()
+            raise ValueError('{0} is not a Pazaak snapshot'.format(self._path))
+
+        self._index_offset, self._count, magic = _FOOTER.unpack_from(self._map, len(self._map) - _FOOTER.size)
+        if magic != _MAGIC or self._index_offset + self._count * _ENTRY.size + _FOOTER.size != len(self._map):
+            self.close()
+            raise ValueError('{0} is a truncated or corrupt Pazaak snapshot'.format(self._path))
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, game_id: int) -> bool:
+        return self._find(game_id) is not None
+
+    def __iter__(self):
+        """
+        Yields (game ID, record) pairs in game ID order, where a record is the game as stored in the file.
+        """
+        for position in range(self._count):
+            game_id, offset, length = self._entry(position)
+            yield game_id, self._map[offset:offset + length]
+
+    @property
+    def path(self) -> pathlib.Path:
+        return self._path
+
+    @property
+    def max_id(self) -> int:
+        """
+        The highest game ID in the snapshot, or -1 if it's empty.
+        """
+        return self._entry(self._count - 1)[0] if self._count else -1
+
+    def record(self, game_id: int) -> bytes or None:
+        entry = self._find(game_id)
+        if entry is None:
+            return None
+        _, offset, length = entry
+        return self._map[offset:offset + length]
+
+    def load(self, game_id: int) -> PazaakGame or None:
+        """
+        Returns the game stored under `game_id`, or None if there isn't one.
+        """
+        record = self.record(game_id)
+        return None if record is None else decode_game(record)
+
+    def close(self) -> None:
+        self._map.close()
+
+    def _entry(self, position: int) -> (int, int, int):
+        return _ENTRY.unpack_from(self._map, self._index_offset + position * _ENTRY.size)
+
+    def _find(self, game_id: int) -> (int, int, int) or None:
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            entry = self._entry(middle)
+            if entry[0] < game_id:
+                low = middle + 1
+            elif entry[0] > game_id:
+                high = middle
+            else:
+                return entry
+        return None
+
+
+
+class SnapshotScheduler(threading.Thread):
+    """
+    Background thread snapshotting a game manager to `path` every `interval` seconds, whenever its games changed.
+    stop() takes one last snapshot, for a graceful shutdown.
+    """
+    def __init__(self, game_manager, path: pathlib.Path, interval: float):
+        super().__init__(name='pazaak-snapshots', daemon=True)
+        self._game_manager = game_manager
+        self._path = pathlib.Path(path)
+        self._interval = interval
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self._stopped.wait(self._interval):
+            self.snapshot()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self.is_alive():
+            self.join()
+        self.snapshot()
+
+    def snapshot(self) -> None:
+        try:
+            count = self._game_manager.snapshot(self._path, only_if_changed=True)
+        except Exception:
+            logger.exception('could not snapshot the Pazaak games to %s', self._path)
+        else:
+            if count is not None:
+                logger.info('snapshotted %s Pazaak games to %s', count, self._path)
+
+
+def encode_game(game: PazaakGame) -> bytes:
+    return zlib.compress(pickle.dumps(game, protocol=pickle.HIGHEST_PROTOCOL), 1)
+
+
+def decode_game(record: bytes) -> PazaakGame:
+    return pickle.loads(zlib.decompress(record))
+
+
+def write_snapshot(path: pathlib.Path, records) -> int:
+    """
+    Atomically writes a snapshot of `records`, (game ID, record) pairs in increasing game ID order,
+    where records come from encode_game() or another snapshot. Returns the number of games written.
+    """
+    path = pathlib.Path(path)
+    descriptor, temp_path = tempfile.mkstemp(dir=str(path.parent), prefix='.{0}.'.format(path.name))
+    try:
+        with os.fdopen(descriptor, 'wb') as outfile:
+            outfile.write(_MAGIC)
+            offset = len(_MAGIC)
+            index = bytearray()
+            previous_id = -1
+            for game_id, record in records:
+                if game_id <= previous_id:
+                    raise ValueError('snapshot records must be in increasing game ID order')
+                outfile.write(record)
+                index += _ENTRY.pack(game_id, offset, len(record))
+                offset += len(record)
+                previous_id = game_id
+
+            outfile.write(index)
+            outfile.write(_FOOTER.pack(offset, len(index) // _ENTRY.size, _MAGIC))
+            outfile.flush()
+            os.fsync(outfile.fileno())
+        os.replace(temp_path, str(path))
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+    return len(index) // _ENTRY.size
+
+
+if __name__ == '__main__':
+    pass
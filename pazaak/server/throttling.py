@@ -0,0 +1,169 @@
+# Per-client rate limiting for the Pazaak API.
+#
+# Every client (its session, or its IP address when it has none) gets a token bucket per scope:
+# the bucket holds up to `burst` tokens and refills at `rate` tokens per second, and every request takes one.
+# A request that finds the bucket empty is rejected with 429 and a Retry-After header telling when a token will be back.
+#
+# Buckets live in Django's cache framework (see the PAZAAK_THROTTLE_CACHE setting), so a shared cache backend
+# limits clients across all server processes. A bucket is only updated with atomic cache operations, never locked:
+# it's kept as the time it was last full and a counter of the tokens taken since, so that taking a token is a
+# cache.incr() (and giving it back, when there were none left, a cache.decr()), and the tokens left are the burst,
+# plus what refilled since that time, minus what was taken.
+# Once the refill catches up with the tokens taken, the bucket is full, and starts over as a new generation:
+# new keys, added with cache.add() so that only one request starts it. Requests racing a new generation
+# may take their tokens from the old one, which at worst lets a few extra requests through.
+import collections
+import inspect
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpRequest, HttpResponse, JsonResponse
+
+
+_KEY_PREFIX = 'pazaak:throttle'
+# how long the keys of a bucket generation are kept, in seconds, at the least
+_GENERATION_TIMEOUT = 60 * 60
+
+_counts = collections.Counter()
+_lock = threading.Lock()
+
+
+class TokenBucket:
+    """
+    Token bucket of one scope, refilling at `rate` tokens per second up to `burst` tokens.
+    """
+    def __init__(self, scope: str, rate: float, burst: int, cache=None, clock=time.time):
+        if rate <= 0 or burst < 1:
+            raise ValueError('a token bucket needs a positive rate and a burst of at least 1')
+        self._scope = scope
+        self._rate = rate
+        self._burst = burst
+        self._cache = cache
+        self._clock = clock
+        # a generation lasts as long as its bucket doesn't fill up, and some cache backends don't extend the expiry
+        # of the keys they increment, so keep them for a while
+        self._timeout = max(math.ceil(burst / rate) + 1, _GENERATION_TIMEOUT)
+
+    @property
+    def scope(self) -> str:
+        return self._scope
+
+    def consume(self, client: str) -> float:
+        """
+        Takes a token from the client's bucket.
+        Returns 0 if the request is allowed, or else the number of seconds until a token is available.
+        """
+        cache = self._cache if self._cache is not None else caches[getattr(settings, 'PAZAAK_THROTTLE_CACHE', 'default')]
+        key = '{0}:{1}:{2}'.format(_KEY_PREFIX, self._scope, client)
+        now = self._clock()
+
+        generation = cache.get(key + ':generation', 0)
+        filled_at = self._filled_at(cache, key, generation, now)
+        if (now - filled_at) * self._rate > cache.get('{0}:{1}:taken'.format(key, generation), 0):
+            # full: start over, so that the time spent full doesn't pile up tokens beyond the burst
+            generation += 1
+            if cache.add('{0}:{1}:filled'.format(key, generation), now, self._timeout):
+                _increment(cache, key + ':generation', self._timeout)
+            filled_at = self._filled_at(cache, key, generation, now)
+
+        taken_key = '{0}:{1}:taken'.format(key, generation)
+        tokens = self._burst + (now - filled_at) * self._rate - _increment(cache, taken_key, self._timeout) + 1
+        wait = 0.0
+        if tokens < 1:
+            wait = (1 - tokens) / self._rate
+            try:
+                cache.decr(taken_key)
+            except ValueError:
+                # expired in the meantime
+                pass
+
+        with _lock:
+            _counts[self._scope, 'rejected' if wait else 'allowed'] += 1
+        return wait
+
+    def _filled_at(self, cache, key: str, generation: int, now: float) -> float:
+        """
+        Returns the time the bucket generation started out full, starting it now if it hadn't been.
+        """
+        filled_key = '{0}:{1}:filled'.format(key, generation)
+        cache.add(filled_key, now, self._timeout)
+        return cache.get(filled_key, now)
+
+
+class throttle:
+    """
+    Rate-limits a View method with the token bucket of `scope`, configured by the PAZAAK_THROTTLE_RATES setting:
+
+        PAZAAK_THROTTLE_RATES = {'move': {'rate': 20, 'burst': 40}}
+
+    Scopes missing from the setting aren't limited. Rejected requests get a 429 response with Retry-After.
+    Goes under @allow_cors, so that rejections carry the CORS headers too.
+    """
+    def __init__(self, scope: str):
+        self._scope = scope
+
+    def __call__(self, method: callable):
+        signature = inspect.signature(method)
+        num_params = len(signature.parameters)
+
+        def _interceptor(*args, **kwargs) -> HttpResponse:
+            bucket = _bucket(self._scope)
+            if bucket is not None:
+                wait = bucket.consume(client_key(args[1]))
+                if wait:
+                    response = JsonResponse({'error': 'too many requests'}, status=429)
+                    response['Retry-After'] = math.ceil(wait)
+                    return response
+            return method(*args[:num_params], **kwargs)
+
+        return _interceptor
+
+
+def client_key(request: HttpRequest) -> str:
+    """
+    Identifies the client making `request`: by session if it has one, otherwise by IP address.
+    """
+    session = getattr(request, 'session', None)
+    if session is not None and session.session_key:
+        return 'session:{0}'.format(session.session_key)
+    return 'ip:{0}'.format(request.META.get('REMOTE_ADDR', ''))
+
+
+def throttle_stats() -> {str: {str: int}}:
+    """
+    Returns the number of allowed and rejected requests of every scope, in this process.
+    """
+    with _lock:
+        counts = dict(_counts)
+
+    result = {}
+    for (scope, outcome), count in counts.items():
+        result.setdefault(scope, {'allowed': 0, 'rejected': 0})[outcome] = count
+    return result
+
+
+def _increment(cache, key: str, timeout: float) -> int:
+    """
+    Atomically increments the counter `key`, starting it at 0 if it doesn't exist. Returns the new count.
+    """
+    while True:
+        cache.add(key, 0, timeout)
+        try:
+            return cache.incr(key)
+        except ValueError:
+            # expired between the two calls
+            continue
+
+
+def _bucket(scope: str) -> TokenBucket or None:
+    rates = getattr(settings, 'PAZAAK_THROTTLE_RATES', {})
+    if scope not in rates:
+        return None
+    return TokenBucket(scope, rates[scope]['rate'], rates[scope]['burst'])
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,79 @@
+import pickle
+import unittest
+from pazaak.bases import Recordable, RecordedField
+
+
+class _Counter(Recordable):
+    _count = RecordedField(int)
+
+    def __init__(self):
+        Recordable.__init__(self)
+        self._count = 0
+        self._scratch = None
+
+
+class _Picky(_Counter):
+    def should_record_value(self, value) -> bool:
+        return value > 1
+
+
+class RecordedFieldTest(unittest.TestCase):
+
+    def setUp(self):
+        self.counter = _Counter()
+
+    def test_records_declared_fields_only(self):
+        self.counter._count = 1
+        self.counter._scratch = 'not recorded'
+        self.assertEqual(1, self.counter._count)
+        self.assertEqual(2, self.counter.diff_count())
+        self.assertEqual(['_count'], list(self.counter.report()))
+        self.assertEqual([0, 1], [update.value for update in self.counter.timeline(descending=False)])
+
+    def test_dict_writes_are_silent(self):
+        self.counter.__dict__['_count'] = 5
+        self.assertEqual(5, self.counter._count)
+        self.assertEqual(1, self.counter.diff_count())
+
+    def test_pickles(self):
+        self.counter._count = 3
+        copy = pickle.loads(pickle.dumps(self.counter))
+        self.assertEqual(3, copy._count)
+        self.assertEqual(self.counter.diff_count(), copy.diff_count())
+
+    def test_unrecorded_writes_are_plain_writes(self):
+        self.counter._scratch = 1
+        self.assertEqual(1, self.counter.__dict__['_scratch'])
+        self.assertNotIn('_scratch', type(self.counter).__dict__)
+        self.assertEqual(1, self.counter.diff_count())
+
+    def test_declared_types_are_recorded_without_asking(self):
+        def refuse(value):
+            raise AssertionError('should_record_value() was called for {0!r}'.format(value))
+
+        self.counter.should_record_value = refuse
+        self.counter._count = 1
+        self.assertRaises(AssertionError, setattr, self.counter, '_count', 1.5)
+        self.assertEqual([0, 1], [update.value for update in self.counter.timeline(descending=False)])
+
+    def test_other_types_ask_should_record_value(self):
+        self.counter._count = 'two'
+        self.counter._count = [3]
+        self.assertEqual([0, 'two', None], [update.value for update in self.counter.timeline(descending=False)])
+
+    def test_overridden_should_record_value_is_asked(self):
+        picky = _Picky()
+        picky._count = 1
+        picky._count = 2
+        self.assertEqual([None, None, 2], [update.value for update in picky.timeline(descending=False)])
+
+    def test_custom_recordable_types_are_asked(self):
+        self.counter.recordable_types = set()
+        self.counter._count = 1
+        self.counter.recordable_types = None
+        self.counter._count = [2]
+        self.assertEqual([0, None, [2]], [update.value for update in self.counter.timeline(descending=False)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import collections
+import random
+import unittest
+from pazaak.data_structures.decks import Shoe
+from pazaak.game import cards
+from pazaak.game.game import PazaakGame
+
+
+class ShoeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.shoe = Shoe(rng=random.Random(0))
+
+    def test_draws_without_replacement(self):
+        drawn = collections.Counter(self.shoe.draw() for _ in range(40))
+        self.assertEqual({value: 4 for value in range(1, 11)}, dict(drawn))
+        self.assertEqual(0, len(self.shoe))
+
+    def test_counts_and_probabilities(self):
+        value = self.shoe.draw()
+        self.assertEqual(39, len(self.shoe))
+        self.assertEqual(3, self.shoe.count(value))
+        self.assertAlmostEqual(3 / 39, self.shoe.probability(value))
+        values, weights = self.shoe.distribution()
+        self.assertEqual(list(range(1, 11)), values)
+        self.assertEqual(39, sum(weights))
+
+    def test_exhausted_value_is_not_in_shoe(self):
+        shoe = Shoe(values=(1, 2), copies=1, rng=random.Random(0))
+        value = shoe.draw()
+        self.assertNotIn(value, shoe)
+        self.assertEqual(([3 - value], [1]), shoe.distribution())
+
+    def test_reshuffle(self):
+        for _ in range(10):
+            self.shoe.draw()
+        self.shoe.reshuffle()
+        self.assertEqual(40, len(self.shoe))
+        self.assertEqual(Shoe(), self.shoe)
+
+    def test_reshuffles_when_empty(self):
+        shoe = Shoe(values=(5,), copies=2)
+        self.assertEqual([5, 5, 5], [shoe.draw() for _ in range(3)])
+        self.assertEqual(1, len(shoe))
+
+        shoe = Shoe(values=(5,), copies=1, reshuffle_when_empty=False)
+        shoe.draw()
+        self.assertRaises(IndexError, shoe.draw)
+
+
+class GameShoeTest(unittest.TestCase):
+
+    def test_game_draws_from_shoe(self):
+        game = PazaakGame(cards.random_cards(4, positive_only=False, bound=5), shoe=Shoe(rng=random.Random(1)))
+        drawn = collections.Counter(game.draw_card().modifier for _ in range(40))
+        self.assertEqual({value: 4 for value in range(1, 11)}, dict(drawn))
+
+        game.draw_card()
+        game.reset(cards.random_cards(4, positive_only=False, bound=5))
+        self.assertEqual(40, len(game.shoe))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,34 @@
+import pathlib
+import tempfile
+import unittest
+from pazaak.enums import export_enums_to_js, render_enums_js
+
+
+class ExportEnumsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.write_file = pathlib.Path(self.directory.name) / 'enums.js'
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_writes_missing_file(self):
+        self.assertTrue(export_enums_to_js(self.write_file))
+        self.assertEqual(render_enums_js(), self.write_file.read_text())
+
+    def test_skips_unchanged_file(self):
+        export_enums_to_js(self.write_file)
+        modified = self.write_file.stat().st_mtime_ns
+        self.assertFalse(export_enums_to_js(self.write_file))
+        self.assertEqual(modified, self.write_file.stat().st_mtime_ns)
+
+    def test_rewrites_stale_file(self):
+        self.write_file.write_text('// stale')
+        self.assertTrue(export_enums_to_js(self.write_file))
+        self.assertEqual(render_enums_js(), self.write_file.read_text())
+        self.assertEqual(['enums.js'], [path.name for path in self.write_file.parent.iterdir()])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,196 @@
+import collections
+import copy
+import random
+import unittest
+from pazaak.enums import GameStatus, MoveType, Turn
+from pazaak.game import cards
+from pazaak.game.cards import PazaakCard
+from pazaak.game.game import PazaakGame
+from pazaak.game.moves import Move
+from pazaak.errors import GameLogicError, GameOverError
+
+
+def _snapshot(game: PazaakGame) -> tuple:
+    players = (game.player, game.opponent)
+    return (game.turn,
+            tuple(player.score for player in players),
+            tuple(player.is_standing for player in players),
+            tuple(player.forfeited for player in players),
+            tuple(tuple(card.modifier for card in player.placed) for player in players),
+            tuple(sorted(card.modifier for card in player.hand) for player in players))
+
+
+class ApplyUndoTest(unittest.TestCase):
+
+    def setUp(self):
+        random.seed(5)
+        self.game = PazaakGame(cards.random_cards(4, positive_only=False, bound=5))
+
+    def random_move(self, rng: random.Random, game: PazaakGame) -> Move:
+        player = game.player if game.turn == Turn.PLAYER else game.opponent
+        choice = rng.random()
+        if choice < 0.15:
+            return Move.stand()
+        if choice < 0.35 and player.hand:
+            return Move.hand(rng.choice(list(player.hand)))
+        return Move.draw(PazaakCard(rng.randint(1, 10)))
+
+    def test_undo_restores_state(self):
+        rng = random.Random(1)
+        for _ in range(200):
+            before = _snapshot(self.game)
+            history_size = self.game.diff_count() + self.game.player.diff_count() + self.game.opponent.diff_count()
+            applied = 0
+            for _ in range(rng.randint(1, 6)):
+                applied += 1
+                if self.game.apply(self.random_move(rng, self.game)):
+                    break
+            for _ in range(applied):
+                self.game.undo()
+            self.assertEqual(before, _snapshot(self.game))
+            self.assertEqual(history_size, self.game.diff_count() + self.game.player.diff_count() + self.game.opponent.diff_count())
+
+    def test_apply_matches_end_turn(self):
+        rng = random.Random(2)
+        for _ in range(100):
+            searched = copy.deepcopy(self.game)
+            played = copy.deepcopy(self.game)
+            status = GameStatus.GAME_ON
+            while not status:
+                move = self.random_move(rng, searched)
+                status = searched.apply(move)
+
+                turn = played.turn
+                player = played.player if turn == Turn.PLAYER else played.opponent
+                if move.kind == MoveType.STAND:
+                    player.stand()
+                elif move.kind == MoveType.HAND and not player.is_standing:
+                    player.hand.remove(move.card)
+                expected = played.end_turn(turn, move.card)
+                self.assertEqual(expected, status)
+                self.assertEqual(_snapshot(played), _snapshot(searched))
+
+    def test_undo_without_moves(self):
+        with self.assertRaises(GameLogicError):
+            self.game.undo()
+
+    def test_apply_after_game_over(self):
+        while not self.game.apply(Move.stand()):
+            pass
+        final = _snapshot(self.game)
+        with self.assertRaises(GameOverError):
+            self.game.apply(Move.draw(PazaakCard(5)))
+        self.assertEqual(final, _snapshot(self.game))
+
+        # taking the last move back makes the game playable again
+        self.game.undo()
+        self.game.apply(Move.stand())
+
+
+
+class _BaselineSide:
+    def __init__(self):
+        self.score = 0
+        self.placed = 0
+        self.standing = False
+        self.forfeited = False
+
+
+def _baseline_winner(sides: [_BaselineSide]) -> (GameStatus, str):
+    """
+    The status the game had before it was tracked incrementally: PazaakGame.winner() checked forfeits, then outscoring,
+    then filled tables, on every turn. Also returns the rule that decided it.
+    """
+    if any(side.forfeited for side in sides):
+        return GameStatus.PLAYER_FORFEIT, 'forfeit'
+    if all(side.standing for side in sides):
+        if sides[0].score == sides[1].score:
+            return GameStatus.TIE, 'tie'
+        winner = max((0, 1), key=lambda seat: (sides[seat].score <= 20, sides[seat].score))
+        return _WINS[winner], 'outscore'
+    for seat, side in enumerate(sides):
+        if side.placed >= 9 and side.score <= 20:
+            return _WINS[seat], 'filled table'
+    return GameStatus.GAME_ON, None
+
+
+def _baseline_end_turn(sides: [_BaselineSide], seat: int, modifier: int) -> (GameStatus, str):
+    side = sides[seat]
+    if side.standing or side.forfeited:
+        return _baseline_winner(sides)
+
+    previous, new = side.score, side.score + modifier
+    side.placed += 1
+    if new == 20:
+        side.standing = True
+    # only a player that was already over 20 busts
+    if previous > 20 and new > 20:
+        return _WINS[1 - seat], 'bust'
+    side.score = new
+    return _baseline_winner(sides)
+
+
+_WINS = (GameStatus.PLAYER_WINS, GameStatus.OPPONENT_WINS)
+
+
+class StatusTest(unittest.TestCase):
+
+    def test_statuses_match_the_baseline_rules(self):
+        rng = random.Random(3)
+        random.seed(3)
+        decided_by = collections.Counter()
+        for _ in range(2000):
+            game = PazaakGame(cards.random_cards(4, positive_only=False, bound=5))
+            sides = [_BaselineSide(), _BaselineSide()]
+            status = GameStatus.GAME_ON
+            while not status:
+                turn = game.turn
+                seat = 0 if turn == Turn.PLAYER else 1
+                player = game.player if seat == 0 else game.opponent
+                choice = rng.random()
+                if choice < 0.005:
+                    player.forfeit()
+                    sides[seat].forfeited = True
+                    card = PazaakCard.empty()
+                elif choice < 0.1:
+                    player.stand()
+                    sides[seat].standing = True
+                    card = PazaakCard.empty()
+                else:
+                    card = PazaakCard(rng.choice([-3, -2, -1, 1, 1, 2, 2, 3, 4, 5, 6, 7, 8, 9, 10]))
+
+                expected, rule = _baseline_end_turn(sides, seat, card.modifier)
+                status = game.end_turn(turn, card)
+                self.assertEqual(expected, status)
+                self.assertEqual((sides[0].score, sides[1].score), (game.player.score, game.opponent.score))
+            decided_by[rule] += 1
+
+            # the final status sticks
+            self.assertEqual(status, game.end_turn(game.turn, PazaakCard(1)))
+            self.assertEqual(status, game.status)
+
+        self.assertEqual({'forfeit', 'tie', 'outscore', 'bust', 'filled table'}, set(decided_by))
+
+
+class ResetTest(unittest.TestCase):
+
+    def test_reset_game_matches_new_game(self):
+        random.seed(9)
+        game = PazaakGame(cards.random_cards(4, positive_only=False, bound=5))
+        while not game.end_turn(game.turn, game.draw_card()):
+            pass
+
+        random.seed(10)
+        game.reset(cards.random_cards(4, positive_only=False, bound=5))
+        random.seed(10)
+        fresh = PazaakGame(cards.random_cards(4, positive_only=False, bound=5))
+
+        self.assertEqual(_snapshot(fresh), _snapshot(game))
+        self.assertEqual(GameStatus.GAME_ON, game.status)
+        for player in (game.player, game.opponent):
+            self.assertEqual(0, player.diff_count())
+            self.assertEqual((0, 0, 0), (player.record.wins, player.record.losses, player.record.ties))
+
+
+if __name__ == '__main__':
+    unittest.main()
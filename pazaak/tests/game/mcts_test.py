@@ -0,0 +1,70 @@
+import random
+import unittest
+from pazaak.enums import GameStatus, Turn
+from pazaak.game import cards
+from pazaak.game.game import PazaakGame
+from pazaak.game.mcts import MonteCarloStrategy, _state_from_game
+from pazaak.game.strategies import HeuristicStrategy
+
+
+class MonteCarloStrategyTest(unittest.TestCase):
+
+    def play(self, strategy: MonteCarloStrategy, seed: int) -> GameStatus:
+        random.seed(seed)
+        game = PazaakGame(cards.random_cards(4, positive_only=False, bound=5), opponent_strategy=strategy)
+        player_strategy = HeuristicStrategy()
+        status = GameStatus.GAME_ON
+        while not status:
+            turn = game.turn
+            if turn == Turn.PLAYER:
+                move = cards.PazaakCard.empty() if game.player.is_standing else player_strategy.move(game, game.player, game.opponent)
+            else:
+                move = cards.PazaakCard.empty() if game.opponent.is_standing else game._get_opponent_move()
+            status = game.end_turn(turn, move)
+        return status
+
+    def test_search_respects_budget(self):
+        strategy = MonteCarloStrategy(budget_ms=5, seed=1)
+        for seed in range(5):
+            self.play(strategy, seed)
+            report = strategy.last_report
+            if report is not None:
+                # the deadline is checked between iterations; one iteration is a handful of microseconds,
+                # the slack only absorbs scheduling and garbage collection pauses
+                self.assertLess(report.elapsed_ms, 5 + 25)
+                self.assertGreater(report.iterations, 0)
+
+    def test_transposition_table_is_reused_between_moves(self):
+        strategy = MonteCarloStrategy(budget_ms=None, max_iterations=1000, seed=1)
+        random.seed(3)
+        game = PazaakGame(cards.random_cards(4, positive_only=False, bound=5), opponent_strategy=strategy)
+        game.end_turn(Turn.PLAYER, game.draw_card())
+        game.end_turn(Turn.OPPONENT, game._get_opponent_move())
+        first_size = strategy.table_size
+        game.end_turn(Turn.PLAYER, game.draw_card())
+
+        # the first search already went through the state the second one starts from
+        state = _state_from_game(game, 1)
+        root = strategy._table.get(state)
+        self.assertIsNotNone(root)
+        visits = root.visits
+        self.assertGreater(visits, 0)
+
+        game._get_opponent_move()
+        report = strategy.last_report
+        self.assertIs(root, strategy._table[state])
+        self.assertEqual(visits + report.iterations, root.visits)
+        self.assertEqual(first_size + report.expanded, strategy.table_size)
+        self.assertEqual(strategy.table_size, report.table_size)
+
+    def test_iteration_bounded_search_is_deterministic(self):
+        statuses = [self.play(MonteCarloStrategy(budget_ms=None, max_iterations=50, seed=2), seed=11) for _ in range(2)]
+        self.assertEqual(statuses[0], statuses[1])
+
+    def test_requires_a_bound(self):
+        with self.assertRaises(ValueError):
+            MonteCarloStrategy(budget_ms=None, max_iterations=None)
+
+
+if __name__ == '__main__':
+    unittest.main()
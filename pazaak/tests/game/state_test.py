@@ -0,0 +1,90 @@
+import functools
+import pickle
+import random
+import unittest
+from pazaak.enums import GameStatus, Turn
+from pazaak.game import cards
+from pazaak.game.cards import PazaakCard
+from pazaak.game.game import PazaakGame
+from pazaak.game.moves import Move
+from pazaak.game.state import PazaakState, step
+
+
+class PazaakStateTest(unittest.TestCase):
+
+    def setUp(self):
+        random.seed(9)
+        self.game = PazaakGame(cards.random_cards(4, positive_only=False, bound=5))
+
+    def random_move(self, rng: random.Random, game: PazaakGame) -> Move:
+        player = game.player if game.turn == Turn.PLAYER else game.opponent
+        choice = rng.random()
+        if choice < 0.15:
+            return Move.stand()
+        if choice < 0.35 and player.hand:
+            return Move.hand(rng.choice(list(player.hand)))
+        return Move.draw(PazaakCard(rng.randint(1, 10)))
+
+    def test_round_trip(self):
+        state = PazaakState.from_game(self.game)
+        self.assertEqual(state, PazaakState.from_game(state.to_game()))
+        self.assertEqual(state, pickle.loads(pickle.dumps(state)))
+        self.assertEqual(Turn.PLAYER, state.turn)
+        self.assertEqual(GameStatus.GAME_ON, state.status)
+
+    def test_to_game_draws_no_random_numbers(self):
+        state = PazaakState.from_game(self.game)
+        random_state = random.getstate()
+        game = state.to_game()
+        self.assertEqual(random_state, random.getstate())
+        self.assertEqual(sorted(state.hand(0)), sorted(card.modifier for card in game.player.hand))
+
+    def test_to_game_records_nothing(self):
+        self.game.player.stand()
+        self.game.end_turn(Turn.PLAYER, PazaakCard.empty())
+        game = PazaakState.from_game(self.game).to_game()
+        self.assertTrue(game.player.is_standing)
+        self.assertEqual(Turn.OPPONENT, game.turn)
+
+        # only the initial values a new game records
+        fresh = PazaakGame([], deal=False)
+        count = lambda game: game.diff_count() + game.player.diff_count() + game.opponent.diff_count()
+        self.assertEqual(count(fresh), count(game))
+
+    def test_step_matches_apply(self):
+        rng = random.Random(4)
+        for _ in range(300):
+            state = PazaakState.from_game(self.game)
+            depth = 0
+            while not state.status:
+                move = self.random_move(rng, self.game)
+                expected = self.game.apply(move)
+                state = step(state, move)
+                depth += 1
+                self.assertEqual(expected, state.status)
+                self.assertEqual(PazaakState.from_game(self.game), state)
+                self.assertEqual(state, PazaakState.from_game(state.to_game()))
+            for _ in range(depth):
+                self.game.undo()
+
+    def test_usable_as_memoization_key(self):
+        @functools.lru_cache(maxsize=None)
+        def score(state: PazaakState) -> int:
+            return state.score(0)
+
+        state = PazaakState.new(scores=(12, 7), hands=((1, -3), (2, 2)))
+        self.assertEqual(12, score(state))
+        self.assertEqual(12, score(PazaakState(state.packed)))
+        self.assertEqual(1, score.cache_info().hits)
+        self.assertEqual(2, state.hand_count(1, 2))
+        self.assertEqual((-3, 1), state.hand(0))
+
+    def test_rejects_values_that_do_not_fit(self):
+        with self.assertRaises(ValueError):
+            PazaakState.new(scores=(200, 0))
+        with self.assertRaises(ValueError):
+            PazaakState.new(hands=((11,), ()))
+
+
+if __name__ == '__main__':
+    unittest.main()
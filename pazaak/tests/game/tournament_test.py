@@ -0,0 +1,53 @@
+import functools
+import unittest
+from pazaak.enums import GameStatus
+from pazaak.game.strategies import HeuristicStrategy, ThresholdStrategy
+from pazaak.game.tournament import MatchupResult, play_game, round_robin
+
+
+class TournamentTest(unittest.TestCase):
+
+    def setUp(self):
+        self.strategies = {
+            'heuristic': HeuristicStrategy,
+            'threshold': ThresholdStrategy,
+            'cautious': functools.partial(ThresholdStrategy, threshold=14),
+        }
+
+    def test_play_game_finishes(self):
+        status = play_game(HeuristicStrategy(), ThresholdStrategy(), seed=7)
+        self.assertTrue(status)
+        self.assertIsInstance(status, GameStatus)
+
+    def test_play_game_is_deterministic(self):
+        results = {play_game(HeuristicStrategy(), ThresholdStrategy(), seed=seed) for seed in [3, 3, 3]}
+        self.assertEqual(1, len(results))
+
+    def test_round_robin_covers_every_pair(self):
+        result = round_robin(self.strategies, range(20), processes=1)
+        for name in self.strategies:
+            for other in self.strategies:
+                if name != other:
+                    self.assertEqual(40, result[name, other].games)
+                    self.assertEqual(result[name, other].wins, result[other, name].losses)
+
+    def test_round_robin_deterministic_across_processes(self):
+        seeds = range(50)
+        serial = round_robin(self.strategies, seeds, processes=1, chunk_size=10)
+        parallel = round_robin(self.strategies, seeds, processes=2, chunk_size=10)
+        for name in self.strategies:
+            for other in self.strategies:
+                if name != other:
+                    self.assertEqual(repr(serial[name, other]), repr(parallel[name, other]))
+
+    def test_confidence_interval_contains_win_rate(self):
+        result = MatchupResult(wins=30, losses=60, ties=10)
+        low, high = result.confidence_interval()
+        self.assertLessEqual(0.0, low)
+        self.assertLessEqual(low, result.win_rate())
+        self.assertLessEqual(result.win_rate(), high)
+        self.assertLessEqual(high, 1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+import os
+import threading
+import unittest
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'djdashboard.settings')
+from pazaak.enums import Action, GameStatus
+from pazaak.server.archive import GameArchiver
+from pazaak.server.game import GameManager
+
+
+class _RecordingArchiver(GameArchiver):
+    """
+    Keeps the batches it would have inserted, instead of touching the database.
+    """
+    def __init__(self, *args, **kwargs):
+        self.batches = []
+        self.written = threading.Event()
+        super().__init__(*args, **kwargs)
+
+    def _write(self, batch: [dict]) -> None:
+        self.batches.append(batch)
+        self.written.set()
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            batch, stopping = self._next_batch()
+            if batch:
+                self._write(batch)
+
+
+class _StalledArchiver(_RecordingArchiver):
+    """
+    Waits for `resume` before writing its first batch, like a database that can't keep up.
+    """
+    def __init__(self, *args, **kwargs):
+        self.writing = threading.Event()
+        self.resume = threading.Event()
+        super().__init__(*args, **kwargs)
+
+    def _write(self, batch: [dict]) -> None:
+        self.writing.set()
+        self.resume.wait()
+        super()._write(batch)
+
+
+class GameArchiverTest(unittest.TestCase):
+
+    def test_batches_by_size(self):
+        archiver = _RecordingArchiver(batch_size=3, flush_interval_ms=60000)
+        for game_id in range(7):
+            self.assertTrue(archiver.submit({'game_id': game_id}))
+        archiver.close()
+        self.assertEqual([3, 3, 1], [len(batch) for batch in archiver.batches])
+
+    def test_flushes_after_interval(self):
+        archiver = _RecordingArchiver(batch_size=100, flush_interval_ms=10)
+        archiver.submit({'game_id': 1})
+        self.assertTrue(archiver.written.wait(5))
+        self.assertEqual([[{'game_id': 1}]], archiver.batches)
+        archiver.close()
+
+    def test_drops_records_when_closed(self):
+        archiver = _RecordingArchiver(batch_size=1, max_pending=1)
+        archiver.close()
+        self.assertFalse(archiver.submit({'game_id': 1}))
+        self.assertEqual(1, archiver.stats()['dropped'])
+
+    def stalled(self, put_timeout_ms: int) -> _StalledArchiver:
+        """
+        Returns an archiver stuck writing its first record, with a full queue.
+        """
+        archiver = _StalledArchiver(batch_size=1, max_pending=1, put_timeout_ms=put_timeout_ms)
+        self.addCleanup(archiver.resume.set)
+        self.assertTrue(archiver.submit({'game_id': 1}))
+        self.assertTrue(archiver.writing.wait(5))
+        self.assertTrue(archiver.submit({'game_id': 2}))
+        return archiver
+
+    def test_full_queue_waits_for_room(self):
+        archiver = self.stalled(put_timeout_ms=10000)
+        submitted = []
+        thread = threading.Thread(target=lambda: submitted.append(archiver.submit({'game_id': 3})))
+        thread.start()
+        thread.join(0.1)
+        self.assertTrue(thread.is_alive())
+
+        archiver.resume.set()
+        thread.join(5)
+        self.assertEqual([True], submitted)
+        archiver.close()
+        self.assertEqual([[{'game_id': 1}], [{'game_id': 2}], [{'game_id': 3}]], archiver.batches)
+        self.assertEqual(0, archiver.stats()['dropped'])
+
+    def test_full_queue_drops_after_the_timeout(self):
+        archiver = self.stalled(put_timeout_ms=0)
+        self.assertFalse(archiver.submit({'game_id': 3}))
+        self.assertEqual(1, archiver.stats()['dropped'])
+
+        archiver.resume.set()
+        archiver.close()
+        self.assertEqual([[{'game_id': 1}], [{'game_id': 2}]], archiver.batches)
+
+    def test_close_gives_up_on_a_stuck_archiver(self):
+        archiver = self.stalled(put_timeout_ms=0)
+        archiver.close(timeout=0.01)
+        self.assertFalse(archiver.submit({'game_id': 3}))
+
+
+class GameManagerArchiveTest(unittest.TestCase):
+
+    def test_finished_game_is_archived_once(self):
+        archivers = []
+
+        def factory():
+            archivers.append(_RecordingArchiver(flush_interval_ms=0))
+            return archivers[-1]
+
+        manager = GameManager(archiver_factory=factory)
+        game_id = manager.new_game()
+        manager.get_game(game_id).player.forfeit()
+        for _ in range(2):
+            manager.play(game_id, {'gameId': game_id, 'action': Action.END_TURN_PLAYER.value})
+        manager.close()
+
+        records = [record for batch in archivers[0].batches for record in batch]
+        self.assertEqual(1, len(archivers))
+        self.assertEqual([game_id], [record['game_id'] for record in records])
+        self.assertEqual(GameStatus.PLAYER_FORFEIT.value, records[0]['status'])
+        self.assertIsNotNone(records[0]['started_at'])
+
+
+if __name__ == '__main__':
+    unittest.main()
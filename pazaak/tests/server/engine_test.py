@@ -0,0 +1,83 @@
+import json
+import os
+import pathlib
+import shutil
+import tempfile
+import unittest
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'djdashboard.settings')
+from pazaak.enums import Action, Difficulty, GameStatus
+from pazaak.errors import ServerError
+from pazaak.server.engine import EngineGameManager, EngineMatchmaker, EngineService
+from pazaak.server.game import GameManager
+
+
+class EngineGameManagerTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.mkdtemp()
+        cls.addresses = [str(pathlib.Path(cls.directory) / 'engine-{0}.sock'.format(index)) for index in range(2)]
+        cls.authkey = b'engine test'
+        cls.service = EngineService(GameManager, cls.addresses, authkey=cls.authkey)
+        cls.service.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.service.stop()
+        shutil.rmtree(cls.directory)
+
+    def setUp(self):
+        self.manager = EngineGameManager(self.addresses, authkey=self.authkey)
+
+    def tearDown(self):
+        self.manager.clean_games()
+        self.manager.close()
+
+    def test_engines_allocate_game_ids(self):
+        # another web server process shares the engines, and never gets the same IDs
+        other = EngineGameManager(self.addresses, authkey=self.authkey)
+        self.addCleanup(other.close)
+        game_ids = [json.loads(manager.start_game())['gameId'] for _ in range(3) for manager in (self.manager, other)]
+        self.assertEqual(6, len(set(game_ids)))
+        self.assertEqual(6, self.manager.game_count())
+        self.assertEqual({0, 1}, {game_id % 2 for game_id in game_ids})
+
+        other.remove_game(game_ids[0])
+        self.assertEqual(5, self.manager.game_count())
+
+    def test_play_returns_encoded_response(self):
+        game_id = json.loads(self.manager.start_game(Difficulty.NORMAL))['gameId']
+        payload = {'gameId': game_id, 'action': Action.END_TURN_PLAYER.value}
+        context = json.loads(self.manager.play(game_id, payload))
+        self.assertEqual('player', context['turn']['justWent']['value'])
+        self.assertIn(context['status']['value'], [status.value for status in GameStatus])
+
+    def test_engine_errors_are_raised(self):
+        with self.assertRaises(ServerError):
+            self.manager.play(12345, {'gameId': 12345, 'action': Action.END_TURN_PLAYER.value})
+
+    def test_matchmaking_is_shared(self):
+        first = EngineMatchmaker(self.manager)
+        other = EngineGameManager(self.addresses, authkey=self.authkey)
+        self.addCleanup(other.close)
+        second = EngineMatchmaker(other)
+
+        ticket = first.join(1500)
+        partner_ticket = second.join(1500)
+        match, partner_match = first.poll(ticket), second.poll(partner_ticket)
+        self.assertEqual(match.game_id, partner_match.game_id)
+        self.assertNotEqual(match.seat, partner_match.seat)
+
+    def test_wrong_key_is_refused(self):
+        manager = EngineGameManager(self.addresses, authkey=b'wrong key')
+        with self.assertRaises(ServerError):
+            manager.game_count()
+
+    def test_unreachable_engine(self):
+        manager = EngineGameManager([str(pathlib.Path(self.directory) / 'missing.sock')], authkey=self.authkey)
+        with self.assertRaises(ServerError):
+            manager.start_game()
+
+
+if __name__ == '__main__':
+    unittest.main()
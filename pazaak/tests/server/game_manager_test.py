@@ -0,0 +1,312 @@
+import contextlib
+import json
+import os
+import threading
+import unittest
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'djdashboard.settings')
+from django.utils.dateparse import parse_datetime
+from pazaak.enums import Action, Turn
+from pazaak.errors import CapacityError, ServerError
+from pazaak.game.cards import PazaakCard
+from pazaak.server.game import GameManager, estimate_game_size
+
+
+_THREADS = 16
+_OPERATIONS = 200
+
+
+def _run_threads(target, count=_THREADS) -> [BaseException]:
+    """
+    Runs `target` on `count` threads released together, and returns whatever they raised.
+    """
+    barrier = threading.Barrier(count)
+    errors = []
+
+    def worker():
+        barrier.wait()
+        try:
+            target()
+        except BaseException as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=worker) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return errors
+
+
+class GameManagerStressTest(unittest.TestCase):
+
+    def setUp(self):
+        self.manager = GameManager(lock_stripes=4)
+
+    def test_concurrent_new_games_get_unique_ids(self):
+        ids = []
+
+        def create():
+            for _ in range(_OPERATIONS // 4):
+                ids.append(self.manager.new_game())
+
+        self.assertEqual([], _run_threads(create))
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertEqual(len(ids), self.manager.game_count())
+
+    def test_game_lock_serializes_turns(self):
+        game_id = self.manager.new_game()
+        game = self.manager.get_game(game_id)
+        counter = [0]
+
+        def play():
+            for _ in range(_OPERATIONS):
+                with self.manager.lock(game_id):
+                    # a full round trip leaves the turn where it started, unless another thread interleaves
+                    self.assertEqual(Turn.PLAYER, game.turn)
+                    game.player.stand()
+                    game.end_turn(Turn.PLAYER, PazaakCard.empty())
+                    game.restore(Turn.PLAYER, game.status)
+                    value = counter[0]
+                    counter[0] = value + 1
+
+        self.assertEqual([], _run_threads(play))
+        self.assertEqual(_THREADS * _OPERATIONS, counter[0])
+
+    def test_clean_games_while_creating(self):
+        def churn():
+            for _ in range(_OPERATIONS // 4):
+                game_id = self.manager.new_game()
+                game = self.manager.get_game(game_id)
+                game.player.forfeit()
+                game.end_turn(Turn.PLAYER, PazaakCard.empty())
+                self.manager.clean_games()
+
+        self.assertEqual([], _run_threads(churn))
+        self.manager.clean_games()
+        self.assertEqual(0, self.manager.game_count())
+
+
+
+class GameManagerMemoryBudgetTest(unittest.TestCase):
+
+    def setUp(self):
+        sizing_manager = GameManager()
+        self.size = estimate_game_size(sizing_manager.get_game(sizing_manager.new_game()))
+        # room for three fresh games, with some slack for the games to grow
+        self.manager = GameManager(memory_budget=3 * self.size + self.size // 2)
+
+    def test_tracks_usage(self):
+        game_id = self.manager.new_game()
+        before = self.manager.stats()['memoryUsage']
+        self.assertEqual(estimate_game_size(self.manager.get_game(game_id)), before)
+
+        self.manager.play(game_id, {'gameId': game_id, 'action': Action.END_TURN_PLAYER.value})
+        self.assertGreater(self.manager.stats()['memoryUsage'], before)
+
+        self.manager.remove_game(game_id)
+        self.assertEqual(0, self.manager.stats()['memoryUsage'])
+
+    def test_evicts_least_recently_played_game(self):
+        game_ids = [self.manager.new_game() for _ in range(3)]
+        self.manager.play(game_ids[0], {'gameId': game_ids[0], 'action': Action.END_TURN_PLAYER.value})
+
+        self.manager.new_game()
+        stats = self.manager.stats()
+        self.assertEqual(1, stats['evictions'])
+        self.assertLessEqual(stats['memoryUsage'], stats['memoryBudget'])
+        self.manager.get_game(game_ids[0])
+        with self.assertRaises(ServerError):
+            self.manager.get_game(game_ids[1])
+
+    def test_evicts_finished_games_first(self):
+        game_ids = [self.manager.new_game() for _ in range(3)]
+        self.manager.get_game(game_ids[2]).player.forfeit()
+        self.manager.play(game_ids[2], {'gameId': game_ids[2], 'action': Action.END_TURN_PLAYER.value})
+        self.assertTrue(self.manager.get_game(game_ids[2]).is_over)
+
+        self.manager.new_game()
+        self.assertEqual(1, self.manager.stats()['evictions'])
+        self.manager.get_game(game_ids[0])
+        with self.assertRaises(ServerError):
+            self.manager.get_game(game_ids[2])
+
+    def test_drops_spare_games_before_evicting(self):
+        manager = GameManager(memory_budget=3 * self.size + self.size // 2, pool_size=2)
+        game_id = manager.new_game()
+        self.assertEqual(1, manager.stats()['pooledGames'])
+
+        # room for two more games: the spare game goes, the game being played stays
+        with manager._games_lock:
+            manager._make_room(2 * self.size)
+        stats = manager.stats()
+        self.assertEqual(0, stats['pooledGames'])
+        self.assertEqual(0, stats['evictions'])
+        manager.get_game(game_id)
+
+    def test_refuses_new_game_when_nothing_can_be_evicted(self):
+        game_ids = [self.manager.new_game() for _ in range(3)]
+        locked = threading.Barrier(2)
+        done = threading.Event()
+
+        def hold_games():
+            with contextlib.ExitStack() as stack:
+                for game_id in game_ids:
+                    stack.enter_context(self.manager.checkout(game_id))
+                locked.wait()
+                done.wait()
+
+        thread = threading.Thread(target=hold_games)
+        thread.start()
+        locked.wait()
+        try:
+            with self.assertRaises(CapacityError):
+                self.manager.new_game()
+        finally:
+            done.set()
+            thread.join()
+
+        self.assertEqual(3, self.manager.game_count())
+        self.manager.new_game()
+        self.assertEqual(1, self.manager.stats()['evictions'])
+
+
+
+class GameStateTest(unittest.TestCase):
+
+    def setUp(self):
+        self.manager = GameManager()
+        self.game_id = self.manager.new_game()
+
+    def test_matching_etag_skips_serialization(self):
+        etag, content = self.manager.game_state(self.game_id)
+        self.assertIsNotNone(content)
+        self.assertEqual((etag, None), self.manager.game_state(self.game_id, [etag]))
+
+    def test_playing_changes_etag(self):
+        etag, _ = self.manager.game_state(self.game_id)
+        self.manager.play(self.game_id, {'gameId': self.game_id, 'action': Action.END_TURN_PLAYER.value})
+        new_etag, content = self.manager.game_state(self.game_id, [etag])
+        self.assertNotEqual(etag, new_etag)
+        self.assertIsNotNone(content)
+
+    def test_unknown_game(self):
+        with self.assertRaises(ServerError):
+            self.manager.game_state(self.game_id + 1, ['*'])
+
+
+
+class GamePoolTest(unittest.TestCase):
+
+    def setUp(self):
+        self.manager = GameManager(pool_size=2)
+
+    def test_pool_is_warmed(self):
+        self.assertEqual(2, self.manager.stats()['pooledGames'])
+
+    def test_finished_games_are_recycled(self):
+        game_ids = [self.manager.new_game() for _ in range(3)]
+        games = [self.manager.get_game(game_id) for game_id in game_ids]
+        self.assertEqual(0, self.manager.stats()['pooledGames'])
+
+        self.manager.remove_game(game_ids[0])
+        self.assertEqual(1, self.manager.stats()['pooledGames'])
+
+        game_id = self.manager.new_game()
+        game = self.manager.get_game(game_id)
+        self.assertIs(games[0], game)
+        self.assertEqual(Turn.PLAYER, game.turn)
+        self.assertFalse(game.is_over)
+
+    def test_games_in_use_are_not_recycled(self):
+        game_id = self.manager.new_game()
+        locked = threading.Event()
+        done = threading.Event()
+
+        def hold_game():
+            with self.manager.checkout(game_id):
+                locked.set()
+                done.wait()
+
+        thread = threading.Thread(target=hold_game)
+        thread.start()
+        locked.wait()
+        try:
+            self.manager.remove_game(game_id)
+        finally:
+            done.set()
+            thread.join()
+        self.assertEqual(1, self.manager.stats()['pooledGames'])
+
+    def test_games_in_use_by_the_same_thread_are_not_recycled(self):
+        game_id = self.manager.new_game()
+        # the game locks are reentrant, so holding one says nothing about whether the game is in use
+        with self.manager.checkout(game_id) as game:
+            self.manager.remove_game(game_id)
+            self.assertEqual(1, self.manager.stats()['pooledGames'])
+        self.assertIsNot(game, self.manager.get_game(self.manager.new_game()))
+
+
+class ExportGamesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.manager = GameManager()
+        self.game_ids = [self.manager.new_game() for _ in range(5)]
+        for game_id in self.game_ids[1:]:
+            game = self.manager.get_game(game_id)
+            game.player.forfeit()
+            game.end_turn(Turn.PLAYER, PazaakCard.empty())
+
+    def test_exports_finished_games_in_pages(self):
+        first = self.manager.export_games(limit=3)
+        self.assertEqual(self.game_ids[1:4], [game_id for game_id, _ in first])
+        rest = self.manager.export_games(after=first[-1][0], limit=3)
+        self.assertEqual(self.game_ids[4:], [game_id for game_id, _ in rest])
+
+    def test_lines_are_json_with_timelines(self):
+        game_id, line = self.manager.export_games(limit=1)[0]
+        self.assertTrue(line.endswith(b'\n'))
+        record = json.loads(line)
+        self.assertEqual(game_id, record['gameId'])
+        self.assertIn('forfeit', record['status']['name'].lower())
+        self.assertIn('_forfeited', [update['attribute'] for update in record['player']['timeline']])
+
+
+
+class AuditGameTest(unittest.TestCase):
+
+    def setUp(self):
+        self.manager = GameManager()
+        self.game_id = self.manager.new_game()
+        game = self.manager.get_game(self.game_id)
+        for _ in range(4):
+            game.end_turn(game.turn, game.draw_card())
+
+    def _pages(self, limit: int) -> [dict]:
+        pages = []
+        after = None
+        while True:
+            page = json.loads(self.manager.audit_game(self.game_id, after, limit))
+            pages.append(page)
+            if page['next'] is None:
+                return pages
+            after = (parse_datetime(page['next']['time']), page['next']['sequence'])
+
+    def test_pages_through_every_update_in_order(self):
+        whole = self._pages(limit=1000)
+        self.assertEqual(1, len(whole))
+        updates = whole[0]['updates']
+        self.assertEqual({'game', 'player', 'opponent'}, {update['source'] for update in updates})
+        self.assertEqual(sum(sum(counts.values()) for counts in whole[0]['counts'].values()), len(updates))
+
+        paged = [update for page in self._pages(limit=3) for update in page['updates']]
+        self.assertEqual(updates, paged)
+        keys = [(update['time'], update['sequence']) for update in paged]
+        self.assertEqual(sorted(keys), keys)
+
+    def test_page_size_is_bounded(self):
+        page = json.loads(self.manager.audit_game(self.game_id, None, 2))
+        self.assertEqual(2, len(page['updates']))
+        self.assertIsNotNone(page['next'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import itertools
+import threading
+import unittest
+from pazaak.enums import GameStatus
+from pazaak.server import loadtest
+
+
+class _ScriptedTransport:
+    """
+    Answers every game with a fresh hand, and ends it after `moves` requests (or fails every `fail_every`th one).
+    """
+    def __init__(self, index: int, moves=4, fail_every=None):
+        self.requests = []
+        self.closed = False
+        self._moves = moves
+        self._fail_every = fail_every
+        self._count = itertools.count(1)
+        self._lock = threading.Lock()
+        self._left = 0
+
+    def request(self, method: str, endpoint: str, payload=None) -> (int, dict):
+        with self._lock:
+            self.requests.append((method, endpoint, payload))
+            if self._fail_every and next(self._count) % self._fail_every == 0:
+                raise ConnectionResetError('scripted failure')
+        if endpoint == 'new-game':
+            self._left = self._moves
+            return 200, {'gameId': 7, 'player': {'hand': [{}, {}, {}, {}]}}
+        self._left -= 1
+        status = GameStatus.GAME_ON.value if self._left > 0 else GameStatus.PLAYER_WINS.value
+        return 200, {'status': {'value': status}, 'hand': [{}, {}, {}]}
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class ParseMixTest(unittest.TestCase):
+
+    def test_parses_weights(self):
+        self.assertEqual({'end-turn': 2.0, 'stand': 1.0}, loadtest.parse_mix('end-turn=2, stand=1'))
+
+    def test_rejects_unknown_behavior(self):
+        self.assertRaises(ValueError, loadtest.parse_mix, 'end-turn=1,dance=1')
+
+    def test_rejects_zero_weights(self):
+        self.assertRaises(ValueError, loadtest.parse_mix, 'end-turn=0,stand=0')
+
+
+class PercentileTest(unittest.TestCase):
+
+    def test_nearest_rank(self):
+        values = [float(value) for value in range(1, 101)]
+        self.assertEqual(50.0, loadtest._percentile(values, 50))
+        self.assertEqual(99.0, loadtest._percentile(values, 99))
+        self.assertEqual(3.0, loadtest._percentile([3.0], 95))
+        self.assertEqual(0.0, loadtest._percentile([], 50))
+
+
+class RunLoadTest(unittest.TestCase):
+
+    def test_plays_every_game(self):
+        transports = []
+
+        def factory(index):
+            transports.append(_ScriptedTransport(index))
+            return transports[-1]
+
+        report = loadtest.run_load(factory, clients=3, games=2, seed=1)
+        self.assertEqual(6, report.games)
+        self.assertEqual(3, len(transports))
+        self.assertTrue(all(transport.closed for transport in transports))
+        self.assertEqual(6, report.endpoints['new-game']['requests'])
+        self.assertEqual(0, sum(endpoint['errors'] for endpoint in report.endpoints.values()))
+
+        # the finished game is handed back when the next one starts
+        new_games = [payload for _, endpoint, payload in transports[0].requests if endpoint == 'new-game']
+        self.assertNotIn('gameId', new_games[0])
+        self.assertEqual(7, new_games[1]['gameId'])
+
+    def test_counts_failures(self):
+        report = loadtest.run_load(lambda index: _ScriptedTransport(index, fail_every=3), clients=2, games=3, seed=1)
+        errors = sum(endpoint['errors'] for endpoint in report.endpoints.values())
+        self.assertGreater(errors, 0)
+        self.assertLess(report.games, 6)
+
+    def test_memory_growth(self):
+        probes = iter([{'heap': 100}, {'heap': 250}])
+        report = loadtest.run_load(_ScriptedTransport, clients=1, games=1, memory_probe=lambda: next(probes))
+        self.assertEqual({'heap': {'before': 100, 'after': 250, 'growth': 150}}, report.memory)
+        self.assertIn('heap', loadtest.format_report(report))
+
+    def test_needs_games_or_duration(self):
+        self.assertRaises(ValueError, loadtest.run_load, _ScriptedTransport, clients=1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,220 @@
+import json
+import os
+import random
+import threading
+import time
+import unittest
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'djdashboard.settings')
+from pazaak.enums import Action, Turn
+from pazaak.errors import CapacityError, GameLogicError, ServerError
+from pazaak.server.game import GameManager
+from pazaak.server.matchmaking import Matchmaker
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class MatchmakerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = _Clock()
+        self.game_ids = iter(range(1000000))
+        self.matchmaker = Matchmaker(self._create_match, bucket_width=100, widen_per_second=1.0, max_radius=3,
+                                     abandon_after=30, clock=self.clock)
+
+    def _create_match(self):
+        game_id = next(self.game_ids)
+        return game_id, {Turn.PLAYER: 'p{0}'.format(game_id), Turn.OPPONENT: 'o{0}'.format(game_id)}
+
+    def test_matches_same_bucket(self):
+        first = self.matchmaker.join(1210)
+        self.assertIsNone(self.matchmaker.poll(first))
+        second = self.matchmaker.join(1290)
+
+        first_match = self.matchmaker.poll(first)
+        second_match = self.matchmaker.poll(second)
+        self.assertEqual(first_match.game_id, second_match.game_id)
+        self.assertEqual(Turn.PLAYER, first_match.seat)
+        self.assertEqual(Turn.OPPONENT, second_match.seat)
+        self.assertEqual(0, self.matchmaker.waiting_count())
+
+    def test_widens_window_over_time(self):
+        low = self.matchmaker.join(1000)
+        high = self.matchmaker.join(1250)
+        self.assertIsNone(self.matchmaker.poll(low))
+
+        self.clock.now += 1
+        self.assertIsNone(self.matchmaker.poll(low))
+        self.clock.now += 1
+        self.assertIsNotNone(self.matchmaker.poll(low))
+        self.assertIsNotNone(self.matchmaker.poll(high))
+
+    def test_never_widens_past_max_radius(self):
+        low = self.matchmaker.join(1000)
+        self.matchmaker.join(1500)
+        for _ in range(20):
+            self.clock.now += 1
+            self.assertIsNone(self.matchmaker.poll(low))
+
+    def test_prefers_nearest_bucket(self):
+        self.matchmaker.join(1300)
+        near = self.matchmaker.join(1100)
+        self.clock.now += 5
+        player = self.matchmaker.join(1000)
+        self.clock.now += 5
+        match = self.matchmaker.poll(player)
+        self.assertEqual(match.game_id, self.matchmaker.poll(near).game_id)
+
+    def test_abandoned_tickets_are_dropped(self):
+        gone = self.matchmaker.join(1000)
+        self.clock.now += 31
+        staying = self.matchmaker.join(1000)
+        self.assertIsNone(self.matchmaker.poll(staying))
+        self.assertRaises(ServerError, self.matchmaker.poll, gone)
+
+    def test_left_tickets_are_not_matched(self):
+        gone = self.matchmaker.join(1000)
+        self.matchmaker.leave(gone)
+        staying = self.matchmaker.join(1000)
+        self.assertIsNone(self.matchmaker.poll(staying))
+
+    def test_creates_matches_outside_the_lock(self):
+        polled = []
+
+        def create_match():
+            # the other players keep polling meanwhile; the pair being matched is still waiting
+            thread = threading.Thread(target=lambda: polled.append(self.matchmaker.poll(first)))
+            thread.start()
+            thread.join(5)
+            self.assertFalse(thread.is_alive())
+            return self._create_match()
+
+        first = self.matchmaker.join(1000)
+        self.matchmaker._create_match = create_match
+        second = self.matchmaker.join(1000)
+        self.assertEqual([None], polled)
+        self.assertEqual(self.matchmaker.poll(first).game_id, self.matchmaker.poll(second).game_id)
+
+    def test_rejects_invalid_ratings(self):
+        for rating in ('1500', True, None, float('nan'), float('inf'), -float('inf'), json.loads('NaN')):
+            self.assertRaises(ServerError, self.matchmaker.join, rating)
+        self.assertEqual(0, self.matchmaker.waiting_count())
+
+    def test_players_leaving_during_the_match_take_no_seat(self):
+        def create_match():
+            self.matchmaker.leave(first)
+            return self._create_match()
+
+        first = self.matchmaker.join(1000)
+        self.matchmaker._create_match = create_match
+        second = self.matchmaker.join(1000)
+        self.assertIsNotNone(self.matchmaker.poll(second))
+        self.assertRaises(ServerError, self.matchmaker.poll, first)
+        self.assertEqual(1, self.matchmaker.stats()['matched'])
+
+    def test_failed_matches_are_queued_again(self):
+        def full():
+            raise CapacityError('No room for the game')
+
+        first = self.matchmaker.join(1000)
+        self.matchmaker._create_match = full
+        second = self.matchmaker.join(1000)
+        self.assertRaises(CapacityError, self.matchmaker.poll, first)
+        self.assertEqual(2, self.matchmaker.waiting_count())
+
+        self.matchmaker._create_match = self._create_match
+        second_match = self.matchmaker.poll(second)
+        first_match = self.matchmaker.poll(first)
+        self.assertEqual(first_match.game_id, second_match.game_id)
+        # the first to join keeps their place, and the player seat
+        self.assertEqual(Turn.PLAYER, first_match.seat)
+        self.assertEqual(0, self.matchmaker.waiting_count())
+
+    def test_simulated_load(self):
+        """
+        Thousands of players join over a minute of simulated time and poll every second;
+        everyone is matched exactly once, within their widened window.
+        """
+        rng = random.Random(0)
+        matchmaker = Matchmaker(self._create_match, bucket_width=50, widen_per_second=0.5, max_radius=10,
+                                abandon_after=30, clock=self.clock)
+        ratings = {}
+        waiting = []
+        matches = {}
+        start = time.perf_counter()
+
+        for second in range(60):
+            for _ in range(100):
+                rating = rng.gauss(1500, 300)
+                ticket = matchmaker.join(rating)
+                ratings[ticket] = (rating, self.clock.now)
+                waiting.append(ticket)
+
+            self.clock.now += 1
+            still_waiting = []
+            for ticket in waiting:
+                match = matchmaker.poll(ticket)
+                if match is None:
+                    still_waiting.append(ticket)
+                else:
+                    matches[ticket] = match
+            waiting = still_waiting
+
+        elapsed = time.perf_counter() - start
+        self.assertEqual(len(ratings), len(matches) + len(waiting))
+        self.assertEqual(len(waiting), matchmaker.waiting_count())
+        self.assertGreater(len(matches), 0.95 * len(ratings))
+
+        seats = {}
+        for ticket, match in matches.items():
+            seats.setdefault(match.game_id, []).append((ticket, match.seat))
+        for pair in seats.values():
+            self.assertEqual(2, len(pair))
+            self.assertEqual({Turn.PLAYER, Turn.OPPONENT}, {seat for _, seat in pair})
+            (first, _), (second, _) = pair
+            buckets = [int(ratings[ticket][0] // 50) for ticket in (first, second)]
+            self.assertLessEqual(abs(buckets[0] - buckets[1]), 10)
+
+        # 6000 joins and tens of thousands of polls
+        self.assertLess(elapsed, 5)
+
+
+class RemoteMatchTest(unittest.TestCase):
+
+    def setUp(self):
+        self.manager = GameManager(4)
+        self.game_id, self.tokens = self.manager.new_match()
+
+    def _play(self, seat: Turn, action: Action, token=None) -> dict:
+        payload = {'gameId': self.game_id, 'action': action.value, 'seat': seat.value,
+                   'seatToken': self.tokens[seat] if token is None else token}
+        return json.loads(self.manager.play(self.game_id, payload))
+
+    def test_seats_take_turns(self):
+        context = self._play(Turn.PLAYER, Action.END_TURN_PLAYER)
+        self.assertEqual(Turn.OPPONENT.value, context['turn']['upNext']['value'])
+        self.assertRaises(GameLogicError, self._play, Turn.PLAYER, Action.END_TURN_PLAYER)
+
+        context = self._play(Turn.OPPONENT, Action.END_TURN_PLAYER)
+        self.assertEqual(Turn.PLAYER.value, context['turn']['upNext']['value'])
+        game = self.manager.get_game(self.game_id)
+        self.assertEqual(1, len(game.opponent.placed))
+
+    def test_rejects_wrong_token(self):
+        self.assertRaises(ServerError, self._play, Turn.PLAYER, Action.END_TURN_PLAYER, token='nope')
+        self.assertRaises(ServerError, self._play, Turn.PLAYER, Action.END_TURN_PLAYER,
+                          token=self.tokens[Turn.OPPONENT])
+
+    def test_computer_games_only_have_a_player_seat(self):
+        game_id = self.manager.new_game()
+        payload = {'gameId': game_id, 'action': Action.END_TURN_PLAYER.value, 'seat': Turn.OPPONENT.value}
+        self.assertRaises(GameLogicError, self.manager.play, game_id, payload)
+
+
+if __name__ == '__main__':
+    unittest.main()
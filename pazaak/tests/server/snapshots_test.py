@@ -0,0 +1,119 @@
+import json
+import os
+import pathlib
+import tempfile
+import unittest
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'djdashboard.settings')
+from pazaak.enums import Action
+from pazaak.errors import CapacityError, ServerError
+from pazaak.server.game import GameManager, estimate_game_size
+from pazaak.server.snapshots import Snapshot, write_snapshot
+
+
+class SnapshotFileTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = pathlib.Path(self.directory.name) / 'games.snapshot'
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        records = [(2, b'two'), (5, b'five'), (9, b'')]
+        self.assertEqual(3, write_snapshot(self.path, records))
+        snapshot = Snapshot(self.path)
+        try:
+            self.assertEqual(3, len(snapshot))
+            self.assertEqual(9, snapshot.max_id)
+            self.assertEqual(b'five', snapshot.record(5))
+            self.assertIsNone(snapshot.record(3))
+            self.assertEqual(records, [(game_id, bytes(record)) for game_id, record in snapshot])
+        finally:
+            snapshot.close()
+
+    def test_rejects_unordered_records(self):
+        with self.assertRaises(ValueError):
+            write_snapshot(self.path, [(5, b'five'), (2, b'two')])
+        self.assertEqual([], list(pathlib.Path(self.directory.name).iterdir()))
+
+    def test_rejects_truncated_file(self):
+        write_snapshot(self.path, [(1, b'one')])
+        self.path.write_bytes(self.path.read_bytes()[:-4])
+        with self.assertRaises(ValueError):
+            Snapshot(self.path)
+
+
+class GameManagerSnapshotTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = pathlib.Path(self.directory.name) / 'games.snapshot'
+        self.manager = GameManager()
+        self.game_ids = [self.manager.new_game() for _ in range(3)]
+        self.manager.play(self.game_ids[0], {'gameId': self.game_ids[0], 'action': Action.END_TURN_PLAYER.value})
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def restored(self, memory_budget=None) -> GameManager:
+        self.assertEqual(3, self.manager.snapshot(self.path))
+        manager = GameManager(memory_budget=memory_budget)
+        self.assertEqual(max(self.game_ids), manager.restore(self.path))
+        return manager
+
+    def test_restores_games_lazily(self):
+        manager = self.restored()
+        self.assertEqual(3, manager.game_count())
+        self.assertEqual(0, len(manager._games))
+
+        _, content = manager.game_state(self.game_ids[0])
+        _, expected = self.manager.game_state(self.game_ids[0])
+        self.assertEqual(json.loads(expected), json.loads(content))
+        self.assertEqual(1, len(manager._games))
+
+    def test_restored_games_fit_in_the_memory_budget(self):
+        # room for one game at a time
+        size = max(estimate_game_size(self.manager.get_game(game_id)) for game_id in self.game_ids)
+        manager = self.restored(memory_budget=size * 3 // 2)
+        first, second, third = self.game_ids
+
+        manager.get_game(first)
+        manager.get_game(second)
+        self.assertEqual([second], list(manager._games))
+        self.assertEqual(1, manager.stats()['evictions'])
+        self.assertLessEqual(manager.stats()['memoryUsage'], size * 3 // 2)
+
+        # no room while the loaded game is in use: the third one stays in the snapshot
+        with manager.checkout(second):
+            self.assertRaises(CapacityError, manager.get_game, third)
+        self.assertEqual([second], list(manager._games))
+        manager.get_game(third)
+        self.assertEqual([third], list(manager._games))
+
+    def test_new_games_get_new_ids(self):
+        manager = self.restored()
+        self.assertGreater(manager.new_game(), max(self.game_ids))
+
+    def test_removed_games_stay_removed(self):
+        manager = self.restored()
+        manager.remove_game(self.game_ids[1])
+        manager.get_game(self.game_ids[2])
+        manager.remove_game(self.game_ids[2])
+        self.assertEqual(1, manager.game_count())
+        for game_id in self.game_ids[1:]:
+            with self.assertRaises(ServerError):
+                manager.get_game(game_id)
+
+        self.assertEqual(1, manager.snapshot(self.path))
+
+    def test_only_snapshots_changes(self):
+        manager = self.restored()
+        self.assertIsNone(manager.snapshot(self.path, only_if_changed=True))
+        manager.new_game()
+        self.assertEqual(4, manager.snapshot(self.path, only_if_changed=True))
+        self.assertIsNone(manager.snapshot(self.path, only_if_changed=True))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import os
+import threading
+import unittest
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'djdashboard.settings')
+from django.core.cache.backends.locmem import LocMemCache
+from pazaak.server.throttling import TokenBucket, throttle_stats
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TokenBucketTest(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = _Clock()
+        self.cache = LocMemCache('throttling-test', {})
+        # local memory caches of the same name share their contents
+        self.cache.clear()
+        self.bucket = TokenBucket('test', rate=2.0, burst=3, cache=self.cache, clock=self.clock)
+
+    def test_allows_burst_then_rejects(self):
+        self.assertEqual([0, 0, 0], [self.bucket.consume('a') for _ in range(3)])
+        self.assertAlmostEqual(0.5, self.bucket.consume('a'))
+
+    def test_refills_over_time(self):
+        for _ in range(3):
+            self.bucket.consume('a')
+        self.clock.now += 0.5
+        self.assertEqual(0, self.bucket.consume('a'))
+        self.assertGreater(self.bucket.consume('a'), 0)
+
+    def test_idle_time_does_not_pile_up_tokens(self):
+        self.bucket.consume('a')
+        self.clock.now += 60
+        self.assertEqual([0, 0, 0], [self.bucket.consume('a') for _ in range(3)])
+        self.assertGreater(self.bucket.consume('a'), 0)
+
+    def test_rejected_requests_take_no_tokens(self):
+        for _ in range(10):
+            self.bucket.consume('a')
+        self.clock.now += 0.5
+        self.assertEqual(0, self.bucket.consume('a'))
+
+    def test_buckets_are_shared_through_the_cache(self):
+        # as in another server process
+        other = TokenBucket('test', rate=2.0, burst=3, cache=self.cache, clock=self.clock)
+        self.assertEqual([0, 0, 0], [bucket.consume('a') for bucket in (self.bucket, other, self.bucket)])
+        self.assertGreater(other.consume('a'), 0)
+
+    def test_concurrent_requests_take_one_token_each(self):
+        waits = []
+        threads = [threading.Thread(target=lambda: waits.append(self.bucket.consume('a'))) for _ in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(3, waits.count(0))
+
+    def test_clients_have_separate_buckets(self):
+        for _ in range(3):
+            self.bucket.consume('a')
+        self.assertEqual(0, self.bucket.consume('b'))
+
+    def test_counts_outcomes(self):
+        before = throttle_stats().get('test', {'allowed': 0, 'rejected': 0})
+        for _ in range(4):
+            self.bucket.consume('c')
+        after = throttle_stats()['test']
+        self.assertEqual(3, after['allowed'] - before['allowed'])
+        self.assertEqual(1, after['rejected'] - before['rejected'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -17,19 +17,34 @@
 #    PazaakGameView stores a static collection of games that each view can access.
 #    This is explained more in detail in pazaak/server/game.py,
 #    but it does mean that all views _must_ be derived from PazaakGameView.
+#    The game manager hands back responses already encoded as JSON, so views return them as they are
+#    (the games may live in engine processes -- see pazaak/server/engine.py).
+import hmac
 import json
+import logging
 
-from django.http import HttpRequest, HttpResponse, JsonResponse
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse, HttpResponseForbidden, HttpResponseNotModified, JsonResponse, \
+                        StreamingHttpResponse
+from django.utils.dateparse import parse_datetime
+from django.utils.http import parse_etags
 
-from pazaak.server.game import PazaakGameView
+from pazaak.enums import Difficulty
+from pazaak.errors import CapacityError
+from pazaak.server.game import AUDIT_PAGE_SIZE, EXPORT_BATCH_SIZE, PazaakGameView
+from pazaak.server.throttling import throttle, throttle_stats
 from pazaak.server.utilities import allow_cors, RequestType
 
 
+logger = logging.getLogger(__name__)
+
 # TODO find a more central place for this function
 def client_url() -> str:
     return 'http://localhost:3000'
 
 _CLIENT_URL = client_url()
+_JSON_CONTENT_TYPE = 'application/json'
+_NDJSON_CONTENT_TYPE = 'application/x-ndjson'
 
 class NewGameView(PazaakGameView):
     @staticmethod
@@ -37,26 +52,59 @@ class NewGameView(PazaakGameView):
         return '/api/new-game'
 
     @allow_cors(_CLIENT_URL, RequestType.GET)
+    @throttle('new-game')
     def get(self) -> HttpResponse:
-        game_count = self.game_manager.game_count()
-        print(game_count)
-        if game_count and game_count % 10 == 0:
-            self.game_manager.clean_games()
-
-        game_id = self.game_manager.new_game()
-        game = self.game_manager.get_game(game_id)
-        context = game.json()
-        context['gameId'] = game_id
-
-        return JsonResponse(context)
+        return self._new_game(Difficulty.NORMAL)
 
     @allow_cors(_CLIENT_URL, RequestType.POST)
+    @throttle('new-game')
     def post(self, request: HttpRequest) -> HttpResponse:
+        """
+        Starts a new game, discarding the one in `gameId` (if any).
+        `difficulty` optionally picks the opponent (see pazaak.enums.Difficulty); defaults to normal.
+        """
         payload = json.loads(request.body)
         if 'gameId' in payload:
             game_id = payload['gameId']
             self.game_manager.remove_game(game_id)
-        return self.get(request)
+        difficulty = Difficulty(payload.get('difficulty', Difficulty.NORMAL.value))
+        return self._new_game(difficulty)
+
+    def _new_game(self, difficulty: Difficulty) -> HttpResponse:
+        game_count = self.game_manager.game_count()
+        logger.debug('starting a game', extra={'games': game_count, 'difficulty': difficulty.name})
+        if game_count and game_count % 10 == 0:
+            self.game_manager.clean_games()
+
+        try:
+            content = self.game_manager.start_game(difficulty)
+        except CapacityError as e:
+            # every game still held is in use -- the client should try again later
+            return JsonResponse({'error': str(e)}, status=503)
+        return HttpResponse(content, content_type=_JSON_CONTENT_TYPE)
+
+
+class GameStateView(PazaakGameView):
+    @staticmethod
+    def url() -> str:
+        return '/api/game-state'
+
+    @allow_cors(_CLIENT_URL, RequestType.GET)
+    def get(self, request: HttpRequest) -> HttpResponse:
+        """
+        Returns the current state of the game in the `gameId` query parameter, with an ETag.
+        Answers 304 (without serializing the game) if the client's If-None-Match already has that ETag.
+        """
+        if 'gameId' not in request.GET:
+            raise ValueError('Front-end did not send up a game ID')
+        game_id = int(request.GET['gameId'])
+        etags = parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))
+
+        etag, content = self.game_manager.game_state(game_id, etags)
+        response = HttpResponseNotModified() if content is None else HttpResponse(content, content_type=_JSON_CONTENT_TYPE)
+        response['ETag'] = etag
+        response['Cache-Control'] = 'no-cache'
+        return response
 
 
 class EndTurnView(PazaakGameView):
@@ -65,10 +113,11 @@ class EndTurnView(PazaakGameView):
         return '/api/end-turn'
 
     @allow_cors(_CLIENT_URL, RequestType.POST)
+    @throttle('move')
     def post(self, request: HttpRequest) -> HttpResponse:
         payload = json.loads(request.body)
-        context = self.process_post(payload)
-        return JsonResponse(context)
+        content = self.process_post(payload)
+        return HttpResponse(content, content_type=_JSON_CONTENT_TYPE)
 
 
 class StandView(PazaakGameView):
@@ -77,10 +126,11 @@ class StandView(PazaakGameView):
         return '/api/stand'
 
     @allow_cors(_CLIENT_URL, RequestType.POST)
+    @throttle('move')
     def post(self, request: HttpRequest) -> HttpResponse:
         payload = json.loads(request.body)
-        context = self.process_post(payload)
-        return JsonResponse(context)
+        content = self.process_post(payload)
+        return HttpResponse(content, content_type=_JSON_CONTENT_TYPE)
 
 
 class SelectHandCardView(PazaakGameView):
@@ -89,7 +139,166 @@ class SelectHandCardView(PazaakGameView):
         return '/api/select-hand-card'
 
     @allow_cors(_CLIENT_URL, RequestType.POST)
+    @throttle('move')
     def post(self, request: HttpRequest) -> HttpResponse:
         payload = json.loads(request.body)
-        context = self.process_post(payload)
-        return JsonResponse(context)
\ No newline at end of file
+        content = self.process_post(payload)
+        return HttpResponse(content, content_type=_JSON_CONTENT_TYPE)
+
+
+class MatchmakingJoinView(PazaakGameView):
+    @staticmethod
+    def url() -> str:
+        return '/api/matchmaking/join'
+
+    @allow_cors(_CLIENT_URL, RequestType.POST)
+    @throttle('new-game')
+    def post(self, request: HttpRequest) -> HttpResponse:
+        """
+        Queues the player for a player-vs-player game against someone of a similar `rating`,
+        and returns the "ticket" to poll the matchmaker with.
+        """
+        payload = json.loads(request.body)
+        ticket = self.matchmaker.join(payload['rating'])
+        return JsonResponse({'ticket': ticket})
+
+
+class MatchmakingPollView(PazaakGameView):
+    @staticmethod
+    def url() -> str:
+        return '/api/matchmaking/poll'
+
+    @allow_cors(_CLIENT_URL, RequestType.GET)
+    @throttle('move')
+    def get(self, request: HttpRequest) -> HttpResponse:
+        """
+        Tells whether the player with the `ticket` query parameter has been matched.
+        Once they are, returns the "gameId", the "seat" they play and the "seatToken" to send with their moves,
+        which go through the usual endpoints. A ticket that isn't polled for a while is dropped.
+        """
+        if 'ticket' not in request.GET:
+            raise ValueError('Front-end did not send up a matchmaking ticket')
+
+        try:
+            match = self.matchmaker.poll(request.GET['ticket'])
+        except CapacityError as e:
+            return JsonResponse({'error': str(e)}, status=503)
+
+        if match is None:
+            return JsonResponse({'matched': False})
+        return JsonResponse({'matched': True, 'gameId': match.game_id, 'seat': match.seat.value,
+                             'seatToken': match.seat_token})
+
+
+class MatchmakingLeaveView(PazaakGameView):
+    @staticmethod
+    def url() -> str:
+        return '/api/matchmaking/leave'
+
+    @allow_cors(_CLIENT_URL, RequestType.POST)
+    def post(self, request: HttpRequest) -> HttpResponse:
+        payload = json.loads(request.body)
+        self.matchmaker.leave(payload['ticket'])
+        return JsonResponse({})
+
+
+class GameStatsView(PazaakGameView):
+    @staticmethod
+    def url() -> str:
+        return '/api/stats'
+
+    @allow_cors(_CLIENT_URL, RequestType.GET)
+    def get(self, request: HttpRequest) -> HttpResponse:
+        """
+        Reports the number of live games, their estimated memory usage and budget, how many games were evicted,
+        how many requests of each throttled scope were allowed and rejected, and the matchmaking queue.
+
+        Admin-only, like the game export endpoint.
+        """
+        if not _is_admin_request(request):
+            return HttpResponseForbidden()
+
+        stats = self.game_manager.stats()
+        stats['throttling'] = throttle_stats()
+        stats['matchmaking'] = self.matchmaker.stats()
+        return JsonResponse(stats)
+
+
+class GameExportView(PazaakGameView):
+    @staticmethod
+    def url() -> str:
+        return '/api/export-games'
+
+    def get(self, request: HttpRequest) -> HttpResponse:
+        """
+        Streams every finished game as newline-delimited JSON, one game per line, in game ID order.
+        Only games with an ID greater than the optional `after` query parameter are exported,
+        so an interrupted export resumes from the "gameId" of the last line received.
+
+        Admin-only: the request must come from a staff user, or carry the PAZAAK_EXPORT_TOKEN setting
+        as a bearer token (see the export_games management command).
+        """
+        if not _is_admin_request(request):
+            return HttpResponseForbidden()
+
+        after = int(request.GET.get('after', -1))
+        return StreamingHttpResponse(self._export_lines(after), content_type=_NDJSON_CONTENT_TYPE)
+
+    def _export_lines(self, after: int):
+        """
+        Yields the exported games batch by batch, so only one batch is held in memory at a time.
+        """
+        while True:
+            batch = self.game_manager.export_games(after, EXPORT_BATCH_SIZE)
+            for _, line in batch:
+                yield line
+            if len(batch) < EXPORT_BATCH_SIZE:
+                return
+            after = batch[-1][0]
+
+
+class GameAuditView(PazaakGameView):
+    @staticmethod
+    def url() -> str:
+        return '/api/audit-game'
+
+    def get(self, request: HttpRequest) -> HttpResponse:
+        """
+        Pages through the recorded history of the game in the `gameId` query parameter and of both of its players,
+        oldest update first. Pages hold up to `limit` updates (PAZAAK_AUDIT_PAGE_SIZE by default);
+        the next page starts after the cursor given as the `afterTime` and `afterSequence` query parameters,
+        which the "next" object of the previous page holds.
+
+        Admin-only, like the game export endpoint.
+        """
+        if not _is_admin_request(request):
+            return HttpResponseForbidden()
+        if 'gameId' not in request.GET:
+            raise ValueError('Front-end did not send up a game ID')
+
+        game_id = int(request.GET['gameId'])
+        limit = int(request.GET.get('limit', getattr(settings, 'PAZAAK_AUDIT_PAGE_SIZE', AUDIT_PAGE_SIZE)))
+        after = None
+        if 'afterTime' in request.GET:
+            after_time = parse_datetime(request.GET['afterTime'])
+            if after_time is None:
+                raise ValueError('invalid audit cursor time "{0}"'.format(request.GET['afterTime']))
+            after = (after_time, int(request.GET.get('afterSequence', 0)))
+
+        content = self.game_manager.audit_game(game_id, after, limit)
+        return HttpResponse(content, content_type=_JSON_CONTENT_TYPE)
+
+
+def _is_admin_request(request: HttpRequest) -> bool:
+    """
+    Admin endpoints accept staff users, and requests carrying the PAZAAK_EXPORT_TOKEN setting as a bearer token.
+    """
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_active and user.is_staff:
+        return True
+
+    token = getattr(settings, 'PAZAAK_EXPORT_TOKEN', None)
+    authorization = request.META.get('HTTP_AUTHORIZATION', '')
+    prefix = 'Bearer '
+    return bool(token) and authorization.startswith(prefix) and \
+           hmac.compare_digest(authorization[len(prefix):].encode(), token.encode())